@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Document, DocumentType, ProcessingResult, NamedEntity
+from .models import (
+    Document, DocumentType, DocumentPage, ProcessingResult, NamedEntity, ProcessingJob, ProcessingStage,
+    KeywordCorpus, KeywordTerm
+)
 
 @admin.register(DocumentType)
 class DocumentTypeAdmin(admin.ModelAdmin):
@@ -25,3 +28,34 @@ class NamedEntityAdmin(admin.ModelAdmin):
     list_display = ('text', 'entity_type', 'document', 'confidence_score', 'source')
     list_filter = ('entity_type', 'confidence_score', 'source')
     search_fields = ('text', 'document__title')
+
+@admin.register(DocumentPage)
+class DocumentPageAdmin(admin.ModelAdmin):
+    list_display = ('document', 'page_number', 'method', 'extraction_time', 'created_at')
+    list_filter = ('method', 'created_at')
+    search_fields = ('document__title', 'text')
+    readonly_fields = ('char_start', 'char_end', 'extraction_time', 'created_at')
+
+@admin.register(ProcessingStage)
+class ProcessingStageAdmin(admin.ModelAdmin):
+    list_display = ('document', 'name', 'duration', 'updated_at')
+    list_filter = ('name', 'updated_at')
+    search_fields = ('document__title', 'fingerprint')
+    readonly_fields = ('fingerprint', 'duration', 'created_at', 'updated_at')
+
+@admin.register(ProcessingJob)
+class ProcessingJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'document', 'status', 'attempts', 'max_attempts', 'worker_id', 'created_at', 'finished_at')
+    list_filter = ('status', 'use_advanced', 'force', 'created_at')
+    search_fields = ('document__title', 'worker_id', 'last_error')
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'heartbeat_at', 'lease_expires_at', 'worker_id')
+
+@admin.register(KeywordCorpus)
+class KeywordCorpusAdmin(admin.ModelAdmin):
+    list_display = ('language', 'document_count', 'updated_at')
+
+@admin.register(KeywordTerm)
+class KeywordTermAdmin(admin.ModelAdmin):
+    list_display = ('term', 'language', 'document_count')
+    list_filter = ('language',)
+    search_fields = ('term',)
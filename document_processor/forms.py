@@ -1,8 +1,10 @@
 """
 Forms for document upload and processing
 """
+import hashlib
 from django import forms
 from .models import Document, DocumentType
+from .utils.extractors import find_extractor, sniff_mime_type, supported_extensions
 
 class DocumentUploadForm(forms.ModelForm):
     """
@@ -46,6 +48,9 @@ class DocumentUploadForm(forms.ModelForm):
                 
         # Add help text for language field
         self.fields['language'].help_text = "Select the primary language of the document"
+        
+        # Formats with a registered extractor, for the upload page
+        self.supported_formats = ', '.join(ext.upper() for ext in supported_extensions())
     
     def clean_file(self):
         """Validate the uploaded file"""
@@ -54,7 +59,7 @@ class DocumentUploadForm(forms.ModelForm):
         if file:
             # Check file extension
             ext = file.name.split('.')[-1].lower()
-            allowed_extensions = ['pdf', 'jpg', 'jpeg', 'png', 'txt', 'doc', 'docx']
+            allowed_extensions = supported_extensions()
             
             if ext not in allowed_extensions:
                 raise forms.ValidationError(
@@ -64,6 +69,24 @@ class DocumentUploadForm(forms.ModelForm):
             # Check file size (10 MB limit)
             if file.size > 10 * 1024 * 1024:
                 raise forms.ValidationError("File size must be less than 10 MB")
+            
+            # Check that the content itself can be extracted, so mislabelled
+            # files are rejected now rather than when processing fails; the
+            # upload handlers sniff the type from the first chunk received
+            mime_type = getattr(file, 'mime_type', None) or sniff_mime_type(file, file.name)
+            if find_extractor(mime_type, file.name) is None:
+                raise forms.ValidationError(
+                    f"The file content ({mime_type}) does not match a supported format."
+                )
+            file.mime_type = mime_type
+            
+            # Fingerprint for deduplication; the upload handlers compute it
+            # while the file streams in, other files are hashed here
+            if not getattr(file, 'content_hash', None):
+                hasher = hashlib.sha256()
+                for chunk in file.chunks():
+                    hasher.update(chunk)
+                file.content_hash = hasher.hexdigest()
         
         return file
     
@@ -75,19 +98,14 @@ class DocumentUploadForm(forms.ModelForm):
         if self.user:
             instance.uploaded_by = self.user
         
-        # Set file_type based on file extension
-        if instance.file:
-            ext = instance.file.name.split('.')[-1].lower()
-            mime_types = {
-                'pdf': 'application/pdf',
-                'jpg': 'image/jpeg',
-                'jpeg': 'image/jpeg',
-                'png': 'image/png',
-                'txt': 'text/plain',
-                'doc': 'application/msword',
-                'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-            }
-            instance.file_type = mime_types.get(ext, 'application/octet-stream')
+        # Store the file fingerprint computed during validation
+        file = self.cleaned_data.get('file')
+        if file is not None and getattr(file, 'content_hash', None):
+            instance.content_hash = file.content_hash
+        
+        # Set file_type to the type sniffed from the file content
+        if file is not None and getattr(file, 'mime_type', None):
+            instance.file_type = file.mime_type
         
         if commit:
             instance.save()
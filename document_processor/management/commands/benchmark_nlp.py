@@ -0,0 +1,81 @@
+import os
+import time
+from django.core.management.base import BaseCommand, CommandError
+from document_processor.models import Document
+from document_processor.utils.nlp import DEFAULT_LANGUAGE, PIPELINE_PROFILES, ModelRegistry, get_nlp_settings
+
+
+class Command(BaseCommand):
+    help = 'Compare spaCy pipeline profiles by load time and parsing throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*',
+                            help='Text files, or directories of .txt files, to parse')
+        parser.add_argument('--documents', type=int, default=None,
+                            help='Also parse the extracted text of this many processed documents')
+        parser.add_argument('--profiles', nargs='+', default=None,
+                            help='Profiles to compare (default: all)')
+        parser.add_argument('--language', default=DEFAULT_LANGUAGE,
+                            help='Language whose spaCy model is benchmarked (default: en)')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Texts per nlp.pipe batch (default: NLP_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        texts = []
+        for path in options['paths']:
+            if os.path.isdir(path):
+                files = [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith('.txt')]
+            elif os.path.isfile(path):
+                files = [path]
+            else:
+                raise CommandError(f"No such file or directory: {path}")
+            for file_path in files:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    texts.append(f.read())
+
+        if options['documents']:
+            documents = Document.objects.filter(
+                language=options['language'], extracted_text__isnull=False
+            ).exclude(extracted_text='').order_by('-uploaded_at')
+            texts.extend(documents.values_list('extracted_text', flat=True)[:options['documents']])
+
+        if not texts:
+            raise CommandError("No texts to parse")
+
+        profiles = options['profiles'] or list(PIPELINE_PROFILES)
+        unknown = [name for name in profiles if name not in PIPELINE_PROFILES]
+        if unknown:
+            raise CommandError(f"Unknown pipeline profile: {', '.join(unknown)}")
+
+        batch_size = options['batch_size'] or get_nlp_settings()['BATCH_SIZE']
+        characters = sum(len(text) for text in texts)
+
+        self.stdout.write(f'Benchmarking {len(profiles)} profile(s) on {len(texts)} text(s), '
+                          f'{characters} characters...')
+        self.stdout.write(f"{'profile':<15}{'load s':>8}{'parse s':>10}{'docs/s':>10}{'chars/s':>12}"
+                          f"{'entities':>10}{'sentences':>11}  components")
+
+        for name in profiles:
+            # A fresh registry per profile so every load is timed cold
+            registry = ModelRegistry()
+            start_time = time.perf_counter()
+            nlp = registry.get_spacy(options['language'], name)
+            load_time = time.perf_counter() - start_time
+
+            entities = 0
+            sentences = 0
+            start_time = time.perf_counter()
+            for doc in nlp.pipe(texts, batch_size=batch_size):
+                entities += len(doc.ents)
+                if doc.has_annotation('SENT_START'):
+                    sentences += sum(1 for _ in doc.sents)
+            parse_time = time.perf_counter() - start_time
+
+            docs_rate = len(texts) / parse_time if parse_time else 0.0
+            chars_rate = characters / parse_time if parse_time else 0.0
+            self.stdout.write(
+                f"{name:<15}{load_time:>8.2f}{parse_time:>10.2f}{docs_rate:>10.1f}{chars_rate:>12.0f}"
+                f"{entities:>10}{sentences:>11}  {', '.join(nlp.pipe_names)}"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
@@ -0,0 +1,90 @@
+import os
+import time
+import difflib
+import pytesseract
+from PIL import Image
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from document_processor.utils.preprocessing import PREPROCESSING_PROFILES, get_profile, preprocess_image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.tiff', '.tif', '.bmp')
+
+
+def text_accuracy(expected, actual):
+    """Similarity of two texts after normalising whitespace, from 0.0 to 1.0"""
+    expected = ' '.join(expected.split())
+    actual = ' '.join(actual.split())
+    if not expected and not actual:
+        return 1.0
+    return difflib.SequenceMatcher(None, expected, actual, autojunk=False).ratio()
+
+
+class Command(BaseCommand):
+    help = 'Compare OCR preprocessing profiles by time and accuracy on sample images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+',
+                            help='Images, or directories of images, to benchmark. '
+                                 'A <name>.txt file next to an image holds its expected text')
+        parser.add_argument('--profiles', nargs='+', default=None,
+                            help='Profiles to compare (default: all)')
+        parser.add_argument('--language', default=None,
+                            help='Tesseract language code (default: OCR_LANGUAGE)')
+
+    def handle(self, *args, **options):
+        images = []
+        for path in options['paths']:
+            if os.path.isdir(path):
+                images.extend(
+                    os.path.join(path, name) for name in sorted(os.listdir(path))
+                    if name.lower().endswith(IMAGE_EXTENSIONS)
+                )
+            elif os.path.isfile(path):
+                images.append(path)
+            else:
+                raise CommandError(f"No such file or directory: {path}")
+        if not images:
+            raise CommandError("No images found")
+
+        profile_names = options['profiles'] or list(PREPROCESSING_PROFILES)
+        try:
+            profiles = {name: get_profile(name) for name in profile_names}
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        language = options['language'] or getattr(settings, 'OCR_LANGUAGE', 'eng')
+        tesseract_path = getattr(settings, 'TESSERACT_PATH', None)
+        if tesseract_path:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+
+        self.stdout.write(f'Benchmarking {len(profiles)} profile(s) on {len(images)} image(s)...')
+        self.stdout.write(f"{'profile':<12}{'preprocess s':>14}{'ocr s':>10}{'total s':>10}{'accuracy':>10}")
+
+        for name, profile in profiles.items():
+            preprocess_time = 0.0
+            ocr_time = 0.0
+            scores = []
+
+            for image_path in images:
+                with Image.open(image_path) as image:
+                    image.load()
+                    start_time = time.perf_counter()
+                    prepared = preprocess_image(image, profile)
+                    preprocess_time += time.perf_counter() - start_time
+
+                    start_time = time.perf_counter()
+                    text = pytesseract.image_to_string(prepared, lang=language)
+                    ocr_time += time.perf_counter() - start_time
+
+                expected_path = os.path.splitext(image_path)[0] + '.txt'
+                if os.path.exists(expected_path):
+                    with open(expected_path, 'r', encoding='utf-8') as f:
+                        scores.append(text_accuracy(f.read(), text))
+
+            accuracy = f"{sum(scores) / len(scores):.1%}" if scores else 'n/a'
+            self.stdout.write(
+                f"{name:<12}{preprocess_time:>14.2f}{ocr_time:>10.2f}"
+                f"{preprocess_time + ocr_time:>10.2f}{accuracy:>10}"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
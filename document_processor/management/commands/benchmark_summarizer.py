@@ -0,0 +1,152 @@
+import os
+import re
+import time
+from django.core.management.base import BaseCommand, CommandError
+from document_processor.models import Document
+from document_processor.utils.nlp import DEFAULT_LANGUAGE, get_processor
+from document_processor.utils.summarizer import SUMMARY_METHODS, rank_sentences, select_sentences
+
+# Method the others are compared against
+BASELINE_METHOD = 'keywords'
+
+# Suffix of the file holding a reference summary for <name>.txt
+REFERENCE_SUFFIX = '.summary.txt'
+
+
+def rouge1_f1(reference, summary):
+    """Unigram overlap F1 of a summary against a reference summary"""
+    reference_words = re.findall(r'\w+', reference.lower())
+    summary_words = re.findall(r'\w+', summary.lower())
+    if not reference_words or not summary_words:
+        return 0.0
+    remaining = {}
+    for word in reference_words:
+        remaining[word] = remaining.get(word, 0) + 1
+    overlap = 0
+    for word in summary_words:
+        if remaining.get(word):
+            remaining[word] -= 1
+            overlap += 1
+    if not overlap:
+        return 0.0
+    precision = overlap / len(summary_words)
+    recall = overlap / len(reference_words)
+    return 2 * precision * recall / (precision + recall)
+
+
+class Command(BaseCommand):
+    help = 'Compare summary methods by speed and quality'
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*',
+                            help='Text files, or directories of .txt files, to summarize. '
+                                 f'A <name>{REFERENCE_SUFFIX} file next to a text holds its reference summary')
+        parser.add_argument('--documents', type=int, default=None,
+                            help='Also summarize the extracted text of this many processed documents')
+        parser.add_argument('--methods', nargs='+', default=None,
+                            help='Methods to compare (default: all)')
+        parser.add_argument('--sentences', type=int, default=3,
+                            help='Sentences per summary (default: 3)')
+        parser.add_argument('--language', default=DEFAULT_LANGUAGE,
+                            help='Language of the texts (default: en)')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Timed runs per method and text; the fastest counts (default: 3)')
+
+    def read_texts(self, options):
+        texts = []
+        for path in options['paths']:
+            if os.path.isdir(path):
+                files = [
+                    os.path.join(path, name) for name in sorted(os.listdir(path))
+                    if name.endswith('.txt') and not name.endswith(REFERENCE_SUFFIX)
+                ]
+            elif os.path.isfile(path):
+                files = [path]
+            else:
+                raise CommandError(f"No such file or directory: {path}")
+
+            for file_path in files:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+                reference = None
+                reference_path = os.path.splitext(file_path)[0] + REFERENCE_SUFFIX
+                if os.path.exists(reference_path):
+                    with open(reference_path, 'r', encoding='utf-8') as f:
+                        reference = f.read()
+                texts.append((text, reference))
+
+        if options['documents']:
+            documents = Document.objects.filter(
+                language=options['language'], extracted_text__isnull=False
+            ).exclude(extracted_text='').order_by('-uploaded_at')
+            texts.extend(
+                (text, None) for text in documents.values_list('extracted_text', flat=True)[:options['documents']]
+            )
+
+        return texts
+
+    def handle(self, *args, **options):
+        methods = options['methods'] or list(SUMMARY_METHODS)
+        unknown = [method for method in methods if method not in SUMMARY_METHODS]
+        if unknown:
+            raise CommandError(f"Unknown summary method: {', '.join(unknown)}")
+        if options['sentences'] < 1 or options['repeat'] < 1:
+            raise CommandError("--sentences and --repeat must be at least 1")
+
+        texts = self.read_texts(options)
+        if not texts:
+            raise CommandError("No texts to summarize")
+
+        # Parse once; only the sentence ranking is timed
+        processor = get_processor(options['language'])
+        parsed = []
+        for text, reference in texts:
+            analysis = processor.analyze(text)
+            keywords = [kw[0] for kw in analysis.keywords(20)]
+            document_keywords = set(kw[0] for kw in analysis.keywords(10))
+            parsed.append((analysis.sentences, analysis.sentence_terms, keywords, document_keywords, reference))
+
+        sentence_count = sum(len(sentences) for sentences, *_ in parsed)
+        self.stdout.write(f'Benchmarking {len(methods)} method(s) on {len(parsed)} text(s), '
+                          f'{sentence_count} sentences...')
+        self.stdout.write(f"{'method':<10}{'total ms':>10}{'ms/text':>10}{'rouge-1':>9}"
+                          f"{'keywords':>10}{f'vs {BASELINE_METHOD}':>13}")
+
+        baseline = [
+            select_sentences(rank_sentences(sentences, terms, keywords, BASELINE_METHOD), options['sentences'])
+            for sentences, terms, keywords, _, _ in parsed
+        ]
+
+        for method in methods:
+            total_time = 0.0
+            rouge_scores = []
+            coverage = []
+            agreement = []
+
+            for (sentences, terms, keywords, document_keywords, reference), expected in zip(parsed, baseline):
+                fastest = None
+                for _ in range(options['repeat']):
+                    start_time = time.perf_counter()
+                    selected = select_sentences(rank_sentences(sentences, terms, keywords, method), options['sentences'])
+                    elapsed = time.perf_counter() - start_time
+                    fastest = elapsed if fastest is None else min(fastest, elapsed)
+                total_time += fastest
+
+                summary = ' '.join(sentences[i] for i in selected)
+                if reference is not None:
+                    rouge_scores.append(rouge1_f1(reference, summary))
+                if document_keywords:
+                    summary_terms = {term for i in selected for term in terms[i]}
+                    coverage.append(len(document_keywords & summary_terms) / len(document_keywords))
+                if selected or expected:
+                    agreement.append(len(set(selected) & set(expected)) / len(set(selected) | set(expected)))
+
+            rouge = f"{sum(rouge_scores) / len(rouge_scores):.3f}" if rouge_scores else 'n/a'
+            keyword_coverage = f"{sum(coverage) / len(coverage):.1%}" if coverage else 'n/a'
+            overlap = f"{sum(agreement) / len(agreement):.1%}" if agreement else 'n/a'
+            self.stdout.write(
+                f"{method:<10}{total_time * 1000:>10.2f}{total_time * 1000 / len(parsed):>10.3f}"
+                f"{rouge:>9}{keyword_coverage:>10}{overlap:>13}"
+            )
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
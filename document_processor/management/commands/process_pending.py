@@ -0,0 +1,60 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from document_processor.models import Document
+from document_processor.utils.document_processor import process_documents
+from document_processor.utils.job_queue import enqueue_job
+
+
+class Command(BaseCommand):
+    help = 'Process pending documents in bulk, streaming them through spaCy in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Documents per spaCy batch and per database write (default: NLP_BATCH_SIZE)')
+        parser.add_argument('--n-process', type=int, default=None,
+                            help='spaCy parsing processes (default: NLP_N_PROCESS)')
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Process at most this many documents')
+        parser.add_argument('--include-failed', action='store_true',
+                            help='Also retry documents whose processing failed')
+        parser.add_argument('--skip-groq', action='store_true',
+                            help='Do not queue the GROQ stages for the processed documents')
+
+    def handle(self, *args, **options):
+        for option in ('batch_size', 'n_process', 'limit'):
+            if options[option] is not None and options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be at least 1")
+
+        statuses = ['pending', 'failed'] if options['include_failed'] else ['pending']
+        # Documents already waiting for a worker are left to it
+        documents = Document.objects.filter(status__in=statuses).exclude(
+            jobs__status__in=('queued', 'running')
+        ).order_by('uploaded_at')
+        document_ids = list(documents.values_list('pk', flat=True).distinct()[:options['limit']])
+
+        if not document_ids:
+            self.stdout.write('No pending documents')
+            return
+
+        self.stdout.write(f'Processing {len(document_ids)} document(s)...')
+        start_time = time.time()
+        outcome = process_documents(
+            document_ids,
+            batch_size=options['batch_size'],
+            n_process=options['n_process']
+        )
+        elapsed = time.time() - start_time
+
+        completed = len(outcome['completed'])
+        rate = completed / elapsed if elapsed else 0.0
+        self.stdout.write(f'{completed} completed, {len(outcome["failed"])} failed '
+                          f'in {elapsed:.2f}s ({rate:.1f} documents/s)')
+
+        # The workers reuse the stored NLP stages and only run the GROQ ones
+        if settings.ENABLE_ADVANCED_FEATURES and not options['skip_groq']:
+            for document in Document.objects.filter(pk__in=outcome['completed']):
+                enqueue_job(document)
+            self.stdout.write(f'Queued GROQ analysis for {completed} document(s)')
+
+        self.stdout.write(self.style.SUCCESS('Batch processing complete'))
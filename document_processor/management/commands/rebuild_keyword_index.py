@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from document_processor.models import ProcessingResult, ProcessingStage
+from document_processor.utils.document_processor import KEYWORD_COUNT
+from document_processor.utils.keywords import get_keyword_index, top_keywords
+
+# Stored term counts read from the database at a time
+CHUNK_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the TF-IDF keyword index from the stored term counts of processed documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--language', default=None,
+                            help='Only rebuild the index of this language (default: all)')
+        parser.add_argument('--rescore', action='store_true',
+                            help='Also rescore the keywords of every document against the rebuilt index')
+
+    def term_stages(self, language):
+        return ProcessingStage.objects.filter(
+            name='terms', document__status='completed', document__language=language
+        ).order_by('pk')
+
+    def handle(self, *args, **options):
+        if options['language']:
+            languages = [options['language']]
+        else:
+            languages = sorted(set(ProcessingStage.objects.filter(
+                name='terms', document__status='completed'
+            ).values_list('document__language', flat=True)))
+
+        for language in languages:
+            index = get_keyword_index(language)
+            stages = self.term_stages(language)
+            index.rebuild(output for output in stages.values_list('output', flat=True).iterator(CHUNK_SIZE))
+            self.stdout.write(f'{language}: {index.document_count()} document(s) indexed')
+
+            if options['rescore']:
+                rescored = 0
+                for stage in stages.select_related('document').iterator(CHUNK_SIZE):
+                    # The document is already counted, with the same terms
+                    keywords = top_keywords(stage.output or {}, language, KEYWORD_COUNT, previous=stage.output)
+                    with transaction.atomic():
+                        ProcessingStage.objects.filter(document=stage.document, name='keywords').update(output=keywords)
+                        ProcessingResult.objects.filter(document=stage.document).update(
+                            keyword_summary=', '.join(keyword for keyword, _ in keywords)
+                        )
+                    rescored += 1
+                self.stdout.write(f'{language}: rescored the keywords of {rescored} document(s)')
+
+        self.stdout.write(self.style.SUCCESS('Keyword index rebuilt'))
@@ -0,0 +1,92 @@
+import signal
+import threading
+import multiprocessing
+from django.core.management.base import BaseCommand
+from django.db import connections
+from document_processor.utils.job_queue import run_worker, get_worker_id, get_queue_settings
+from document_processor.utils.nlp import model_registry
+from document_processor.utils.groq_processor import get_llm_cache
+from document_processor.utils.ocr import get_ocr_cache
+
+
+def _worker_main(options):
+    """Entry point for a forked worker process"""
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+
+    worker_id = get_worker_id()
+
+    # Load NLP models before the first job instead of inside it
+    if not options['no_warmup']:
+        try:
+            model_registry.warm_up()
+        except Exception as e:
+            print(f"[{worker_id}] NLP warm-up failed: {str(e)}")
+
+    run_worker(
+        worker_id=worker_id,
+        stop_event=stop_event,
+        max_jobs=options['max_jobs'],
+        once=options['once'],
+        poll_interval=options['poll_interval'],
+    )
+
+    for name, metrics in model_registry.stats().items():
+        print(f"[{worker_id}] {name}: {metrics['loads']} load(s), "
+              f"{metrics['cold_hits']} cold / {metrics['warm_hits']} warm hit(s)")
+
+    for name, cache in (('LLM', get_llm_cache()), ('OCR', get_ocr_cache())):
+        if cache is not None:
+            metrics = cache.stats()
+            print(f"[{worker_id}] {name} cache: {metrics['hits']} hit(s), {metrics['misses']} miss(es)")
+
+
+class Command(BaseCommand):
+    help = 'Run background workers that process queued documents'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of worker processes to run')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once the queue is empty')
+        parser.add_argument('--max-jobs', type=int, default=None,
+                            help='Exit after each worker has run this many jobs')
+        parser.add_argument('--poll-interval', type=float, default=None,
+                            help='Seconds to wait between polls of an empty queue')
+        parser.add_argument('--no-warmup', action='store_true',
+                            help='Do not preload NLP models when a worker starts')
+
+    def handle(self, *args, **options):
+        if options['poll_interval'] is None:
+            options['poll_interval'] = get_queue_settings()['POLL_INTERVAL']
+
+        workers = max(options['workers'], 1)
+        self.stdout.write(f'Starting {workers} worker(s)...')
+
+        if workers == 1:
+            _worker_main(options)
+            self.stdout.write(self.style.SUCCESS('Worker stopped'))
+            return
+
+        # Forked children must not share the parent's database connections
+        connections.close_all()
+
+        processes = []
+        for _ in range(workers):
+            process = multiprocessing.Process(target=_worker_main, args=(options,))
+            process.start()
+            processes.append(process)
+
+        def _stop_children(signum, frame):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        signal.signal(signal.SIGTERM, _stop_children)
+        signal.signal(signal.SIGINT, _stop_children)
+
+        for process in processes:
+            process.join()
+
+        self.stdout.write(self.style.SUCCESS('All workers stopped'))
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 20:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document_processor', '0007_document_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_number', models.PositiveIntegerField()),
+                ('text', models.TextField(blank=True)),
+                ('char_start', models.IntegerField(default=0)),
+                ('char_end', models.IntegerField(default=0)),
+                ('method', models.CharField(choices=[('text_layer', 'Text layer'), ('ocr', 'OCR'), ('failed', 'Failed')], default='text_layer', max_length=20)),
+                ('extraction_time', models.FloatField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='document_processor.document')),
+            ],
+            options={
+                'ordering': ['page_number'],
+                'unique_together': {('document', 'page_number')},
+            },
+        ),
+    ]
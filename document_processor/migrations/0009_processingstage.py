@@ -0,0 +1,36 @@
+# Generated by Django 5.0 on 2026-10-18 20:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document_processor', '0008_documentpage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='force',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='ProcessingStage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('output', models.JSONField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stages', to='document_processor.document')),
+            ],
+            options={
+                'ordering': ['name'],
+                'unique_together': {('document', 'name')},
+            },
+        ),
+    ]
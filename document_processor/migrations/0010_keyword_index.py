@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-18 20:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document_processor', '0009_processingstage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KeywordCorpus',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=10, unique=True)),
+                ('document_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='KeywordTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(max_length=10)),
+                ('term', models.CharField(max_length=100)),
+                ('document_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('language', 'term')},
+            },
+        ),
+    ]
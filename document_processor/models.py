@@ -1,5 +1,6 @@
 import os
 import uuid
+import hashlib
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
@@ -52,6 +53,7 @@ class Document(models.Model):
     description = models.TextField(blank=True, null=True)
     file = models.FileField(upload_to=document_upload_path)
     file_type = models.CharField(max_length=100, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)  # SHA-256 of the file
     language = models.CharField(max_length=10, choices=LANGUAGE_CHOICES, default='en')
     uploaded_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -80,6 +82,17 @@ class Document(models.Model):
         
         super().save(*args, **kwargs)
     
+    def compute_content_hash(self):
+        """Compute the SHA-256 of the stored file"""
+        hasher = hashlib.sha256()
+        self.file.open('rb')
+        try:
+            for chunk in self.file.chunks():
+                hasher.update(chunk)
+        finally:
+            self.file.close()
+        return hasher.hexdigest()
+    
     def get_file_extension(self):
         """Return the file extension of the uploaded document"""
         name, extension = os.path.splitext(self.file.name)
@@ -142,3 +155,144 @@ class NamedEntity(models.Model):
     
     def __str__(self):
         return f"{self.entity_type}: {self.text}"
+
+class DocumentPage(models.Model):
+    """
+    Text of a single page of a document
+    """
+    METHOD_CHOICES = (
+        ('text_layer', 'Text layer'),
+        ('ocr', 'OCR'),
+        ('failed', 'Failed'),
+    )
+    
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='pages')
+    page_number = models.PositiveIntegerField()
+    text = models.TextField(blank=True)
+    
+    # Position of the page within Document.extracted_text
+    char_start = models.IntegerField(default=0)
+    char_end = models.IntegerField(default=0)
+    
+    method = models.CharField(max_length=20, choices=METHOD_CHOICES, default='text_layer')
+    extraction_time = models.FloatField(null=True, blank=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['page_number']
+        unique_together = ('document', 'page_number')
+    
+    def __str__(self):
+        return f"Page {self.page_number} of {self.document.title}"
+
+class ProcessingStage(models.Model):
+    """
+    Output of one processing stage for a document, with a fingerprint of the
+    inputs that produced it
+    """
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='stages')
+    name = models.CharField(max_length=50)
+    fingerprint = models.CharField(max_length=64)  # SHA-256 of text hash, version, model, language and params
+    output = models.JSONField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['name']
+        unique_together = ('document', 'name')
+    
+    def __str__(self):
+        return f"{self.name} stage of {self.document.title}"
+
+class ProcessingJob(models.Model):
+    """
+    Queued background run of process_document for a document
+    """
+    STATUS_CHOICES = (
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    )
+    
+    document = models.ForeignKey(Document, on_delete=models.CASCADE, related_name='jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    use_advanced = models.BooleanField(default=False)
+    force = models.BooleanField(default=False)  # Rerun every stage, even if its inputs are unchanged
+    
+    # Retry bookkeeping
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    last_error = models.TextField(blank=True, null=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    
+    # Lease held by the worker currently running the job
+    worker_id = models.CharField(max_length=100, blank=True, null=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['status', 'lease_expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"Job {self.pk} for {self.document.title} ({self.status})"
+    
+    @property
+    def is_active(self):
+        """Whether the job is still waiting for or holding a worker"""
+        return self.status in ('queued', 'running')
+
+class KeywordCorpus(models.Model):
+    """
+    Number of documents counted in the keyword index of a language
+    """
+    language = models.CharField(max_length=10, unique=True)
+    document_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.language}: {self.document_count} documents"
+
+class KeywordTerm(models.Model):
+    """
+    Number of documents of a language containing a term, for TF-IDF keywords
+    """
+    language = models.CharField(max_length=10)
+    term = models.CharField(max_length=100)
+    document_count = models.IntegerField(default=0)
+    
+    class Meta:
+        unique_together = ('language', 'term')
+    
+    def __str__(self):
+        return f"{self.language}:{self.term} ({self.document_count})"
+
+class CacheEntry(models.Model):
+    """
+    Cached result stored by the database cache backend
+    """
+    namespace = models.CharField(max_length=50)
+    key = models.CharField(max_length=64)
+    value = models.TextField()
+    size = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    accessed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        unique_together = ('namespace', 'key')
+        indexes = [
+            models.Index(fields=['namespace', 'accessed_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.namespace}:{self.key}"
@@ -0,0 +1,130 @@
+import os
+import time
+import tempfile
+from unittest.mock import patch
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from document_processor.models import CacheEntry
+from document_processor.utils.cache import (
+    DiskCacheBackend, DatabaseCacheBackend, ResponseCache, make_cache_key
+)
+
+
+class CacheKeyTest(SimpleTestCase):
+    def test_key_depends_on_every_part(self):
+        key = make_cache_key(model='llama3-8b-8192', prompt_version=1, temperature=0.3, text='Invoice')
+
+        self.assertEqual(key, make_cache_key(text='Invoice', temperature=0.3, prompt_version=1, model='llama3-8b-8192'))
+        self.assertNotEqual(key, make_cache_key(model='llama3-8b-8192', prompt_version=2, temperature=0.3, text='Invoice'))
+
+
+class DiskCacheBackendTest(SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.directory = temp_dir.name
+
+    def test_ttl_expiry(self):
+        backend = DiskCacheBackend(self.directory, ttl=60)
+        backend.set('a' * 64, {'answer': 42})
+        self.assertEqual(backend.get('a' * 64), {'answer': 42})
+
+        # Age the entry past its TTL
+        backend.ttl = -1
+        self.assertIsNone(backend.get('a' * 64))
+
+    def test_lru_eviction(self):
+        backend = DiskCacheBackend(self.directory, max_entries=2)
+        backend.set('a' * 64, 'a')
+        backend.set('b' * 64, 'b')
+
+        # Make 'a' the most recently used entry
+        old = time.time() - 100
+        os.utime(backend._path('b' * 64), (old, old))
+        os.utime(backend._path('a' * 64), (old - 10, old - 10))
+        backend.get('a' * 64)
+
+        backend.set('c' * 64, 'c')
+        self.assertEqual(backend.get('a' * 64), 'a')
+        self.assertIsNone(backend.get('b' * 64))
+        self.assertEqual(backend.get('c' * 64), 'c')
+
+    def test_writes_do_not_rescan(self):
+        backend = DiskCacheBackend(self.directory, max_entries=5, max_bytes=1000)
+        with patch.object(backend, '_entries', wraps=backend._entries) as entries:
+            for i in range(50):
+                backend.set(f'{i:064d}', 'x' * 20)
+                if i == 47:
+                    # Recently used entries survive
+                    backend.get(f'{43:064d}')
+
+        # Only the first write scans the directory
+        self.assertEqual(entries.call_count, 1)
+        remaining = sorted(os.listdir(os.path.join(self.directory, '00')))
+        self.assertEqual(len(remaining), 5)
+        self.assertEqual(remaining, [f'{i:064d}.json' for i in (43, 46, 47, 48, 49)])
+
+        # Overwriting an entry does not count it twice
+        backend.set(f'{49:064d}', 'y' * 20)
+        self.assertEqual(len(backend._index), 5)
+        self.assertEqual(backend._total_bytes, sum(backend._index.values()))
+
+    def test_byte_limit(self):
+        backend = DiskCacheBackend(self.directory, max_bytes=200)
+        for i in range(20):
+            backend.set(f'{i:064d}', 'x' * 40)
+
+        sizes = [entry[1] for entry in backend._entries()]
+        self.assertLessEqual(sum(sizes), 200)
+        self.assertEqual(backend.get(f'{19:064d}'), 'x' * 40)
+        self.assertEqual(backend.evict(), 0)
+
+
+class DatabaseCacheBackendTest(TestCase):
+    def test_namespaces_and_eviction(self):
+        backend = DatabaseCacheBackend(namespace='llm', max_entries=2)
+        other = DatabaseCacheBackend(namespace='ocr')
+
+        backend.set('a' * 64, ['a'])
+        backend.set('b' * 64, ['b'])
+        backend.set('c' * 64, ['c'])
+
+        self.assertIsNone(other.get('c' * 64))
+        self.assertEqual(backend.get('c' * 64), ['c'])
+        self.assertIsNone(backend.get('a' * 64))
+
+    def test_writes_under_the_limits_skip_eviction(self):
+        backend = DatabaseCacheBackend(namespace='llm', max_entries=10, max_bytes=10000)
+        unlimited = DatabaseCacheBackend(namespace='ocr')
+        backend.set('0' * 64, ['x'])
+
+        # Only the first write counts the namespace
+        with CaptureQueriesContext(connection) as limited_queries:
+            backend.set('1' * 64, ['x'])
+        with CaptureQueriesContext(connection) as plain_queries:
+            unlimited.set('1' * 64, ['x'])
+        self.assertEqual(len(limited_queries), len(plain_queries))
+
+        for i in range(2, 11):
+            backend.set(f'{i:064d}', ['x'])
+        # Going over max_entries trims to 90% of it, leaving room for new writes
+        self.assertEqual(CacheEntry.objects.filter(namespace='llm').count(), 9)
+        self.assertEqual(backend.get(f'{10:064d}'), ['x'])
+        self.assertIsNone(backend.get('0' * 64))
+        with patch.object(backend, 'evict') as mock_evict:
+            backend.set('a' * 64, ['x'])
+        mock_evict.assert_not_called()
+
+
+class ResponseCacheTest(SimpleTestCase):
+    def test_hit_miss_counters(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResponseCache(DiskCacheBackend(directory))
+            key = make_cache_key(text='x')
+
+            self.assertIsNone(cache.get(key))
+            cache.set(key, 'value')
+            self.assertEqual(cache.get(key), 'value')
+
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
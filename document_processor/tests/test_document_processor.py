@@ -0,0 +1,352 @@
+import os
+import tempfile
+from io import StringIO
+from collections import Counter
+from unittest.mock import patch, Mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from document_processor.models import (
+    Document, DocumentPage, DocumentType, KeywordCorpus, KeywordTerm, NamedEntity, ProcessingJob,
+    ProcessingResult, ProcessingStage
+)
+from document_processor.utils.document_processor import (
+    build_entities, save_processing_results, process_document, process_documents,
+    find_processed_duplicate, extract_pages, save_document_pages, reextract_failed_pages
+)
+from document_processor.tests.test_nlp import build_processor
+from document_processor.tests.test_pdf_text import make_pdf
+
+
+class SaveProcessingResultsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.doc_type = DocumentType.objects.create(name="Report", description="Report documents")
+        self.document = Document.objects.create(
+            title="Test Report",
+            document_type=self.doc_type,
+            uploaded_by=self.user,
+            file="documents/test.txt"
+        )
+        self.entities = [
+            {'text': 'Acme Corp', 'entity_type': 'organization', 'confidence_score': 1.0,
+             'position_start': 0, 'position_end': 9},
+            {'text': 'Jane Doe', 'entity_type': 'person', 'confidence_score': 1.0,
+             'position_start': 20, 'position_end': 28},
+        ]
+        self.groq_entities = {'entities': [
+            {'text': 'Springfield', 'type': 'Location'},
+            {'text': 'Board review', 'type': 'meeting'},
+            {'type': 'person'},
+        ]}
+
+    def test_build_entities(self):
+        objects = build_entities(self.document, self.entities, self.groq_entities)
+
+        self.assertEqual([e.source for e in objects], ['spacy', 'spacy', 'groq', 'groq'])
+        self.assertEqual(objects[2].entity_type, 'location')
+        self.assertEqual(objects[3].entity_type, 'other')
+
+    def test_results_replace_previous_entities(self):
+        NamedEntity.objects.create(document=self.document, text='Old', entity_type='other')
+
+        saved = save_processing_results(
+            self.document,
+            {'summary': 'Summary', 'keyword_summary': 'acme, contract'},
+            build_entities(self.document, self.entities, self.groq_entities)
+        )
+
+        self.assertEqual(len(saved), 4)
+        self.assertEqual(self.document.entities.count(), 4)
+        self.assertFalse(self.document.entities.filter(text='Old').exists())
+        self.assertEqual(ProcessingResult.objects.get(document=self.document).keyword_summary, 'acme, contract')
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.status, 'completed')
+
+    def test_failed_write_keeps_previous_entities(self):
+        NamedEntity.objects.create(document=self.document, text='Old', entity_type='other')
+
+        with patch.object(NamedEntity.objects, 'bulk_create', side_effect=Exception("disk full")):
+            with self.assertRaises(Exception):
+                save_processing_results(
+                    self.document,
+                    {'summary': 'Summary'},
+                    build_entities(self.document, self.entities)
+                )
+
+        self.assertEqual(list(self.document.entities.values_list('text', flat=True)), ['Old'])
+        self.assertFalse(ProcessingResult.objects.filter(document=self.document).exists())
+
+
+class DuplicateDocumentTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.doc_type = DocumentType.objects.create(name="Invoice", description="Invoices")
+        self.source = Document.objects.create(
+            title="Invoice",
+            document_type=self.doc_type,
+            uploaded_by=self.user,
+            file="documents/invoice.pdf",
+            content_hash="a" * 64,
+            extracted_text="Invoice 42 from Acme Corp",
+            page_count=1,
+            status='completed'
+        )
+        ProcessingResult.objects.create(
+            document=self.source,
+            summary="Invoice from Acme Corp",
+            keyword_summary="invoice, acme",
+            language='en'
+        )
+        NamedEntity.objects.create(document=self.source, text="Acme Corp", entity_type='organization')
+
+    def create_upload(self, content_hash):
+        return Document.objects.create(
+            title="Invoice again",
+            document_type=self.doc_type,
+            uploaded_by=self.user,
+            file="documents/invoice_copy.pdf",
+            content_hash=content_hash
+        )
+
+    @patch('document_processor.utils.document_processor.get_processor')
+    @patch('document_processor.utils.document_processor.extract_text')
+    def test_duplicate_reuses_results(self, mock_extract, mock_nlp):
+        document = self.create_upload("a" * 64)
+
+        result = process_document(document.id)
+
+        mock_extract.assert_not_called()
+        mock_nlp.assert_not_called()
+        self.assertEqual(result['duplicate_of'], self.source.id)
+        self.assertEqual(result['entities_count'], 1)
+
+        document.refresh_from_db()
+        self.assertEqual(document.status, 'completed')
+        self.assertEqual(document.extracted_text, "Invoice 42 from Acme Corp")
+        self.assertEqual(document.analysis_result.summary, "Invoice from Acme Corp")
+        self.assertEqual(document.entities.get().text, "Acme Corp")
+
+    def test_advanced_request_is_not_served_by_basic_result(self):
+        document = self.create_upload("a" * 64)
+
+        self.assertIsNone(find_processed_duplicate(document, use_advanced=True))
+        self.assertEqual(find_processed_duplicate(document), self.source)
+        self.assertIsNone(find_processed_duplicate(self.create_upload("b" * 64)))
+
+
+class DocumentPageTest(TestCase):
+    body = "Quarterly revenue grew by twelve percent compared with the previous year."
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = make_pdf(os.path.join(temp_dir.name, 'report.pdf'), [self.body, None, self.body])
+        media_root = override_settings(MEDIA_ROOT=temp_dir.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.doc_type = DocumentType.objects.create(name="Report", description="Report documents")
+        self.document = Document.objects.create(
+            title="Report",
+            document_type=self.doc_type,
+            uploaded_by=self.user,
+            file='report.pdf'
+        )
+
+    def test_pages_are_stored_with_offsets(self):
+        save_document_pages(self.document, [
+            {'text': 'First page', 'method': 'text_layer'},
+            {'text': 'Scanned page', 'method': 'ocr', 'extraction_time': 1.5},
+        ])
+
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.page_count, 2)
+        second = self.document.pages.get(page_number=2)
+        self.assertEqual(self.document.extracted_text[second.char_start:second.char_end], 'Scanned page')
+        self.assertEqual(second.method, 'ocr')
+
+    @patch('document_processor.utils.ocr.OCRProcessor.process_pdf_pages', side_effect=Exception("no poppler"))
+    def test_failed_pages_are_marked(self, mock_ocr):
+        pages = extract_pages(self.path)
+
+        self.assertEqual([page['method'] for page in pages], ['text_layer', 'failed', 'text_layer'])
+        self.assertEqual(pages[1]['error'], "no poppler")
+
+    def test_only_failed_pages_are_reextracted(self):
+        with patch('document_processor.utils.ocr.OCRProcessor.process_pdf_pages', side_effect=Exception("busy")):
+            save_document_pages(self.document, extract_pages(self.path))
+
+        ocr = Mock(page_timings={2: 0.5}, **{'process_pdf_pages.return_value': {2: "Signed by Jane Doe"}})
+        with patch('document_processor.utils.document_processor.get_ocr_processor', return_value=ocr):
+            self.assertEqual(reextract_failed_pages(self.document), 1)
+
+        ocr.process_pdf_pages.assert_called_once_with(self.path, [2])
+        page = self.document.pages.get(page_number=2)
+        self.assertEqual((page.method, page.text, page.error), ('ocr', "Signed by Jane Doe", None))
+        self.document.refresh_from_db()
+        self.assertEqual(self.document.extracted_text[page.char_start:page.char_end], "Signed by Jane Doe")
+        self.assertEqual(DocumentPage.objects.filter(document=self.document).count(), 3)
+
+
+def fake_submit_all(text, advanced=False, include_insights=False, tasks=None):
+    """Stand in for GroqProcessor.submit_all: one result per requested task"""
+    model = 'large' if advanced else 'small'
+    results = {
+        task: {'analysis': f"{task} by {model}", 'insights': "Insight", 'entities': [], 'model_used': model}
+        for task in tasks
+    }
+    return Mock(**{'result.return_value': dict(results, errors={})})
+
+
+@override_settings(ENABLE_ADVANCED_FEATURES=True, GROQ_API_KEY='test-key')
+class IncrementalProcessingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.doc_type = DocumentType.objects.create(name="Report", description="Report documents")
+        self.document = Document.objects.create(
+            title="Report",
+            document_type=self.doc_type,
+            uploaded_by=self.user,
+            file="documents/report.txt",
+            content_hash="c" * 64,
+            extracted_text="Revenue grew by twelve percent. Costs fell. Margins improved."
+        )
+
+        analysis = Mock(entities=[], sentiment=0.5, keyword_counts=Counter({'revenue': 2, 'costs': 1}), **{
+            'summary.return_value': "Revenue grew.",
+        })
+        nlp_patcher = patch('document_processor.utils.document_processor.get_processor')
+        self.mock_nlp = nlp_patcher.start()
+        self.mock_nlp.return_value.analyze.return_value = analysis
+        self.addCleanup(nlp_patcher.stop)
+
+        self.groq = Mock(**{'get_model.side_effect': lambda advanced: 'large' if advanced else 'small'})
+        self.groq.submit_all.side_effect = fake_submit_all
+        groq_patcher = patch('document_processor.utils.document_processor.get_groq_processor', return_value=self.groq)
+        groq_patcher.start()
+        self.addCleanup(groq_patcher.stop)
+
+    def test_unchanged_stages_are_reused(self):
+        first = process_document(self.document.id)
+        second = process_document(self.document.id)
+
+        self.assertEqual(len(first['stages_run']), 7)
+        self.assertEqual(second['stages_run'], [])
+        self.mock_nlp.assert_called_once()
+        self.groq.submit_all.assert_called_once()
+        self.assertEqual(second['keywords'], first['keywords'])
+        self.assertEqual([keyword for keyword, _ in second['keywords']], ['revenue', 'costs'])
+        self.assertEqual(second['summary'], "Revenue grew.")
+        self.assertEqual(second['groq_model'], 'small')
+
+    def test_model_change_only_reruns_groq_stages(self):
+        process_document(self.document.id)
+        result = process_document(self.document.id, use_advanced=True)
+
+        self.assertEqual(result['stages_run'], ['groq_analysis', 'groq_entities', 'groq_insights'])
+        self.mock_nlp.assert_called_once()
+        self.assertEqual(result['groq_model'], 'large')
+        self.assertEqual(ProcessingStage.objects.filter(document=self.document).count(), 8)
+        self.assertEqual(self.document.analysis_result.groq_insights, "Insight")
+
+    @patch('document_processor.utils.document_processor.extract_pages')
+    def test_force_reruns_every_stage(self, mock_extract):
+        mock_extract.return_value = [{'text': self.document.extracted_text, 'method': 'text_layer'}]
+        process_document(self.document.id)
+
+        result = process_document(self.document.id, force=True)
+
+        mock_extract.assert_called_once()
+        self.assertEqual(len(result['stages_run']), 7)
+        self.assertEqual(self.mock_nlp.call_count, 2)
+        self.assertEqual(ProcessingStage.objects.filter(document=self.document).count(), 7)
+
+    def test_keyword_index_follows_text_changes(self):
+        process_document(self.document.id)
+        process_document(self.document.id)
+        self.assertEqual(KeywordCorpus.objects.get(language='en').document_count, 1)
+
+        self.document.extracted_text = "Revenue fell sharply this year."
+        self.document.save()
+        self.mock_nlp.return_value.analyze.return_value.keyword_counts = Counter({'revenue': 1, 'sharply': 1})
+        process_document(self.document.id)
+
+        terms = dict(KeywordTerm.objects.values_list('term', 'document_count'))
+        self.assertEqual(terms, {'revenue': 1, 'sharply': 1})
+        self.assertEqual(KeywordCorpus.objects.get(language='en').document_count, 1)
+
+
+@override_settings(ENABLE_ADVANCED_FEATURES=False)
+class BatchProcessingTest(TestCase):
+    texts = [
+        "Acme Corp signed the contract. Jane Doe reviewed the contract.",
+        "Jane Doe approved the budget for the new office.",
+        "The contract with Acme Corp was renewed for another year.",
+    ]
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.doc_type = DocumentType.objects.create(name="Contract", description="Contracts")
+        self.documents = [
+            Document.objects.create(
+                title=f"Contract {i}",
+                document_type=self.doc_type,
+                uploaded_by=self.user,
+                file=f"documents/contract_{i}.txt",
+                extracted_text=text
+            )
+            for i, text in enumerate(self.texts + ["Too short"])
+        ]
+        self.processor = build_processor()
+
+    def test_documents_are_processed_in_bulk(self):
+        with patch('document_processor.utils.document_processor.get_processor', return_value=self.processor):
+            outcome = process_documents([document.pk for document in self.documents], batch_size=2)
+
+        self.processor.nlp.pipe.assert_called_once()
+        self.processor.nlp.assert_not_called()
+        self.assertEqual(len(outcome['completed']), 3)
+        self.assertEqual(outcome['failed'], [self.documents[3].pk])
+
+        first = Document.objects.get(pk=self.documents[0].pk)
+        self.assertEqual(first.status, 'completed')
+        self.assertEqual(first.analysis_result.keyword_summary.split(', ')[0], 'contract')
+        self.assertEqual(sorted(first.entities.values_list('text', flat=True)), ['Acme Corp', 'Jane Doe'])
+        self.assertEqual(Document.objects.get(pk=self.documents[3].pk).status, 'failed')
+
+        # The batch is counted in the keyword index
+        self.assertEqual(KeywordCorpus.objects.get(language='en').document_count, 3)
+        self.assertEqual(KeywordTerm.objects.get(term='contract').document_count, 2)
+        self.assertEqual(KeywordTerm.objects.get(term='budget').document_count, 1)
+
+        # A later run of the regular pipeline reuses the stored stages
+        with patch('document_processor.utils.document_processor.get_processor') as mock_nlp:
+            result = process_document(first.pk)
+        mock_nlp.assert_not_called()
+        self.assertEqual(result['stages_run'], [])
+
+    def test_process_pending_command(self):
+        # Documents already queued for a worker are left to it
+        queued = self.documents[2]
+        ProcessingJob.objects.create(document=queued)
+        out = StringIO()
+
+        with patch('document_processor.utils.document_processor.get_processor', return_value=self.processor):
+            call_command('process_pending', '--batch-size', '2', '--skip-groq', stdout=out)
+
+        self.assertIn('Processing 3 document(s)', out.getvalue())
+        self.assertIn('2 completed, 1 failed', out.getvalue())
+        self.assertEqual(self.processor.nlp.pipe.call_args.kwargs['batch_size'], 2)
+        statuses = dict(Document.objects.values_list('pk', 'status'))
+        self.assertEqual([statuses[document.pk] for document in self.documents],
+                         ['completed', 'completed', 'pending', 'failed'])
+        self.assertFalse(ProcessingJob.objects.exclude(document=queued).exists())
+
+        # Failed documents are only retried with --include-failed
+        call_command('process_pending', stdout=out)
+        self.assertIn('No pending documents', out.getvalue())
+        with patch('document_processor.utils.document_processor.get_processor', return_value=self.processor):
+            call_command('process_pending', '--include-failed', '--skip-groq', stdout=out)
+        self.assertIn('Processing 1 document(s)', out.getvalue())
@@ -0,0 +1,80 @@
+import os
+import tempfile
+from unittest.mock import patch
+import docx
+from django.test import SimpleTestCase
+from document_processor.utils import extractors
+from document_processor.utils.extractors import (
+    find_extractor, get_extractor, register_extractor, sniff_mime_type, supported_extensions
+)
+from document_processor.utils.document_processor import extract_pages, extract_text
+from document_processor.tests.test_pdf_text import make_pdf
+
+
+class ExtractorRegistryTest(SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.dir = temp_dir.name
+
+        registry = patch.dict(extractors._registry, clear=True)
+        registry.start()
+        self.addCleanup(registry.stop)
+
+    def write(self, name, data):
+        path = os.path.join(self.dir, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_extractor_follows_content_not_extension(self):
+        pdf = make_pdf(os.path.join(self.dir, 'scan.txt'), ["Invoice total"])
+        notes = self.write('notes.pdf', b"Meeting notes from Monday")
+
+        self.assertEqual(get_extractor(pdf).name, 'pdf')
+        self.assertEqual(extract_text(notes), "Meeting notes from Monday")
+        self.assertEqual(extract_pages(notes)[0]['method'], 'text_layer')
+
+    def test_docx_in_generic_zip_container(self):
+        path = os.path.join(self.dir, 'letter.docx')
+        document = docx.Document()
+        document.add_paragraph("Dear Jane")
+        document.save(path)
+
+        self.assertEqual(get_extractor(path).name, 'docx')
+        self.assertEqual(find_extractor('application/zip', 'letter.docx').name, 'docx')
+        self.assertIsNone(find_extractor('application/zip', 'archive.zip'))
+
+    def test_text_files_of_any_text_type(self):
+        files = {
+            'table.txt': b"name,amount\nAcme,12\nGlobex,30\n",
+            'data.txt': b'{"invoice": 12, "paid": true}',
+            'snippet.txt': b"#include <stdio.h>\nint main(void) { return 0; }\n",
+            'script.txt': b"#!/usr/bin/env python3\nprint('hello')\n",
+            'empty.txt': b"",
+        }
+        for name, data in files.items():
+            with self.subTest(name=name):
+                path = self.write(name, data)
+                self.assertEqual(get_extractor(path).name, 'text')
+                self.assertEqual(extract_text(path), data.decode())
+
+        for mime_type in ('text/csv', 'application/json', 'text/x-c', 'text/x-script.python', 'application/x-empty'):
+            self.assertEqual(find_extractor(mime_type, 'notes.txt').name, 'text')
+        # Only together with the .txt extension
+        self.assertIsNone(find_extractor('application/json', 'data.json'))
+
+    def test_unsupported_content_is_rejected(self):
+        legacy = self.write('report.doc', b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 600)
+
+        with self.assertRaises(ValueError):
+            extract_text(legacy)
+        self.assertNotIn('doc', supported_extensions())
+
+    def test_registered_extractor(self):
+        page = self.write('page.html', b"<html><body><p>Hello</p></body></html>")
+        register_extractor('html', lambda path: "Hello", mime_types=['text/html'], extensions=['html'])
+
+        self.assertEqual(sniff_mime_type(page), 'text/html')
+        self.assertEqual(extract_text(page), "Hello")
+        self.assertIn('html', supported_extensions())
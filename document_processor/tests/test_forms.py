@@ -1,3 +1,4 @@
+import hashlib
 from django.test import TestCase
 from django.core.files.uploadedfile import SimpleUploadedFile
 from document_processor.forms import DocumentUploadForm
@@ -70,4 +71,30 @@ class DocumentUploadFormTest(TestCase):
         
         form = DocumentUploadForm(data=form_data, files=form_files)
         self.assertFalse(form.is_valid())
-        self.assertIn('file', form.errors) 
\ No newline at end of file
+        self.assertIn('file', form.errors) 
+
+    def test_form_rejects_mislabelled_file(self):
+        program = SimpleUploadedFile("invoice.pdf", b"MZ\x90\x00\x03" + b"\x00" * 100)
+        form_data = {
+            'title': 'Test Document',
+            'document_type': self.doc_type.id,
+            'language': 'en'
+        }
+
+        form = DocumentUploadForm(data=form_data, files={'file': program})
+        self.assertFalse(form.is_valid())
+        self.assertIn("does not match a supported format", form.errors['file'][0])
+
+    def test_form_fingerprints_file(self):
+        form_data = {
+            'title': 'Test Document',
+            'document_type': self.doc_type.id,
+            'language': 'en'
+        }
+
+        form = DocumentUploadForm(data=form_data, files={'file': self.test_file})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(
+            form.cleaned_data['file'].content_hash,
+            hashlib.sha256(b"file_content").hexdigest()
+        )
@@ -0,0 +1,314 @@
+import json
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, Mock
+import requests
+from django.test import SimpleTestCase
+from document_processor.utils.cache import DiskCacheBackend, ResponseCache
+from document_processor.utils.groq_processor import (
+    DEFAULT_GROQ_SETTINGS, GroqProcessor, GroqTaskGroup, split_into_chunks, merge_entities,
+    parse_combined_response
+)
+
+
+def fake_response(status_code, payload=None, headers=None):
+    return Mock(status_code=status_code, headers=headers or {}, text=str(payload),
+                **{'json.return_value': payload})
+
+
+class GroqFanOutTest(SimpleTestCase):
+    def setUp(self):
+        self.groq = GroqProcessor(api_key="test-key")
+
+    def test_calls_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fake_call(name):
+            def call(text, advanced=False):
+                barrier.wait()  # Only passes once all three calls are in flight
+                return {name: text}
+            return call
+
+        with patch.object(self.groq, 'analyze_document', fake_call('analysis')), \
+                patch.object(self.groq, 'extract_advanced_entities', fake_call('entities')), \
+                patch.object(self.groq, 'generate_insights', fake_call('insights')):
+            results = self.groq.analyze_all("text", include_insights=True)
+
+        self.assertEqual(results['analysis'], {'analysis': 'text'})
+        self.assertEqual(results['entities'], {'entities': 'text'})
+        self.assertEqual(results['insights'], {'insights': 'text'})
+        self.assertEqual(results['errors'], {})
+
+    def test_partial_results(self):
+        def slow(text, advanced=False):
+            time.sleep(0.5)
+            return {'entities': []}
+
+        with patch.object(self.groq, 'analyze_document', return_value={'analysis': 'ok'}), \
+                patch.object(self.groq, 'extract_advanced_entities', slow), \
+                patch.object(self.groq, 'generate_insights', side_effect=Exception("Error 429")):
+            results = self.groq.analyze_all("text", include_insights=True, timeout=0.1)
+
+        self.assertEqual(results['analysis'], {'analysis': 'ok'})
+        self.assertIsNone(results['entities'])
+        self.assertIsNone(results['insights'])
+        self.assertIn('Timed out', results['errors']['entities'])
+        self.assertEqual(results['errors']['insights'], "Error 429")
+
+    def test_only_requested_tasks_run(self):
+        with patch.object(self.groq, 'analyze_document') as mock_analysis, \
+                patch.object(self.groq, 'extract_advanced_entities') as mock_entities, \
+                patch.object(self.groq, 'generate_insights', return_value={'insights': 'new'}):
+            results = self.groq.submit_all("text", include_insights=True, tasks=['insights']).result()
+
+        mock_analysis.assert_not_called()
+        mock_entities.assert_not_called()
+        self.assertEqual(results['insights'], {'insights': 'new'})
+        self.assertIsNone(results['analysis'])
+
+
+@patch('document_processor.utils.groq_processor.time.sleep')
+class GroqRequestRetryTest(SimpleTestCase):
+    def setUp(self):
+        self.groq = GroqProcessor(api_key="test-key", base_url="http://localhost:8080/v1/")
+        self.session = Mock()
+        patcher = patch('document_processor.utils.groq_processor.get_session', return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_honour_retry_after(self, mock_sleep):
+        self.session.post.side_effect = [
+            fake_response(429, headers={'Retry-After': '2'}),
+            requests.ConnectionError("reset"),
+            fake_response(200, {'ok': True}),
+        ]
+
+        self.assertEqual(self.groq._make_request("chat/completions", {}), {'ok': True})
+        self.assertEqual(self.session.post.call_count, 3)
+        self.assertEqual(mock_sleep.call_args_list[0].args, (2.0,))
+        self.assertEqual(self.session.post.call_args.args[0], "http://localhost:8080/v1/chat/completions")
+        self.assertIsInstance(self.session.post.call_args.kwargs['timeout'], tuple)
+
+    def test_gives_up_after_max_retries(self, mock_sleep):
+        self.session.post.return_value = fake_response(503, {'error': 'unavailable'})
+
+        with self.assertRaisesMessage(Exception, "Error 503"):
+            self.groq._make_request("chat/completions", {})
+        self.assertEqual(self.session.post.call_count, 4)
+
+    def test_client_errors_are_not_retried(self, mock_sleep):
+        self.session.post.return_value = fake_response(401, {'error': 'invalid key'})
+
+        with self.assertRaisesMessage(Exception, "Error 401"):
+            self.groq._make_request("chat/completions", {})
+        self.session.post.assert_called_once()
+
+
+class GroqResponseCacheTest(SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache = ResponseCache(DiskCacheBackend(temp_dir.name))
+        self.groq = GroqProcessor(api_key="test-key", cache=self.cache)
+
+    def test_repeated_prompt_is_served_from_cache(self):
+        response = {'choices': [{'message': {'content': 'Summary'}}], 'usage': {'total_tokens': 10}}
+
+        with patch.object(self.groq, '_make_request', return_value=response) as mock_request:
+            first = self.groq.analyze_document("Invoice 42")
+            second = self.groq.analyze_document("Invoice 42")
+            self.groq.analyze_document("Invoice 42", advanced=True)
+
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertFalse(first['cached'])
+        self.assertTrue(second['cached'])
+        self.assertEqual(second['analysis'], 'Summary')
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+
+class GroqChunkingTest(SimpleTestCase):
+    def setUp(self):
+        self.groq = GroqProcessor(api_key="test-key")
+        self.pages = [f"--- Page {i} ---\n" + ("word " * 150).strip() for i in range(1, 5)]
+        self.text = "\n\n".join(self.pages)
+
+    def test_split_on_page_boundaries(self):
+        chunks = split_into_chunks(self.text, max_chars=800)
+
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(all(chunk.startswith("--- Page") for chunk in chunks))
+        self.assertEqual(len(split_into_chunks(self.text, max_chars=800, max_chunks=2)), 2)
+
+    def test_long_paragraph_is_cut_at_whitespace(self):
+        chunks = split_into_chunks("alpha " * 500, max_chars=100)
+
+        self.assertTrue(all(len(chunk) <= 100 for chunk in chunks))
+        self.assertTrue(all(chunk.split() == ["alpha"] * len(chunk.split()) for chunk in chunks))
+
+    def test_merge_entities_drops_duplicates(self):
+        merged = merge_entities([
+            [{'text': 'Acme Corp', 'type': 'organization'}, {'text': 'Jane Doe', 'type': 'person'}],
+            [{'text': 'acme corp', 'type': 'Organization'}, {'text': 'Springfield', 'type': 'location'}],
+        ])
+
+        self.assertEqual([e['text'] for e in merged], ['Acme Corp', 'Jane Doe', 'Springfield'])
+
+    @patch('document_processor.utils.groq_processor.get_groq_settings')
+    def test_long_document_is_mapped_and_reduced(self, mock_settings):
+        mock_settings.return_value = dict(DEFAULT_GROQ_SETTINGS, CHUNKED_MODE=True, CHUNK_CHARS=800)
+        chunk_calls = []
+
+        def analyze_chunk(text, advanced=False):
+            chunk_calls.append(text)
+            return {'analysis': f"part {len(chunk_calls)}", 'usage': {'total_tokens': 10}}
+
+        reduced = {'choices': [{'message': {'content': 'Whole document'}}], 'usage': {'total_tokens': 5}}
+        with patch.object(self.groq, 'analyze_document', side_effect=analyze_chunk), \
+                patch.object(self.groq, 'extract_advanced_entities',
+                             return_value={'entities': [{'text': 'Acme', 'type': 'organization'}],
+                                           'raw_response': '[]', 'usage': {}}), \
+                patch.object(self.groq, '_chat_completion', return_value=(reduced, False)) as mock_reduce:
+            results = self.groq.analyze_all(self.text)
+
+        self.assertEqual(len(chunk_calls), 4)
+        self.assertEqual(mock_reduce.call_args.args[0], 'analysis_reduce')
+        self.assertEqual(results['analysis']['analysis'], 'Whole document')
+        self.assertEqual(results['analysis']['usage'], {'total_tokens': 45})
+        self.assertEqual(results['entities']['entities'], [{'text': 'Acme', 'type': 'organization'}])
+        self.assertEqual(results['entities']['chunks'], 4)
+
+    @patch('document_processor.utils.groq_processor.get_groq_settings')
+    def test_whole_chunk_reaches_the_prompt(self, mock_settings):
+        mock_settings.return_value = dict(DEFAULT_GROQ_SETTINGS, CHUNKED_MODE=True, CHUNK_CHARS=6000)
+        pages = [f"--- Page {i} ---\n" + " ".join(f"w{i}x{n}" for n in range(800)) for i in range(1, 4)]
+        text = "\n\n".join(pages)
+        chunks = split_into_chunks(text, 6000)
+        self.assertTrue(all(len(chunk) > 4000 for chunk in chunks))
+
+        prompts = []
+
+        def complete(task, model, system_prompt, prompt, temperature, text, **kwargs):
+            prompts.append((task, prompt, text))
+            return chat_response(f"{task} output"), False
+
+        with patch.object(self.groq, '_chat_completion', side_effect=complete):
+            results = self.groq.analyze_all(text)
+
+        self.assertEqual(results['errors'], {})
+        chunk_texts = sorted(text for task, _, text in prompts if task in ('analysis', 'entities'))
+        self.assertEqual(chunk_texts, sorted(chunks * 2))
+        for task, prompt, prompt_text in prompts:
+            self.assertIn(prompt_text, prompt)
+
+    @patch('document_processor.utils.groq_processor.get_groq_settings')
+    def test_deadline_scales_with_chunks(self, mock_settings):
+        mock_settings.return_value = dict(DEFAULT_GROQ_SETTINGS, CHUNKED_MODE=True, CHUNK_CHARS=800,
+                                          CHUNK_CONCURRENCY=4, CALL_TIMEOUT=60)
+        with patch.object(self.groq, 'analyze_document_chunked', return_value={'analysis': 'ok'}), \
+                patch.object(self.groq, 'extract_advanced_entities_chunked', return_value={'entities': []}):
+            group = self.groq.submit_all(self.text)
+            group.result()
+
+        # 8 chunk calls on 4 workers take two rounds, then the reduce call
+        self.assertEqual(group.timeout, 180)
+        self.assertEqual(self.groq.submit_all("short", tasks=[]).timeout, 60)
+
+    def test_timed_out_task_stops_its_chunk_calls(self):
+        started = threading.Event()
+        release = threading.Event()
+        chunk_calls = []
+
+        def analyze_chunk(text, advanced=False):
+            chunk_calls.append(text)
+            started.set()
+            release.wait(5)
+            return {'analysis': text, 'usage': {}}
+
+        group = GroqTaskGroup({}, 0.05)
+        with patch.object(self.groq, '_chunks', return_value=['one'] + ['more'] * 20), \
+                patch.object(self.groq, 'analyze_document', side_effect=analyze_chunk), \
+                patch.object(self.groq, '_reduce') as mock_reduce:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                future = executor.submit(self.groq.analyze_document_chunked, self.text,
+                                         cancel_event=group.cancel_event)
+                group.futures['analysis'] = future
+                started.wait(5)
+                results = group.result()
+                release.set()
+                with self.assertRaises(Exception):
+                    future.result(5)
+
+        self.assertIn('Timed out', results['errors']['analysis'])
+        self.assertLess(len(chunk_calls), 21)
+        mock_reduce.assert_not_called()
+
+    @patch('document_processor.utils.groq_processor.get_groq_settings')
+    def test_reduce_prompt_is_capped(self, mock_settings):
+        mock_settings.return_value = dict(DEFAULT_GROQ_SETTINGS, REDUCE_CHARS=400)
+        with patch.object(self.groq, '_chat_completion', return_value=({}, False)) as mock_completion:
+            self.groq._reduce('analysis_reduce', ['w' * 1000, 'x' * 1000, 'y' * 50, 'z' * 1000], 'model')
+
+        combined = mock_completion.call_args.kwargs['text']
+        self.assertEqual([combined.count(letter) for letter in 'wxyz'], [100, 100, 50, 100])
+
+
+def chat_response(content):
+    return {'choices': [{'message': {'content': content}}], 'usage': {'total_tokens': 30}}
+
+
+class GroqCombinedModeTest(SimpleTestCase):
+    payload = {
+        'summary': 'Invoice from Acme Corp',
+        'themes': ['billing'],
+        'sentiment': 'neutral',
+        'facts': ['Total is 42'],
+        'entities': [{'text': 'Acme Corp', 'type': 'organization'}, {'type': 'person'}],
+        'insights': ['Payment is due soon'],
+    }
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache = ResponseCache(DiskCacheBackend(temp_dir.name))
+        self.groq = GroqProcessor(api_key="test-key", cache=self.cache)
+
+    def test_parse_rejects_incomplete_response(self):
+        with self.assertRaises(ValueError):
+            parse_combined_response("Sorry, I cannot help with that.")
+        with self.assertRaises(ValueError):
+            parse_combined_response(json.dumps({'summary': 'x', 'themes': 'billing'}))
+        with self.assertRaises(ValueError):
+            parse_combined_response(json.dumps(dict(self.payload, insights=None)), include_insights=True)
+
+    @patch('document_processor.utils.groq_processor.get_groq_settings')
+    def test_single_call_serves_all_tasks(self, mock_settings):
+        mock_settings.return_value = dict(DEFAULT_GROQ_SETTINGS, COMBINED_MODE=True)
+
+        with patch.object(self.groq, '_make_request',
+                          return_value=chat_response(json.dumps(self.payload))) as mock_request:
+            results = self.groq.analyze_all("Invoice 42 from Acme Corp", include_insights=True)
+
+        mock_request.assert_called_once()
+        self.assertEqual(mock_request.call_args.args[1]['response_format'], {'type': 'json_object'})
+        self.assertIn('Summary: Invoice from Acme Corp', results['analysis']['analysis'])
+        self.assertEqual(results['entities']['entities'], [{'text': 'Acme Corp', 'type': 'organization'}])
+        self.assertEqual(results['insights']['insights'], '- Payment is due soon')
+        self.assertEqual(results['errors'], {})
+
+    def test_invalid_response_falls_back_and_is_not_cached(self):
+        def fake_request(endpoint, data):
+            if 'response_format' in data:
+                return chat_response('{"summary": "truncated')
+            return chat_response('Plain answer')
+
+        with patch.object(self.groq, '_make_request', side_effect=fake_request) as mock_request:
+            results = self.groq.analyze_combined("Invoice 42")
+            self.groq.analyze_combined("Invoice 42")
+
+        # Combined call, then analysis and entities; twice since nothing was cached for the combined call
+        self.assertEqual(mock_request.call_count, 4)
+        self.assertEqual(results['analysis']['analysis'], 'Plain answer')
+        self.assertEqual(results['entities']['entities'], [])
+        self.assertNotIn('insights', results)
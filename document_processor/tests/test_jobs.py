@@ -0,0 +1,85 @@
+from datetime import timedelta
+from unittest.mock import patch
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from document_processor.models import Document, DocumentType, ProcessingJob
+from document_processor.utils.job_queue import (
+    enqueue_job, claim_next_job, run_job, requeue_expired_jobs
+)
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="testuser", password="testpass")
+        self.doc_type = DocumentType.objects.create(name="Report", description="Report documents")
+        self.document = Document.objects.create(
+            title="Test Report",
+            document_type=self.doc_type,
+            uploaded_by=self.user,
+            file="documents/test.txt"
+        )
+
+    def test_enqueue_returns_active_job(self):
+        job = enqueue_job(self.document)
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(enqueue_job(self.document, use_advanced=True).pk, job.pk)
+
+        job.refresh_from_db()
+        self.assertTrue(job.use_advanced)
+
+        # A forced run stays forced when the job is requested again
+        enqueue_job(self.document, use_advanced=True, force=True)
+        enqueue_job(self.document, use_advanced=True)
+        job.refresh_from_db()
+        self.assertTrue(job.force)
+
+    def test_claim_is_exclusive(self):
+        enqueue_job(self.document)
+
+        job = claim_next_job('worker-1')
+        self.assertEqual(job.status, 'running')
+        self.assertEqual(job.worker_id, 'worker-1')
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNone(claim_next_job('worker-2'))
+
+    @patch('document_processor.utils.job_queue.process_document')
+    def test_run_job_completes(self, mock_process):
+        enqueue_job(self.document, use_advanced=True)
+        job = claim_next_job('worker-1')
+
+        self.assertEqual(run_job(job), 'completed')
+        mock_process.assert_called_once_with(self.document.id, use_advanced=True, force=False)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed')
+        self.assertIsNotNone(job.finished_at)
+
+    @patch('document_processor.utils.job_queue.process_document', side_effect=Exception("boom"))
+    def test_failed_job_is_retried_then_failed(self, mock_process):
+        job = enqueue_job(self.document)
+        ProcessingJob.objects.filter(pk=job.pk).update(max_attempts=2)
+
+        self.assertEqual(run_job(claim_next_job('worker-1')), 'queued')
+        job.refresh_from_db()
+        self.assertEqual(job.last_error, "boom")
+        self.assertGreater(job.run_after, timezone.now())
+
+        # Skip the retry backoff
+        ProcessingJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        self.assertEqual(run_job(claim_next_job('worker-1')), 'failed')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+
+    def test_expired_lease_is_requeued(self):
+        enqueue_job(self.document)
+        job = claim_next_job('worker-1')
+        ProcessingJob.objects.filter(pk=job.pk).update(
+            lease_expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(requeue_expired_jobs(), 1)
+        reclaimed = claim_next_job('worker-2')
+        self.assertEqual(reclaimed.pk, job.pk)
+        self.assertEqual(reclaimed.attempts, 2)
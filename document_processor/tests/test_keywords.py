@@ -0,0 +1,75 @@
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from document_processor.models import (
+    Document, DocumentType, KeywordCorpus, KeywordTerm, ProcessingResult, ProcessingStage
+)
+from document_processor.utils.keywords import KeywordIndex, tfidf_scores, top_keywords
+from document_processor.tests.test_nlp import build_processor
+
+
+class KeywordIndexTest(TestCase):
+    def setUp(self):
+        self.index = KeywordIndex('en')
+        # Every invoice mentions "invoice" and "page", none "penalty"
+        for i in range(8):
+            self.index.update_document({'invoice': 3, 'page': 2, f'vendor{i}': 1})
+
+    def test_tfidf_scores(self):
+        scores = tfidf_scores([2, 1, 1], [3, 3, 0], document_count=3)
+
+        self.assertEqual(scores.shape, (3,))
+        self.assertAlmostEqual(scores[0], 0.5)
+        self.assertGreater(scores[2], scores[1])
+
+    def test_rare_terms_outrank_frequent_ones(self):
+        counts = {'invoice': 4, 'page': 3, 'penalty': 2}
+
+        keywords = self.index.top_keywords(counts, 2)
+
+        self.assertEqual([term for term, _ in keywords], ['penalty', 'invoice'])
+        with self.settings(NLP_SETTINGS={'KEYWORD_SCORING': 'frequency'}):
+            self.assertEqual(top_keywords(counts, 'en', 2), [('invoice', 4), ('page', 3)])
+        # Reusing the spaCy parse instead of a second tokenization
+        processor = build_processor()
+        self.assertEqual(processor.extract_keywords("The invoice, the invoice and the penalty.", 1), [('invoice', 2)])
+        self.assertEqual(processor.extract_keywords("The invoice and the penalty.", 1, index=self.index)[0][0], 'penalty')
+
+    def test_documents_are_counted_incrementally(self):
+        index = KeywordIndex('fr')
+        index.update_document({'facture': 3, 'page': 2, 'total': 1})
+        index.update_document({'facture': 4, 'page': 3})
+        index.update_document({'facture': 1, 'avoir': 1}, previous={'facture': 4, 'page': 3})
+
+        self.assertEqual(index.document_count(), 2)
+        terms = dict(KeywordTerm.objects.filter(language='fr').values_list('term', 'document_count'))
+        self.assertEqual(terms, {'facture': 2, 'page': 1, 'total': 1, 'avoir': 1})
+
+        index.update_document(None, previous={'facture': 1, 'avoir': 1})
+        self.assertEqual(index.document_count(), 1)
+        self.assertFalse(KeywordTerm.objects.filter(term='avoir').exists())
+        self.assertEqual(self.index.document_count(), 8)
+
+
+@override_settings(ENABLE_ADVANCED_FEATURES=False)
+class RebuildKeywordIndexTest(TestCase):
+    def test_rebuild_and_rescore(self):
+        user = User.objects.create_user(username="testuser", password="testpass")
+        doc_type = DocumentType.objects.create(name="Invoice", description="Invoices")
+        for i, terms in enumerate([{'invoice': 3, 'penalty': 1}, {'invoice': 2, 'vendor': 1}]):
+            document = Document.objects.create(
+                title=f"Invoice {i}", document_type=doc_type, uploaded_by=user,
+                file=f"documents/invoice_{i}.txt", status='completed'
+            )
+            ProcessingStage.objects.create(document=document, name='terms', fingerprint='f', output=terms)
+            ProcessingStage.objects.create(document=document, name='keywords', fingerprint='f', output=[])
+            ProcessingResult.objects.create(document=document, keyword_summary='')
+        KeywordTerm.objects.create(language='en', term='stale', document_count=9)
+
+        call_command('rebuild_keyword_index', '--rescore', stdout=StringIO())
+
+        self.assertEqual(KeywordCorpus.objects.get(language='en').document_count, 2)
+        self.assertEqual(dict(KeywordTerm.objects.values_list('term', 'document_count')),
+                         {'invoice': 2, 'penalty': 1, 'vendor': 1})
+        self.assertEqual(ProcessingResult.objects.get(document__title="Invoice 0").keyword_summary, 'invoice, penalty')
@@ -0,0 +1,242 @@
+import threading
+import spacy
+from unittest.mock import patch, Mock
+from django.test import SimpleTestCase
+from document_processor.utils.nlp import (
+    DEFAULT_NLP_SETTINGS, ModelRegistry, NLPProcessor, apply_pipeline_profile, iter_text_chunks
+)
+
+
+mock_stopwords = Mock(**{'words.return_value': ['the', 'and']})
+
+
+@patch('document_processor.utils.nlp.SentimentIntensityAnalyzer', object)
+@patch('document_processor.utils.nlp.stopwords', mock_stopwords)
+@patch('document_processor.utils.nlp.spacy.load', side_effect=lambda name: spacy.blank('en'))
+class ModelRegistryTest(SimpleTestCase):
+    def setUp(self):
+        mock_stopwords.reset_mock()
+
+    def test_models_loaded_once(self, mock_load):
+        registry = ModelRegistry()
+
+        first = registry.get_spacy('en')
+        self.assertIs(registry.get_spacy('en'), first)
+        self.assertEqual(registry.get_stopwords('en'), frozenset(['the', 'and']))
+        registry.get_stopwords('en')
+
+        mock_load.assert_called_once_with('en_core_web_sm')
+        mock_stopwords.words.assert_called_once_with('english')
+        self.assertEqual(registry.stats()['spacy:en'], {'loads': 1, 'cold_hits': 1, 'warm_hits': 1})
+
+    def test_concurrent_loads(self, mock_load):
+        registry = ModelRegistry()
+        threads = [threading.Thread(target=registry.get_spacy, args=('en',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_load.assert_called_once_with('en_core_web_sm')
+        self.assertEqual(registry.stats()['spacy:en']['warm_hits'], 7)
+
+    def test_missing_model_falls_back_to_english(self, mock_load):
+        english = object()
+        mock_load.side_effect = lambda name: english if name == 'en_core_web_sm' else (_ for _ in ()).throw(OSError())
+        registry = ModelRegistry()
+
+        self.assertIs(registry.get_spacy('fr'), english)
+        self.assertIs(registry.get_spacy('en'), english)
+
+    def test_warm_up(self, mock_load):
+        registry = ModelRegistry()
+        registry.warm_up(['en'])
+
+        self.assertEqual(registry.stats()['vader']['loads'], 1)
+        # Only the profiles the analysis stages use are loaded
+        self.assertEqual(registry.stats()['spacy:en:ner']['loads'], 1)
+        self.assertEqual(registry.stats()['spacy:en:sentences']['loads'], 1)
+        self.assertNotIn('spacy:en', registry.stats())
+        self.assertEqual(registry.stats()['stopwords:english']['loads'], 1)
+
+
+def build_processor():
+    """Build an NLPProcessor on a blank spaCy pipeline with rule-based entities"""
+    nlp = spacy.blank('en')
+    nlp.add_pipe('sentencizer')
+    ruler = nlp.add_pipe('entity_ruler')
+    ruler.add_patterns([
+        {'label': 'ORG', 'pattern': 'Acme Corp'},
+        {'label': 'PERSON', 'pattern': 'Jane Doe'},
+    ])
+
+    registry = Mock()
+    registry.get_spacy.return_value = Mock(wraps=nlp)
+    registry.get_stopwords.return_value = frozenset(['the', 'and', 'was', 'for'])
+    registry.get_sentiment_analyzer.return_value = Mock(**{'polarity_scores.return_value': {'compound': 0.5}})
+    return NLPProcessor(registry=registry)
+
+
+class DocumentAnalysisTest(SimpleTestCase):
+    text = (
+        "Acme Corp signed the contract. "
+        "Jane Doe reviewed the contract for Acme Corp today. "
+        "The weather was pleasant. "
+        "Payment terms in the contract are final."
+    )
+
+    def test_single_parse_feeds_all_results(self):
+        processor = build_processor()
+        analysis = processor.analyze(self.text)
+
+        entities = analysis.entities
+        keywords = analysis.keywords()
+        summary = analysis.summary(num_sentences=2)
+
+        processor.nlp.assert_called_once_with(self.text)
+        self.assertEqual([e['entity_type'] for e in entities], ['organization', 'person', 'organization'])
+        self.assertEqual(entities[0]['position_start'], 0)
+        self.assertEqual(keywords[0], ('contract', 3))
+        self.assertEqual(len(analysis.sentences), 4)
+        self.assertNotIn('weather', summary)
+        self.assertEqual(analysis.sentiment, 0.5)
+
+    def test_short_text_summary_is_text(self):
+        processor = build_processor()
+        self.assertEqual(processor.summarize("Acme Corp signed."), "Acme Corp signed.")
+
+    def test_analyze_many_parses_in_batches(self):
+        processor = build_processor()
+        texts = [self.text, "Jane Doe approved the budget.", "Nothing to report."]
+
+        analyses = list(processor.analyze_many(iter(texts), batch_size=2, n_process=1))
+
+        processor.nlp.assert_not_called()
+        processor.nlp.pipe.assert_called_once()
+        self.assertEqual([analysis.text for analysis in analyses], texts)
+        self.assertEqual(analyses[0].keywords(), processor.analyze(self.text).keywords())
+        self.assertEqual([e['text'] for e in analyses[1].entities], ['Jane Doe'])
+
+        tagged = list(processor.analyze_many([(self.text, 'first')], as_tuples=True))
+        self.assertEqual(tagged[0][1], 'first')
+
+    def test_analyze_many_in_worker_processes(self):
+        processor = build_processor()
+        texts = [self.text, "Jane Doe approved the budget.", "Nothing to report.", "Acme Corp paid."]
+        contexts = [{'id': i} for i in range(len(texts))]
+
+        tagged = list(processor.analyze_many(zip(texts, contexts), batch_size=1, n_process=2, as_tuples=True))
+
+        self.assertEqual(processor.nlp.pipe.call_args.kwargs['n_process'], 2)
+        # Docs come back from the workers in order, each with its own context
+        self.assertEqual([context for _, context in tagged], contexts)
+        self.assertEqual([analysis.text for analysis, _ in tagged], texts)
+        self.assertEqual([[e['text'] for e in analysis.entities] for analysis, _ in tagged],
+                         [['Acme Corp', 'Jane Doe', 'Acme Corp'], ['Jane Doe'], [], ['Acme Corp']])
+        self.assertEqual(len(tagged[0][0].sentences), 4)
+
+
+def trained_like_pipeline():
+    """Blank pipeline laid out like a trained model, with a disabled senter"""
+    nlp = spacy.blank('en')
+    nlp.add_pipe('attribute_ruler', name='tagger')
+    nlp.add_pipe('entity_ruler', name='ner').add_patterns([{'label': 'ORG', 'pattern': 'Acme Corp'}])
+    nlp.add_pipe('sentencizer', name='senter')
+    nlp.disable_pipe('senter')
+    return nlp
+
+
+@patch('document_processor.utils.nlp.SentimentIntensityAnalyzer', object)
+@patch('document_processor.utils.nlp.stopwords', mock_stopwords)
+@patch('document_processor.utils.nlp.spacy.load', side_effect=lambda name: trained_like_pipeline())
+class PipelineProfileTest(SimpleTestCase):
+    text = "Acme Corp signed the contract. The contract starts today."
+
+    def test_profiles_keep_only_their_components(self, mock_load):
+        registry = ModelRegistry()
+
+        self.assertEqual(registry.get_spacy('en').pipe_names, ['tagger', 'ner'])
+        self.assertEqual(registry.get_spacy('en', 'ner').pipe_names, ['ner'])
+        self.assertEqual(registry.get_spacy('en', 'sentences').pipe_names, ['senter'])
+        self.assertEqual(registry.get_spacy('en', 'ner_sentences').pipe_names, ['ner', 'senter'])
+        self.assertEqual(mock_load.call_count, 4)
+        with self.assertRaises(ValueError):
+            registry.get_spacy('en', 'parser')
+
+        # Models without a trained senter split sentences with the sentencizer
+        nlp = apply_pipeline_profile(spacy.blank('en'), 'sentences')
+        self.assertEqual(nlp.pipe_names, ['sentencizer'])
+
+    def test_stages_parse_with_their_profiles(self, mock_load):
+        registry = ModelRegistry()
+        analysis = NLPProcessor(registry=registry).analyze(self.text)
+
+        self.assertEqual([e['text'] for e in analysis.entities], ['Acme Corp'])
+        self.assertEqual(len(analysis.sentences), 2)
+        self.assertEqual(analysis.keywords(1), [('contract', 2)])
+        self.assertEqual(sorted(registry.stats()), ['spacy:en:ner', 'spacy:en:sentences', 'stopwords:english', 'vader'])
+
+        # One batch parse with both components serves every stage
+        batch, = NLPProcessor(registry=registry).analyze_many([self.text])
+        self.assertEqual(len(batch.sentences), 2)
+        self.assertEqual(len(batch.entities), 1)
+        self.assertEqual(registry.stats()['spacy:en:ner_sentences']['loads'], 1)
+        self.assertEqual(mock_load.call_count, 3)
+
+
+class ChunkedAnalysisTest(SimpleTestCase):
+    paragraph = (
+        "Jane Doe reviewed the contract with Acme Corp. "
+        "The contract renews every year. "
+        "Payment goes to Acme Corp monthly."
+    )
+
+    def chunk_settings(self, **overrides):
+        nlp_settings = dict(DEFAULT_NLP_SETTINGS, CHUNK_CHARS=150, CHUNK_OVERLAP=40)
+        nlp_settings.update(overrides)
+        return patch('document_processor.utils.nlp.get_nlp_settings', return_value=nlp_settings)
+
+    def test_chunks_end_on_boundaries(self):
+        text = "\n\n".join([self.paragraph] * 4)
+        spans = list(iter_text_chunks(text, 150, overlap=40))
+
+        # Chunks tile the text and each one ends at a paragraph break
+        self.assertEqual([start for start, _, _ in spans[1:]], [end for _, end, _ in spans[:-1]])
+        self.assertEqual(spans[-1][1], len(text))
+        for start, end, context_end in spans:
+            self.assertLessEqual(end - start, 150)
+            self.assertLessEqual(context_end - end, 40)
+        self.assertTrue(all(text[start:end].endswith("\n\n") for start, end, _ in spans[:-1]))
+
+        # Without paragraph breaks chunks end after a sentence
+        text = " ".join([self.paragraph] * 3)
+        spans = list(iter_text_chunks(text, 100))
+        self.assertTrue(all(text[end - 2:end] == '. ' for _, end, _ in spans[:-1]))
+
+    def test_long_text_analysis_matches_single_parse(self):
+        text = "\n\n".join([self.paragraph] * 6)
+        whole = build_processor().analyze(text)
+        # Chunk sentences do not carry the paragraph break before them
+        expected = (whole.entities, [sentence.strip() for sentence in whole.sentences], whole.keywords())
+
+        processor = build_processor()
+        processor.nlp._mock_wraps.max_length = 200
+        with self.chunk_settings():
+            analysis = processor.analyze(text)
+            self.assertTrue(analysis.is_chunked)
+            self.assertEqual((analysis.entities, analysis.sentences, analysis.keywords()), expected)
+
+        processor.nlp.assert_not_called()
+        for entity in analysis.entities:
+            self.assertEqual(text[entity['position_start']:entity['position_end']], entity['text'])
+
+    def test_entity_across_chunk_boundary_is_merged(self):
+        # No boundary but the spaces around "Acme Corp", so the first chunk splits it
+        text = "x" * 70 + " Acme Corp " + "y" * 100
+
+        with self.chunk_settings(CHUNK_CHARS=80):
+            entities = build_processor().analyze(text).entities
+            batch, = build_processor().analyze_many([text])
+            self.assertEqual(batch.entities, entities)
+
+        self.assertEqual([(e['text'], e['position_start']) for e in entities], [('Acme Corp', 71)])
@@ -0,0 +1,254 @@
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch, Mock
+from PIL import Image, ImageDraw
+from django.test import SimpleTestCase
+from document_processor.utils.cache import DiskCacheBackend, ResponseCache
+from document_processor.utils.ocr import DEFAULT_OCR_SETTINGS, OCRProcessor, get_ocr_workers
+from document_processor.utils.preprocessing import (
+    binarize, crop_borders, estimate_skew, get_profile, otsu_threshold, preprocess_image
+)
+from document_processor.tests.test_pdf_text import make_pdf
+
+
+def uncached_processor():
+    """OCR processor without preprocessing or result cache"""
+    with patch('document_processor.utils.ocr.get_ocr_cache', return_value=None):
+        return OCRProcessor(preprocessing='none')
+
+
+def fake_convert_from_path(pdf_path, output_folder, first_page, last_page, **kwargs):
+    """Stand in for pdf2image: write one small image per page and return the paths"""
+    paths = []
+    for number in range(first_page, last_page + 1):
+        path = os.path.join(output_folder, f"page-{number:04d}.jpg")
+        Image.new('L', (40, 20), color=number).save(path)
+        paths.append(path)
+    return paths
+
+
+@patch('document_processor.utils.ocr.pdf2image.convert_from_path', side_effect=fake_convert_from_path)
+@patch('document_processor.utils.ocr.get_ocr_settings',
+       return_value=dict(DEFAULT_OCR_SETTINGS, DPI=150, WINDOW_PAGES=3, WORKERS=1, BATCH_PAGES=1))
+class StreamingRasterisationTest(SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = make_pdf(os.path.join(temp_dir.name, 'scan.pdf'), [None] * 7)
+        self.ocr = uncached_processor()
+
+    def test_pages_are_rasterised_in_windows(self, mock_settings, mock_convert):
+        on_disk = []
+
+        def fake_ocr(image, lang, **kwargs):
+            on_disk.append(len(os.listdir(os.path.dirname(image.filename))))
+            return f"text {image.getpixel((0, 0))}"
+
+        with patch('document_processor.utils.ocr.pytesseract.image_to_string', side_effect=fake_ocr):
+            text, _, page_count = self.ocr.process_pdf(self.path)
+
+        windows = [(c.kwargs['first_page'], c.kwargs['last_page']) for c in mock_convert.call_args_list]
+        self.assertEqual(windows, [(1, 3), (4, 6), (7, 7)])
+        self.assertEqual(mock_convert.call_args.kwargs['dpi'], 150)
+        self.assertLessEqual(max(on_disk), 3)
+        self.assertEqual(page_count, 7)
+        self.assertLess(text.index("--- Page 3 ---\ntext 3"), text.index("--- Page 4 ---\ntext 4"))
+
+    def test_selected_pages_only(self, mock_settings, mock_convert):
+        with patch('document_processor.utils.ocr.pytesseract.image_to_string', return_value="scanned"):
+            texts = self.ocr.process_pdf_pages(self.path, [6, 2, 3, 4, 5])
+
+        windows = [(c.kwargs['first_page'], c.kwargs['last_page']) for c in mock_convert.call_args_list]
+        self.assertEqual(windows, [(2, 4), (5, 6)])
+        self.assertEqual(sorted(texts), [2, 3, 4, 5, 6])
+
+
+@patch('document_processor.utils.ocr.pdf2image.convert_from_path', side_effect=fake_convert_from_path)
+class ParallelOCRTest(SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = make_pdf(os.path.join(temp_dir.name, 'scan.pdf'), [None] * 6)
+        self.ocr = uncached_processor()
+
+        executor = ThreadPoolExecutor(max_workers=3)
+        self.addCleanup(executor.shutdown)
+        patcher = patch('document_processor.utils.ocr._get_executor', return_value=executor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('document_processor.utils.ocr.get_ocr_settings',
+           return_value=dict(DEFAULT_OCR_SETTINGS, WINDOW_PAGES=3, WORKERS=3, BATCH_PAGES=1))
+    def test_pages_run_in_parallel_in_order(self, mock_settings, mock_convert):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fake_ocr(image, lang, **kwargs):
+            barrier.wait()  # Only passes once three pages are in flight
+            return f"text {image.getpixel((0, 0))}"
+
+        with patch('document_processor.utils.ocr.pytesseract.image_to_string', side_effect=fake_ocr):
+            text, _, page_count = self.ocr.process_pdf(self.path)
+
+        self.assertEqual(mock_convert.call_count, 2)
+        self.assertEqual(page_count, 6)
+        positions = [text.index(f"--- Page {i} ---\ntext {i}") for i in range(1, 7)]
+        self.assertEqual(positions, sorted(positions))
+        self.assertEqual(sorted(self.ocr.page_timings), [1, 2, 3, 4, 5, 6])
+
+    @patch('document_processor.utils.ocr.get_ocr_settings',
+           return_value=dict(DEFAULT_OCR_SETTINGS, WINDOW_PAGES=2, WORKERS=3, BATCH_PAGES=8))
+    def test_window_limits_rasterised_pages(self, mock_settings, mock_convert):
+        with patch('document_processor.utils.ocr.pytesseract.image_to_string', return_value="text"):
+            _, _, page_count = self.ocr.process_pdf(self.path)
+
+        # WINDOW_PAGES holds even when the workers could take more pages
+        self.assertEqual(page_count, 6)
+        self.assertEqual(mock_convert.call_count, 3)
+        for call in mock_convert.call_args_list:
+            self.assertLessEqual(call.kwargs['last_page'] - call.kwargs['first_page'] + 1, 2)
+
+    @patch('document_processor.utils.ocr.os.cpu_count', return_value=16)
+    def test_pool_size_follows_omp_thread_limit(self, mock_cpu_count, mock_convert):
+        settings = {'DPI': 200, 'WINDOW_PAGES': 4, 'WORKERS': None, 'OMP_THREAD_LIMIT': 1}
+        with patch('document_processor.utils.ocr.get_ocr_settings', return_value=settings):
+            with patch.dict(os.environ, {'OMP_THREAD_LIMIT': '4'}):
+                self.assertEqual(get_ocr_workers(), 4)
+            with patch.dict(os.environ, {}, clear=True):
+                self.assertEqual(get_ocr_workers(), 16)
+
+
+def text_page(size=(600, 400), angle=0):
+    """Draw dark text-like lines on a light page, optionally rotated"""
+    image = Image.new('L', size, color=235)
+    draw = ImageDraw.Draw(image)
+    for top in range(60, size[1] - 60, 40):
+        draw.rectangle((60, top, size[0] - 60, top + 12), fill=20)
+    return image.rotate(angle, fillcolor=235) if angle else image
+
+
+class PreprocessingTest(SimpleTestCase):
+    def test_balanced_profile(self):
+        photo = Image.new('RGB', (6000, 4000), color=(200, 190, 180))
+        photo.info['dpi'] = (600, 600)
+
+        prepared = preprocess_image(photo, 'balanced')
+
+        self.assertEqual(prepared.mode, 'L')
+        self.assertEqual(prepared.size, (3000, 2000))
+        self.assertLessEqual(set(prepared.getdata()), {0, 255})
+
+    def test_binarize_separates_ink_from_paper(self):
+        page = text_page()
+        threshold = otsu_threshold(page)
+
+        self.assertTrue(20 <= threshold < 235)
+        self.assertEqual(set(binarize(page).getdata()), {0, 255})
+
+    def test_deskew(self):
+        self.assertEqual(estimate_skew(text_page(angle=-2), max_angle=4), 2.0)
+        self.assertEqual(estimate_skew(text_page(), max_angle=4), 0.0)
+
+    def test_crop_borders(self):
+        page = Image.new('L', (500, 500), color=0)
+        page.paste(text_page((460, 460)), (20, 20))
+
+        cropped = crop_borders(page, margin=5)
+
+        self.assertEqual(cropped.size, (351, 343))
+        self.assertEqual(get_profile('none'), {})
+        with self.assertRaises(ValueError):
+            get_profile('missing')
+
+
+class OCRCacheTest(SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache = ResponseCache(DiskCacheBackend(os.path.join(temp_dir.name, 'cache')))
+        self.image_path = os.path.join(temp_dir.name, 'terms.png')
+        text_page().save(self.image_path)
+
+    @patch('document_processor.utils.ocr.pytesseract.image_to_string', return_value="Terms and conditions")
+    def test_identical_pages_are_recognised_once(self, mock_ocr):
+        ocr = OCRProcessor(preprocessing='balanced', cache=self.cache)
+
+        self.assertEqual(ocr.process_image(self.image_path)[0], "Terms and conditions")
+        # Same pixels in another format and colour mode normalise to the same page
+        with Image.open(self.image_path) as image:
+            self.assertEqual(ocr.recognize(image.convert('RGB')), "Terms and conditions")
+
+        mock_ocr.assert_called_once()
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    @patch('document_processor.utils.ocr.pytesseract.image_to_string', return_value="text")
+    def test_language_and_config_are_part_of_the_key(self, mock_ocr):
+        OCRProcessor(language='eng', cache=self.cache).process_image(self.image_path)
+        OCRProcessor(language='deu', cache=self.cache).process_image(self.image_path)
+        OCRProcessor(language='eng', config='--psm 6', cache=self.cache).process_image(self.image_path)
+
+        self.assertEqual(mock_ocr.call_count, 3)
+
+
+def fake_tesseract_run(command, capture_output):
+    """Stand in for a batch tesseract run: one form-feed terminated page per listed image"""
+    list_path, output_base = command[1], command[2]
+    with open(list_path, 'r', encoding='utf-8') as f:
+        image_paths = f.read().split()
+    with open(output_base + '.txt', 'w', encoding='utf-8') as f:
+        f.write(''.join(f"text of {os.path.basename(path)}\n\f" for path in image_paths))
+    return Mock(returncode=0, stderr=b'')
+
+
+@patch('document_processor.utils.ocr.tesserocr', None)
+@patch('document_processor.utils.ocr.get_ocr_settings', return_value=dict(DEFAULT_OCR_SETTINGS, BATCH_PAGES=3))
+class BatchOCRTest(SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.paths = []
+        for i in range(5):
+            path = os.path.join(temp_dir.name, f"receipt-{i}.png")
+            Image.new('L', (40, 20), color=i * 40).save(path)
+            self.paths.append(path)
+        self.cache = ResponseCache(DiskCacheBackend(os.path.join(temp_dir.name, 'cache')))
+        self.ocr = OCRProcessor(preprocessing='none', cache=self.cache)
+
+    @patch('document_processor.utils.ocr.subprocess.run', side_effect=fake_tesseract_run)
+    def test_one_process_per_batch(self, mock_run, mock_settings):
+        texts, _ = self.ocr.process_images(self.paths)
+
+        self.assertEqual(mock_run.call_count, 2)
+        self.assertEqual(mock_run.call_args.args[0][3:5], ['-l', 'eng'])
+        self.assertEqual(texts, [f"text of {i:05d}.png\n" for i in (0, 1, 2, 0, 1)])
+
+        # Cached pages are not sent to tesseract again
+        self.ocr.process_images(self.paths)
+        self.assertEqual(mock_run.call_count, 2)
+
+    @patch('document_processor.utils.ocr.pytesseract.image_to_string', return_value="single")
+    @patch('document_processor.utils.ocr.subprocess.run')
+    def test_unsplittable_output_falls_back_to_single_pages(self, mock_run, mock_ocr, mock_settings):
+        def short_output(command, capture_output):
+            with open(command[2] + '.txt', 'w', encoding='utf-8') as f:
+                f.write("only one page")
+            return Mock(returncode=0, stderr=b'')
+        mock_run.side_effect = short_output
+
+        texts = self.ocr.recognize_files(self.paths[:3])
+
+        self.assertEqual(texts, ["single"] * 3)
+        self.assertEqual(mock_ocr.call_count, 3)
+
+    def test_in_process_engine(self, mock_settings):
+        api = Mock(**{'GetUTF8Text.return_value': "engine text"})
+        fake_tesserocr = Mock(**{'PyTessBaseAPI.return_value': api})
+
+        with patch('document_processor.utils.ocr.tesserocr', fake_tesserocr), \
+                patch('document_processor.utils.ocr._tesserocr_local', threading.local()):
+            texts = self.ocr.recognize_files(self.paths[:3])
+
+        fake_tesserocr.PyTessBaseAPI.assert_called_once_with(lang='eng')
+        self.assertEqual(api.SetImage.call_count, 3)
+        self.assertEqual(texts, ["engine text"] * 3)
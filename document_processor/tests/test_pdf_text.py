@@ -0,0 +1,111 @@
+import os
+import tempfile
+from unittest.mock import patch
+from django.test import SimpleTestCase
+from document_processor.utils.pdf_text import (
+    DEFAULT_PDF_SETTINGS, extract_pdf_pages, has_usable_text, text_quality
+)
+from document_processor.utils.document_processor import extract_text_from_pdf
+
+
+def make_pdf(path, page_texts):
+    """Write a minimal PDF with one line of Helvetica text per page (None: no text layer)"""
+    page_count = len(page_texts)
+    font_id = 3 + 2 * page_count
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (3 + 2 * i) for i in range(page_count))
+        + b"] /Count %d >>" % page_count,
+    ]
+    for i, text in enumerate(page_texts):
+        content = b"" if text is None else b"BT /F1 12 Tf 72 720 Td (%s) Tj ET" % text.encode('latin-1')
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (4 + 2 * i, font_id))
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+class PdfTextExtractionTest(SimpleTestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = make_pdf(os.path.join(temp_dir.name, 'report.pdf'),
+                             [f"Page number {i}" for i in range(1, 8)])
+
+    def test_shards_are_joined_in_page_order(self):
+        pages, page_count = extract_pdf_pages(self.path, workers=3, shard_pages=2, timeout=30,
+                                              in_process_pages=0)
+
+        self.assertEqual(page_count, 7)
+        self.assertEqual([page.strip() for page in pages], [f"Page number {i}" for i in range(1, 8)])
+
+    @patch('document_processor.utils.pdf_text._get_pool')
+    def test_small_documents_are_read_in_process(self, mock_pool):
+        pages, page_count = extract_pdf_pages(self.path, workers=3, shard_pages=2, timeout=30,
+                                              in_process_pages=7)
+
+        mock_pool.assert_not_called()
+        self.assertEqual(page_count, 7)
+        self.assertEqual([page.strip() for page in pages], [f"Page number {i}" for i in range(1, 8)])
+
+    def test_page_limit(self):
+        pages, page_count = extract_pdf_pages(self.path, max_pages=3, workers=1, timeout=0)
+
+        self.assertEqual(page_count, 7)
+        self.assertEqual(len(pages), 3)
+
+    @patch('document_processor.utils.document_processor.has_usable_text', return_value=True)
+    @patch('document_processor.utils.pdf_text.get_pdf_settings')
+    def test_extract_text_from_pdf(self, mock_settings, mock_usable):
+        mock_settings.return_value = dict(DEFAULT_PDF_SETTINGS, WORKERS=2, SHARD_PAGES=4)
+
+        text = extract_text_from_pdf(self.path)
+
+        self.assertLess(text.index("Page number 4"), text.index("Page number 5"))
+        self.assertEqual(text.count("Page number"), 7)
+
+
+class HybridPdfExtractionTest(SimpleTestCase):
+    born_digital = "Quarterly revenue grew by twelve percent compared with the previous year."
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.path = make_pdf(os.path.join(temp_dir.name, 'mixed.pdf'),
+                             [self.born_digital, None, self.born_digital])
+
+    def test_text_layer_quality(self):
+        self.assertTrue(has_usable_text(self.born_digital, min_chars=20, min_quality=0.7))
+        self.assertFalse(has_usable_text("Page 1", min_chars=20, min_quality=0.7))
+        self.assertFalse(has_usable_text("(cid:12)(cid:7)(cid:99) " * 10, min_chars=20, min_quality=0.7))
+        self.assertEqual(text_quality(""), 0.0)
+
+    @patch('document_processor.utils.ocr.OCRProcessor.process_pdf_pages')
+    def test_only_pages_without_text_are_ocrd(self, mock_ocr):
+        mock_ocr.return_value = {2: "Scanned signature page"}
+
+        text = extract_text_from_pdf(self.path)
+
+        self.assertEqual(mock_ocr.call_args.args[1], [2])
+        self.assertEqual(text.count(self.born_digital), 2)
+        self.assertIn("Scanned signature page", text)
+
+    @patch('document_processor.utils.ocr.OCRProcessor.process_pdf_pages', side_effect=Exception("no poppler"))
+    def test_ocr_failure_keeps_text_layer(self, mock_ocr):
+        text = extract_text_from_pdf(self.path)
+
+        self.assertEqual(text.count(self.born_digital), 2)
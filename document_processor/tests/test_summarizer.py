@@ -0,0 +1,96 @@
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+import numpy as np
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from document_processor.utils.nlp import DEFAULT_NLP_SETTINGS
+from document_processor.utils.summarizer import (
+    SentenceTermMatrix, rank_sentences, select_sentences, textrank_scores
+)
+from document_processor.tests.test_nlp import build_processor
+
+
+class SentenceTermMatrixTest(SimpleTestCase):
+    sentence_terms = [['contract', 'signed', 'contract'], [], ['payment', 'contract']]
+
+    def test_products_match_dense_matrix(self):
+        matrix = SentenceTermMatrix(self.sentence_terms)
+        dense = np.zeros(matrix.shape)
+        dense[matrix.rows, matrix.columns] = matrix.values
+
+        self.assertEqual(matrix.shape, (3, 3))
+        self.assertEqual(dense[0, matrix.vocabulary['contract']], 2)
+        vector = np.array([1.0, 2.0, 3.0])
+        np.testing.assert_allclose(matrix.dot(vector), dense @ vector)
+        np.testing.assert_allclose(matrix.tdot(vector), dense.T @ vector)
+        self.assertEqual(matrix.term_columns(['payment', 'missing']), [matrix.vocabulary['payment']])
+
+    def test_textrank_favours_central_sentences(self):
+        sentence_terms = [
+            ['contract', 'payment', 'vendor'],
+            ['contract', 'payment'],
+            ['contract', 'vendor'],
+            ['weather', 'pleasant'],
+        ]
+
+        scores = textrank_scores(SentenceTermMatrix(sentence_terms))
+
+        self.assertAlmostEqual(scores.sum(), 1.0)
+        self.assertEqual(int(np.argmax(scores)), 0)
+        self.assertEqual(int(np.argmin(scores)), 3)
+        self.assertEqual(select_sentences(scores, 2), [0, 1])
+
+
+class SummaryMethodTest(SimpleTestCase):
+    text = (
+        "Acme Corp signed the contract. "
+        "Jane Doe reviewed the contract for Acme Corp today. "
+        "The weather was pleasant. "
+        "Payment terms in the contract are final. "
+        "Contractors were not involved."
+    )
+
+    def test_methods_pick_the_same_sentences_without_substring_matches(self):
+        analysis = build_processor().analyze(self.text)
+        keywords = [kw[0] for kw in analysis.keywords(20)]
+
+        original = rank_sentences(analysis.sentences, analysis.sentence_terms, keywords, 'keywords')
+        matrix = rank_sentences(analysis.sentences, analysis.sentence_terms, keywords, 'matrix')
+
+        # "Contractors" only matches "contract" as a substring
+        self.assertEqual(original[4] - matrix[4], 1)
+        np.testing.assert_array_equal(original[:4], matrix[:4])
+        self.assertEqual(analysis.summary(2, method='matrix'), analysis.summary(2, method='keywords'))
+        self.assertNotIn('weather', analysis.summary(2, method='textrank'))
+        with self.assertRaises(ValueError):
+            analysis.summary(2, method='lsa')
+
+    def test_method_from_settings(self):
+        processor = build_processor()
+        with patch('document_processor.utils.nlp.get_nlp_settings',
+                   return_value=dict(DEFAULT_NLP_SETTINGS, SUMMARIZER='textrank')), \
+                patch('document_processor.utils.nlp.summarize', return_value="summary") as mock_summarize:
+            self.assertEqual(processor.summarize(self.text, 2), "summary")
+
+        self.assertEqual(mock_summarize.call_args.args[3:], (2, 'textrank'))
+
+    def test_benchmark(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        with open(os.path.join(temp_dir.name, 'contract.txt'), 'w', encoding='utf-8') as f:
+            f.write(self.text)
+        with open(os.path.join(temp_dir.name, 'contract.summary.txt'), 'w', encoding='utf-8') as f:
+            f.write("Acme Corp signed the contract. Payment terms in the contract are final.")
+
+        out = StringIO()
+        with patch('document_processor.management.commands.benchmark_summarizer.get_processor',
+                   return_value=build_processor()):
+            call_command('benchmark_summarizer', temp_dir.name, '--sentences', '2', '--repeat', '1', stdout=out)
+
+        rows = {line.split()[0]: line.split() for line in out.getvalue().splitlines()[2:5]}
+        self.assertEqual(sorted(rows), ['keywords', 'matrix', 'textrank'])
+        # Same sentences as the original method, and a ROUGE-1 score from the reference
+        self.assertEqual(rows['matrix'][-1], '100.0%')
+        self.assertNotEqual(rows['matrix'][3], 'n/a')
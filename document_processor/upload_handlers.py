@@ -0,0 +1,53 @@
+"""
+Upload handlers that fingerprint and identify files while they stream in
+"""
+import hashlib
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from .utils.extractors import SNIFF_BYTES, sniff_mime_type
+
+class ContentHashMixin:
+    """
+    Compute the SHA-256 of an upload chunk by chunk as it is received and set
+    it as `content_hash` on the resulting uploaded file
+    """
+    
+    def new_file(self, *args, **kwargs):
+        self.hasher = hashlib.sha256()
+        return super().new_file(*args, **kwargs)
+    
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+    
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        if uploaded_file is not None:
+            uploaded_file.content_hash = self.hasher.hexdigest()
+        return uploaded_file
+
+class ContentSniffMixin:
+    """
+    Keep the first bytes of an upload and set the MIME type sniffed from them
+    as `mime_type` on the resulting uploaded file
+    """
+    
+    def new_file(self, *args, **kwargs):
+        self.head = b''
+        return super().new_file(*args, **kwargs)
+    
+    def receive_data_chunk(self, raw_data, start):
+        if len(self.head) < SNIFF_BYTES:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+        return super().receive_data_chunk(raw_data, start)
+    
+    def file_complete(self, file_size):
+        uploaded_file = super().file_complete(file_size)
+        if uploaded_file is not None:
+            uploaded_file.mime_type = sniff_mime_type(self.head, self.file_name)
+        return uploaded_file
+
+class HashingMemoryFileUploadHandler(ContentSniffMixin, ContentHashMixin, MemoryFileUploadHandler):
+    """Keep small uploads in memory, hashing and identifying them as they arrive"""
+
+class HashingTemporaryFileUploadHandler(ContentSniffMixin, ContentHashMixin, TemporaryFileUploadHandler):
+    """Stream large uploads to a temporary file, hashing and identifying them as they arrive"""
@@ -18,4 +18,5 @@ urlpatterns = [
     
     # API endpoints
     path('api/documents/<uuid:pk>/process/', views.document_process_api, name='document_process_api'),
+    path('api/jobs/<int:pk>/', views.job_status_api, name='job_status_api'),
 ] 
\ No newline at end of file
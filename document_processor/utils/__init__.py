@@ -1,5 +1,5 @@
 """
 Document processor utilities package
 """
-from .nlp import get_processor
+from .nlp import get_processor, model_registry
 from .groq_processor import get_groq_processor 
\ No newline at end of file
@@ -0,0 +1,499 @@
+"""
+Content-addressed result caches with pluggable storage backends
+"""
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from document_processor.models import CacheEntry
+
+# Writes between full rescans of a disk cache, which pick up entries written
+# or removed by other processes sharing the directory
+DISK_RESCAN_WRITES = 1000
+
+# Writes between recounts of a database cache namespace, which pick up
+# entries written or removed by other processes
+DATABASE_RECOUNT_WRITES = 1000
+
+# A database cache over its limits is trimmed to this share of them, so a
+# full cache is not trimmed again on every write
+DATABASE_EVICT_TO = 0.9
+
+def make_cache_key(**parts):
+    """
+    Build a cache key from the parts that determine a result
+
+    Args:
+        **parts: JSON-serialisable values, e.g. model, prompt version and text
+
+    Returns:
+        str: SHA-256 hex digest of the parts
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class CacheBackend:
+    """
+    Base class for cache storage backends
+
+    Values are JSON-serialisable. Entries older than ttl seconds are treated as
+    missing, and the least recently used entries are evicted once the backend
+    holds more than max_entries entries or max_bytes bytes.
+    """
+
+    def __init__(self, ttl=None, max_entries=None, max_bytes=None):
+        """
+        Initialize backend
+
+        Args:
+            ttl (int, optional): Entry lifetime in seconds (None: never expires)
+            max_entries (int, optional): Maximum number of entries kept
+            max_bytes (int, optional): Maximum total size of entries kept
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    @property
+    def _limited(self):
+        return self.max_entries is not None or self.max_bytes is not None
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        raise NotImplementedError
+
+    def set(self, key, value):
+        """Store value under key"""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove key from the cache"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove every entry"""
+        raise NotImplementedError
+
+class DiskCacheBackend(CacheBackend):
+    """
+    Cache backend storing one JSON file per entry on local disk
+
+    File modification times record last access, which drives LRU eviction.
+    Entry sizes and use order are tracked in memory once the directory has
+    been scanned, so a write only removes the oldest entries instead of
+    scanning the directory again.
+    """
+
+    def __init__(self, directory, **kwargs):
+        """
+        Initialize backend
+
+        Args:
+            directory (str): Cache directory, created on first write
+            **kwargs: ttl, max_entries and max_bytes (see CacheBackend)
+        """
+        super().__init__(**kwargs)
+        self.directory = str(directory)
+        self._lock = threading.Lock()
+        # path -> size, least recently used first; None until scanned
+        self._index = None
+        self._total_bytes = 0
+        self._writes = 0
+
+    def _path(self, key):
+        # Shard by key prefix to keep directories small
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self.ttl is not None and entry['created_at'] + self.ttl < time.time():
+            self.delete(key)
+            return None
+
+        # Mark as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            if self._index is not None and path in self._index:
+                self._index.move_to_end(path)
+
+        return entry['value']
+
+    def set(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Write to a temp file first so readers never see a partial entry
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'created_at': time.time(), 'value': value}, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        if not self._limited:
+            return
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self._writes += 1
+            if self._index is None or self._writes >= DISK_RESCAN_WRITES:
+                self._scan()
+            else:
+                self._forget(path)
+                self._index[path] = size
+                self._total_bytes += size
+            self._trim()
+
+    def delete(self, key):
+        path = self._path(key)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        with self._lock:
+            self._forget(path)
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._index = None
+
+    def _entries(self):
+        """List (path, size, last_used) for every entry"""
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith('.json'):
+                    stat = entry.stat()
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _scan(self):
+        """Rebuild the in-memory index from the directory; call with the lock held"""
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        self._index = OrderedDict((path, size) for path, size, _ in entries)
+        self._total_bytes = sum(self._index.values())
+        self._writes = 0
+
+    def _forget(self, path):
+        """Drop an entry from the in-memory index; call with the lock held"""
+        if self._index is not None and path in self._index:
+            self._total_bytes -= self._index.pop(path)
+
+    def _trim(self):
+        """
+        Remove least recently used indexed entries until the size limits are
+        met; call with the lock held
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = 0
+        while self._index:
+            over_entries = self.max_entries is not None and len(self._index) > self.max_entries
+            over_bytes = self.max_bytes is not None and self._total_bytes > self.max_bytes
+            if not (over_entries or over_bytes):
+                break
+            path, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                os.remove(path)
+            except OSError:
+                # Already removed, e.g. by another process
+                continue
+            removed += 1
+        return removed
+
+    def evict(self):
+        """
+        Rescan the directory and remove least recently used entries until the
+        size limits are met
+
+        Returns:
+            int: Number of entries removed
+        """
+        if not self._limited:
+            return 0
+
+        with self._lock:
+            self._scan()
+            return self._trim()
+
+class DatabaseCacheBackend(CacheBackend):
+    """
+    Cache backend storing entries in the CacheEntry table, shared by every
+    process using the same database
+
+    The size of the namespace is estimated from this process's writes and
+    recounted every DATABASE_RECOUNT_WRITES writes; the eviction queries only
+    run once the estimate is over a limit.
+    """
+
+    def __init__(self, namespace='default', **kwargs):
+        """
+        Initialize backend
+
+        Args:
+            namespace (str): Separates caches sharing the table
+            **kwargs: ttl, max_entries and max_bytes (see CacheBackend)
+        """
+        super().__init__(**kwargs)
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        # Estimated entries and bytes in the namespace; None until counted
+        self._entry_count = None
+        self._total_bytes = 0
+        self._writes = 0
+
+    def _entries(self):
+        return CacheEntry.objects.filter(namespace=self.namespace)
+
+    def get(self, key):
+        entry = self._entries().filter(key=key).first()
+        if entry is None:
+            return None
+
+        now = timezone.now()
+        if self.ttl is not None and entry.created_at + timedelta(seconds=self.ttl) < now:
+            entry.delete()
+            return None
+
+        self._entries().filter(pk=entry.pk).update(accessed_at=now)
+        return json.loads(entry.value)
+
+    def set(self, key, value):
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode('utf-8'))
+        now = timezone.now()
+
+        _, created = CacheEntry.objects.update_or_create(
+            namespace=self.namespace,
+            key=key,
+            defaults={
+                'value': payload,
+                'size': size,
+                'created_at': now,
+                'accessed_at': now,
+            }
+        )
+
+        if not self._limited:
+            return
+
+        with self._lock:
+            self._writes += 1
+            if self._entry_count is None or self._writes >= DATABASE_RECOUNT_WRITES:
+                self._count()
+            else:
+                # A replaced entry's old size is not known, so bytes are overestimated
+                self._entry_count += created
+                self._total_bytes += size
+            over_limits = self._over_limits(self._entry_count, self._total_bytes)
+
+        if over_limits:
+            self.evict()
+
+    def delete(self, key):
+        self._entries().filter(key=key).delete()
+
+    def clear(self):
+        self._entries().delete()
+
+    def _count(self):
+        """Count the entries and bytes in the namespace; call with the lock held"""
+        totals = self._entries().aggregate(entries=Count('pk'), total=Sum('size'))
+        self._entry_count = totals['entries']
+        self._total_bytes = totals['total'] or 0
+        self._writes = 0
+
+    def _over_limits(self, entry_count, total_bytes):
+        return ((self.max_entries is not None and entry_count > self.max_entries)
+                or (self.max_bytes is not None and total_bytes > self.max_bytes))
+
+    def evict(self):
+        """
+        Remove least recently used entries once a size limit is exceeded,
+        down to DATABASE_EVICT_TO of the limits
+
+        Returns:
+            int: Number of entries removed
+        """
+        if not self._limited:
+            return 0
+
+        with self._lock:
+            self._count()
+            entry_count, total_bytes = self._entry_count, self._total_bytes
+        if not self._over_limits(entry_count, total_bytes):
+            return 0
+
+        removed = 0
+
+        if self.max_entries is not None and entry_count > self.max_entries:
+            keep = int(self.max_entries * DATABASE_EVICT_TO)
+            stale = list(self._entries().order_by('-accessed_at').values_list('pk', flat=True)[keep:])
+            if stale:
+                removed += self._entries().filter(pk__in=stale).delete()[0]
+            total_bytes = self._entries().aggregate(total=Sum('size'))['total'] or 0
+
+        if self.max_bytes is not None and total_bytes > self.max_bytes:
+            target_bytes = self.max_bytes * DATABASE_EVICT_TO
+            stale = []
+            for pk, size in self._entries().order_by('accessed_at').values_list('pk', 'size').iterator():
+                if total_bytes <= target_bytes:
+                    break
+                stale.append(pk)
+                total_bytes -= size
+            removed += self._entries().filter(pk__in=stale).delete()[0]
+
+        with self._lock:
+            self._count()
+        return removed
+
+class ResponseCache:
+    """
+    Cache front end that counts hits and misses
+    """
+
+    def __init__(self, backend):
+        """
+        Initialize cache
+
+        Args:
+            backend (CacheBackend): Storage backend
+        """
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a cached value, counting the lookup as a hit or miss
+
+        Args:
+            key (str): Cache key from make_cache_key
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"Cache read error: {str(e)}")
+            value = None
+
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """
+        Store a value; storage errors are logged and never raised
+
+        Args:
+            key (str): Cache key from make_cache_key
+            value: JSON-serialisable value
+        """
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            print(f"Cache write error: {str(e)}")
+
+    def stats(self):
+        """
+        Get hit/miss counters
+
+        Returns:
+            dict: hits, misses and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+def build_cache(config, namespace):
+    """
+    Build a cache from a settings dictionary
+
+    BACKEND is 'disk', 'db', 'none', or the dotted path of a CacheBackend
+    subclass accepting ttl, max_entries and max_bytes.
+
+    Args:
+        config (dict): BACKEND, DIR, TTL, MAX_ENTRIES and MAX_BYTES
+        namespace (str): Name of the cache, used for the directory or table namespace
+
+    Returns:
+        ResponseCache: Configured cache, or None if caching is disabled
+    """
+    backend_name = config.get('BACKEND')
+    if not backend_name or backend_name == 'none':
+        return None
+
+    limits = {
+        'ttl': config.get('TTL'),
+        'max_entries': config.get('MAX_ENTRIES'),
+        'max_bytes': config.get('MAX_BYTES'),
+    }
+
+    if backend_name == 'disk':
+        backend = DiskCacheBackend(config.get('DIR') or os.path.join(settings.BASE_DIR, 'cache', namespace), **limits)
+    elif backend_name == 'db':
+        backend = DatabaseCacheBackend(namespace=namespace, **limits)
+    else:
+        backend = import_string(backend_name)(**limits)
+
+    return ResponseCache(backend)
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(name, config):
+    """
+    Get the process-wide cache with the given name, building it on first use
+
+    Args:
+        name (str): Cache name, e.g. 'llm'
+        config (dict): Settings used to build the cache
+
+    Returns:
+        ResponseCache: Shared cache, or None if caching is disabled
+    """
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = build_cache(config, name)
+        return _caches[name]
@@ -1,30 +1,73 @@
 """
 Utilities for document processing and text extraction
 """
-import os
-import PyPDF2
 import docx
 import time
 import traceback
+from collections import Counter, defaultdict
 from django.conf import settings
-from document_processor.models import Document, ProcessingResult, NamedEntity
-from .ocr import extract_text_from_image
-from .nlp import get_processor
-from .groq_processor import get_groq_processor
+from django.db import transaction
+from django.utils import timezone
+from document_processor.models import Document, DocumentPage, ProcessingResult, NamedEntity, ProcessingStage
+from .ocr import get_processor as get_ocr_processor
+from .extractors import get_extractor
+from .pdf_text import extract_pdf_pages, get_pdf_settings, has_usable_text
+from .nlp import get_nlp_settings, get_processor, model_registry
+from .groq_processor import PROMPT_VERSIONS, get_groq_processor, get_groq_settings
+from .stages import StageStore, hash_text, stage_fingerprint
+from .keywords import get_keyword_index, top_keywords
 
-def process_document(document_id, use_advanced=False):
+# Rows per INSERT statement when saving entities
+ENTITY_BATCH_SIZE = 500
+
+# Separator between pages in Document.extracted_text
+PAGE_SEPARATOR = "\n\n"
+
+# Local NLP stages and their parameters
+NLP_STAGES = ('entities', 'terms', 'keywords', 'sentiment', 'summary')
+KEYWORD_COUNT = 10
+SUMMARY_SENTENCES = 3
+
+# Stage storing the result of each GROQ task
+GROQ_STAGES = {
+    'analysis': 'groq_analysis',
+    'entities': 'groq_entities',
+    'insights': 'groq_insights',
+}
+
+# GROQ settings that change what the GROQ stages return
+GROQ_STAGE_SETTINGS = ('CHUNKED_MODE', 'CHUNK_CHARS', 'MAX_CHUNKS', 'COMBINED_MODE')
+
+# ProcessingResult fields copied when reusing a duplicate's results
+CLONED_RESULT_FIELDS = (
+    'summary',
+    'sentiment_score',
+    'keyword_summary',
+    'language',
+    'groq_analysis',
+    'groq_insights',
+    'model_used',
+    'is_advanced',
+)
+
+def process_document(document_id, use_advanced=False, force=False):
     """
     Process document and extract information
     
+    Each stage's output is stored with a fingerprint of its inputs, and only
+    stages whose fingerprint changed since the last run are executed again.
+    
     Args:
         document_id (int): Document ID
         use_advanced (bool): Whether to use advanced GROQ processing
+        force (bool): Re-extract the text and rerun every stage
         
     Returns:
         dict: Processing results
     """
     start_time = time.time()
     document = None
+    groq_tasks = None
     
     try:
         # Get document from database
@@ -34,10 +77,25 @@ def process_document(document_id, use_advanced=False):
         document.status = 'processing'
         document.save()
         
-        # Extract text from document if not already done
-        if not document.extracted_text:
-            document.extracted_text = extract_text(document.file.path)
-            document.save()
+        # Fingerprint documents uploaded before upload hashing existed
+        if not document.content_hash and document.file:
+            try:
+                document.content_hash = document.compute_content_hash()
+                document.save(update_fields=['content_hash'])
+            except OSError as e:
+                print(f"Could not hash document file: {str(e)}")
+        
+        # Reuse the results of an identical file that was already processed
+        duplicate = None if force else find_processed_duplicate(document, use_advanced)
+        if duplicate:
+            return clone_processing_results(document, duplicate, start_time)
+        
+        # Extract text page by page if not already done, otherwise retry
+        # only the pages that failed last time
+        if force or not document.extracted_text:
+            save_document_pages(document, extract_pages(document.file.path))
+        else:
+            reextract_failed_pages(document)
         
         # Get text for processing
         text = document.extracted_text
@@ -48,104 +106,107 @@ def process_document(document_id, use_advanced=False):
         # Get document language or use default
         language = getattr(document, 'language', 'en')
         
-        # Use NLP to process text
-        nlp = get_processor(language=language)
-        
-        # Extract entities
-        entities = nlp.extract_entities(text)
-        
-        # Extract keywords
-        keywords = nlp.extract_keywords(text)
-        
-        # Analyze sentiment
-        sentiment_score = nlp.analyze_sentiment(text)
-        
-        # Generate summary
-        summary = nlp.summarize(text)
-        
-        # Advanced processing with GROQ if enabled
-        groq_analysis = None
-        groq_entities = None
-        groq_insights = None
+        # Fingerprint the inputs of every stage; stored outputs whose
+        # fingerprint still matches are reused instead of recomputed
+        text_hash = hash_text(text)
+        stages = StageStore(document, force=force)
+        fingerprints = nlp_stage_fingerprints(text_hash, language)
         
+        # Start advanced processing with GROQ first so the requests run
+        # alongside the local NLP stage
+        groq_stages = {}
         if settings.ENABLE_ADVANCED_FEATURES:
             try:
                 # Get GROQ processor
                 groq = get_groq_processor(api_key=settings.GROQ_API_KEY)
                 
-                # Perform analysis with free model (or advanced if requested)
-                groq_analysis = groq.analyze_document(text, advanced=use_advanced)
-                
-                # Extract entities with GROQ
-                groq_entities = groq.extract_advanced_entities(text, advanced=use_advanced)
-                
-                # Generate insights with GROQ
-                if use_advanced:
-                    groq_insights = groq.generate_insights(text, advanced=True)
+                # Analysis and entities with free model (or advanced if requested),
+                # insights only for advanced processing
+                groq_stages = {task: name for task, name in GROQ_STAGES.items() if task != 'insights' or use_advanced}
+                fingerprints.update(groq_stage_fingerprints(
+                    text_hash, language, groq.get_model(use_advanced), groq_stages.values()
+                ))
+                stale_tasks = [
+                    task for task, name in groq_stages.items()
+                    if not stages.is_current(name, fingerprints[name])
+                ]
+                if stale_tasks:
+                    groq_tasks = groq.submit_all(
+                        text, advanced=use_advanced, include_insights=use_advanced, tasks=stale_tasks
+                    )
             except Exception as e:
                 # Log error but continue with basic processing
                 print(f"GROQ processing error: {str(e)}")
         
+        # Use NLP to process text; the analysis parses the text once and
+        # shares that parse across every result below, and is only made if
+        # one of the local stages has to run
+        analysis = None
+        if not all(stages.is_current(name, fingerprints[name]) for name in NLP_STAGES):
+            nlp = get_processor(language=language)
+            analysis = nlp.analyze(text)
+        
+        # Extract entities
+        entities = stages.run('entities', fingerprints['entities'], lambda: analysis.entities)
+        
+        # Count terms for the keyword index, then weight them against the corpus
+        terms = stages.run('terms', fingerprints['terms'], lambda: dict(analysis.keyword_counts))
+        keywords = [
+            tuple(kw) for kw in
+            stages.run('keywords', fingerprints['keywords'], lambda: top_keywords(
+                terms, language, KEYWORD_COUNT, stages.saved_outputs.get('terms')
+            ))
+        ]
+        
+        # Analyze sentiment
+        sentiment_score = stages.run('sentiment', fingerprints['sentiment'], lambda: analysis.sentiment)
+        
+        # Generate summary
+        summary = stages.run('summary', fingerprints['summary'], lambda: analysis.summary(SUMMARY_SENTENCES))
+        
+        # Collect GROQ results; a failed call only drops its own result and
+        # leaves its stage to be retried on the next run
+        if groq_tasks:
+            groq_results = groq_tasks.result()
+            
+            for task, name in groq_stages.items():
+                if groq_results.get(task) is not None:
+                    stages.put(name, fingerprints[name], groq_results[task])
+            
+            for task, error in groq_results['errors'].items():
+                print(f"GROQ {task} error: {error}")
+        
+        groq_analysis = stages.get('groq_analysis', fingerprints.get('groq_analysis'))
+        groq_entities = stages.get('groq_entities', fingerprints.get('groq_entities'))
+        groq_insights = stages.get('groq_insights', fingerprints.get('groq_insights'))
+        
         # Get document language or use default
         document_language = getattr(document, 'language', 'en')
         
-        # Save processing results
-        result, created = ProcessingResult.objects.update_or_create(
-            document=document,
-            defaults={
+        # Build entity rows from standard NLP and GROQ entities
+        entity_objects = build_entities(document, entities, groq_entities)
+        
+        # Calculate processing time
+        processing_time = time.time() - start_time
+        document.processing_time = processing_time
+        
+        # Save processing results, entities and status in one transaction
+        saved_entities = save_processing_results(
+            document,
+            {
                 'summary': summary,
                 'sentiment_score': sentiment_score,
-                'keywords': ', '.join([kw[0] for kw in keywords]),
+                'keyword_summary': ', '.join([kw[0] for kw in keywords]),
                 'language': document_language,
                 'groq_analysis': groq_analysis['analysis'] if groq_analysis else None,
                 'groq_insights': groq_insights['insights'] if groq_insights else None,
                 'model_used': groq_analysis['model_used'] if groq_analysis else None,
                 'is_advanced': use_advanced,
-            }
+            },
+            entity_objects,
+            stages
         )
         
-        # Save entities
-        document.entities.all().delete()  # Remove existing entities
-        
-        # Save standard NLP entities
-        for entity in entities:
-            NamedEntity.objects.create(
-                document=document,
-                text=entity['text'],
-                entity_type=entity['entity_type'],
-                confidence_score=entity['confidence_score'],
-                position_start=entity['position_start'],
-                position_end=entity['position_end'],
-                source='spacy'
-            )
-        
-        # Save GROQ entities if available
-        if groq_entities and groq_entities.get('entities'):
-            for entity in groq_entities['entities']:
-                # Extract fields from GROQ entity format
-                entity_text = entity.get('text', '')
-                entity_type = entity.get('type', 'other').lower()
-                
-                # Skip if missing essential information
-                if not entity_text:
-                    continue
-                
-                NamedEntity.objects.create(
-                    document=document,
-                    text=entity_text,
-                    entity_type=entity_type,
-                    confidence_score=1.0,  # GROQ doesn't provide confidence scores
-                    source='groq'
-                )
-        
-        # Calculate processing time
-        processing_time = time.time() - start_time
-        document.processing_time = processing_time
-        
-        # Update document status
-        document.status = 'completed'
-        document.save()
-        
         # Return processing results
         return {
             'document_id': document.id,
@@ -153,10 +214,11 @@ def process_document(document_id, use_advanced=False):
             'summary': summary,
             'sentiment_score': sentiment_score,
             'keywords': keywords,
-            'entities_count': document.entities.count(),
+            'entities_count': len(saved_entities),
             'advanced_processing': use_advanced,
             'groq_model': groq_analysis['model_used'] if groq_analysis else None,
-            'processing_time': processing_time
+            'processing_time': processing_time,
+            'stages_run': stages.stages_run
         }
     
     except Exception as e:
@@ -166,81 +228,633 @@ def process_document(document_id, use_advanced=False):
         print(f"Processing error: {error_message}")
         print(f"Stack trace: {stack_trace}")
         
-        try:
-            if document:
-                # Get document language or use default
-                document_language = getattr(document, 'language', 'en')
-                
-                # Create or update processing result with error information
-                ProcessingResult.objects.update_or_create(
-                    document=document,
-                    defaults={
-                        'summary': f"Processing failed: {error_message}",
-                        'sentiment_score': 0.0,
-                        'keywords': 'error, failed, processing',
-                        'language': document_language,
-                    }
-                )
-                
-                # Update document status
-                document.status = 'failed'
-                document.save()
-        except Exception as inner_e:
-            print(f"Error updating document status: {str(inner_e)}")
+        # Don't start GROQ calls whose results will be thrown away
+        if groq_tasks:
+            groq_tasks.cancel()
+        
+        if document:
+            save_processing_failure(document, error_message)
         
         # Re-raise exception with detailed message
         raise Exception(f"Error processing document: {error_message}")
 
+def save_processing_failure(document, error_message):
+    """
+    Record a failed run on the document's processing result and status
+    
+    Args:
+        document (Document): Document that failed
+        error_message (str): Error to show in place of the summary
+    """
+    try:
+        # Get document language or use default
+        document_language = getattr(document, 'language', 'en')
+        
+        # Create or update processing result with error information
+        ProcessingResult.objects.update_or_create(
+            document=document,
+            defaults={
+                'summary': f"Processing failed: {error_message}",
+                'sentiment_score': 0.0,
+                'keyword_summary': 'error, failed, processing',
+                'language': document_language,
+            }
+        )
+        
+        # Update document status
+        document.status = 'failed'
+        document.save()
+    except Exception as inner_e:
+        print(f"Error updating document status: {str(inner_e)}")
+
+def process_documents(document_ids, batch_size=None, n_process=None):
+    """
+    Extract text and run the local NLP stages for many documents at once
+    
+    Documents are streamed, one language at a time, through spaCy's nlp.pipe,
+    and their results, entities, stage outputs and statuses are written in
+    bulk, one transaction per batch. GROQ stages are left to process_document,
+    which reuses the stage outputs stored here.
+    
+    Args:
+        document_ids (list): IDs of the documents to process
+        batch_size (int, optional): Documents per nlp.pipe batch and per write (default: settings)
+        n_process (int, optional): spaCy parsing processes (default: settings)
+        
+    Returns:
+        dict: IDs of the 'completed' and 'failed' documents
+    """
+    batch_size = batch_size or get_nlp_settings()['BATCH_SIZE']
+    outcome = {'completed': [], 'failed': []}
+    
+    # Group by language, since each language has its own pipeline
+    ids_by_language = {}
+    for chunk in _chunks(list(document_ids), batch_size):
+        for pk, language in Document.objects.filter(pk__in=chunk).values_list('pk', 'language'):
+            ids_by_language.setdefault(language or 'en', []).append(pk)
+    
+    for language, ids in ids_by_language.items():
+        nlp = get_processor(language=language)
+        analyses = nlp.analyze_many(
+            _iter_document_texts(ids, batch_size, outcome['failed']),
+            batch_size=batch_size,
+            n_process=n_process,
+            as_tuples=True
+        )
+        
+        results = []
+        for analysis, (document, start_time) in analyses:
+            results.append(build_batch_result(document, analysis, start_time))
+            if len(results) >= batch_size:
+                outcome['completed'].extend(save_batch_results(results))
+                results = []
+        if results:
+            outcome['completed'].extend(save_batch_results(results))
+    
+    return outcome
+
+def _chunks(items, size):
+    """Split a list into lists of at most size items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _iter_document_texts(document_ids, chunk_size, failed):
+    """
+    Yield (text, (document, start time)) for documents, loading them a chunk
+    at a time and extracting text where it is missing
+    
+    Documents whose text cannot be extracted are marked failed, added to
+    failed and skipped.
+    """
+    for chunk in _chunks(document_ids, chunk_size):
+        Document.objects.filter(pk__in=chunk).update(status='processing')
+        
+        for document in Document.objects.filter(pk__in=chunk):
+            start_time = time.time()
+            try:
+                if not document.extracted_text:
+                    save_document_pages(document, extract_pages(document.file.path))
+                
+                text = document.extracted_text
+                if not text or len(text.strip()) < 10:
+                    raise ValueError("Insufficient text extracted from document. Please check the file format.")
+            except Exception as e:
+                print(f"Processing error for document {document.pk}: {str(e)}")
+                save_processing_failure(document, str(e))
+                failed.append(document.pk)
+                continue
+            
+            yield text, (document, start_time)
+
+def build_batch_result(document, analysis, start_time):
+    """
+    Build the unsaved rows for a document analyzed in a batch
+    
+    Args:
+        document (Document): Document
+        analysis (DocumentAnalysis): Analysis of the document text
+        start_time (float): When the document was picked up
+        
+    Returns:
+        dict: Document with its ProcessingResult, NamedEntity and ProcessingStage rows and term counts
+    """
+    terms = dict(analysis.keyword_counts)
+    outputs = {
+        'entities': analysis.entities,
+        'terms': terms,
+        'keywords': top_keywords(terms, document.language, KEYWORD_COUNT),
+        'sentiment': analysis.sentiment,
+        'summary': analysis.summary(SUMMARY_SENTENCES),
+    }
+    fingerprints = nlp_stage_fingerprints(hash_text(analysis.text), document.language)
+    document.processing_time = time.time() - start_time
+    
+    return {
+        'document': document,
+        'result': ProcessingResult(
+            document=document,
+            summary=outputs['summary'],
+            sentiment_score=outputs['sentiment'],
+            keyword_summary=', '.join([kw[0] for kw in outputs['keywords']]),
+            language=document.language,
+            is_advanced=False
+        ),
+        'entities': build_entities(document, outputs['entities']),
+        'terms': terms,
+        'stages': [
+            ProcessingStage(document=document, name=name, fingerprint=fingerprints[name], output=outputs[name])
+            for name in NLP_STAGES
+        ],
+    }
+
+def save_batch_results(results):
+    """
+    Write the results of a batch of documents in one transaction
+    
+    Args:
+        results (list): Dicts from build_batch_result
+        
+    Returns:
+        list: IDs of the documents saved
+    """
+    documents = [result['document'] for result in results]
+    now = timezone.now()
+    
+    with transaction.atomic():
+        ProcessingResult.objects.filter(document__in=documents).delete()
+        ProcessingResult.objects.bulk_create([result['result'] for result in results])
+        
+        NamedEntity.objects.filter(document__in=documents).delete()
+        NamedEntity.objects.bulk_create(
+            [entity for result in results for entity in result['entities']],
+            batch_size=ENTITY_BATCH_SIZE
+        )
+        
+        # Reads the term counts about to be replaced
+        update_keyword_index(results)
+        ProcessingStage.objects.filter(document__in=documents, name__in=NLP_STAGES).delete()
+        ProcessingStage.objects.bulk_create([stage for result in results for stage in result['stages']])
+        
+        for document in documents:
+            document.status = 'completed'
+            document.updated_at = now
+        Document.objects.bulk_update(documents, ['status', 'processing_time', 'updated_at'])
+    
+    return [document.pk for document in documents]
+
+def update_keyword_index(results):
+    """
+    Count the terms of a batch of documents in the keyword index
+    
+    Terms counted for the documents before are taken out, and the changes are
+    applied per language in one pass.
+    
+    Args:
+        results (list): Dicts from build_batch_result
+    """
+    previous = dict(ProcessingStage.objects.filter(
+        document__in=[result['document'] for result in results], name='terms'
+    ).values_list('document_id', 'output'))
+    
+    term_changes = defaultdict(Counter)
+    document_changes = Counter()
+    for result in results:
+        language = result['document'].language
+        terms = result['terms']
+        old_terms = previous.get(result['document'].pk) or {}
+        
+        term_changes[language].update({term: 1 for term in terms if term not in old_terms})
+        term_changes[language].update({term: -1 for term in old_terms if term not in terms})
+        document_changes[language] += bool(terms) - bool(old_terms)
+    
+    for language, changes in term_changes.items():
+        get_keyword_index(language).add(changes, document_changes[language])
+
+def nlp_stage_fingerprints(text_hash, language):
+    """
+    Fingerprint the inputs of the local NLP stages
+    
+    Args:
+        text_hash (str): Hash of the document text
+        language (str): Document language
+        
+    Returns:
+        dict: Fingerprint per stage name
+    """
+    spacy_model = model_registry.model_name(language)
+    nlp_settings = get_nlp_settings()
+    # Sentence boundaries and entities depend on the pipeline components run
+    profiles = nlp_settings['STAGE_PROFILES']
+    return {
+        'entities': stage_fingerprint('entities', text_hash, spacy_model, language,
+                                      {'profile': profiles.get('entities')}),
+        'terms': stage_fingerprint('terms', text_hash, spacy_model, language, {'profile': profiles.get('keywords')}),
+        'keywords': stage_fingerprint('keywords', text_hash, spacy_model, language, {
+            'num_keywords': KEYWORD_COUNT, 'scoring': nlp_settings['KEYWORD_SCORING']
+        }),
+        'sentiment': stage_fingerprint('sentiment', text_hash, 'vader', language),
+        'summary': stage_fingerprint('summary', text_hash, spacy_model, language, {
+            'num_sentences': SUMMARY_SENTENCES,
+            'profile': profiles.get('sentences'),
+            'method': nlp_settings['SUMMARIZER'],
+        }),
+    }
+
+def groq_stage_fingerprints(text_hash, language, model, names):
+    """
+    Fingerprint the inputs of GROQ stages
+    
+    Args:
+        text_hash (str): Hash of the document text
+        language (str): Document language
+        model (str): GROQ model the requests use
+        names (iterable): Stage names to fingerprint
+        
+    Returns:
+        dict: Fingerprint per stage name
+    """
+    groq_settings = get_groq_settings()
+    params = {key: groq_settings[key] for key in GROQ_STAGE_SETTINGS}
+    params['prompt_versions'] = PROMPT_VERSIONS
+    return {name: stage_fingerprint(name, text_hash, model, language, params) for name in names}
+
+def build_entities(document, entities, groq_entities=None):
+    """
+    Build unsaved NamedEntity rows for a document
+    
+    Args:
+        document (Document): Document the entities belong to
+        entities (list): Entity dictionaries from the NLP processor
+        groq_entities (dict, optional): GROQ entity extraction result
+        
+    Returns:
+        list: Unsaved NamedEntity instances
+    """
+    text_length = NamedEntity._meta.get_field('text').max_length
+    entity_types = {choice for choice, _ in NamedEntity.ENTITY_TYPES}
+    
+    # Standard NLP entities
+    entity_objects = [
+        NamedEntity(
+            document=document,
+            text=entity['text'][:text_length],
+            entity_type=entity['entity_type'],
+            confidence_score=entity['confidence_score'],
+            position_start=entity['position_start'],
+            position_end=entity['position_end'],
+            source='spacy'
+        )
+        for entity in entities
+    ]
+    
+    # GROQ entities if available
+    if groq_entities and groq_entities.get('entities'):
+        for entity in groq_entities['entities']:
+            # Extract fields from GROQ entity format
+            entity_text = entity.get('text', '')
+            entity_type = str(entity.get('type', 'other')).lower()
+            
+            # Skip if missing essential information
+            if not entity_text:
+                continue
+            
+            # One bad row would fail the whole bulk insert, so keep types to known choices
+            if entity_type not in entity_types:
+                entity_type = 'other'
+            
+            entity_objects.append(NamedEntity(
+                document=document,
+                text=str(entity_text)[:text_length],
+                entity_type=entity_type,
+                confidence_score=1.0,  # GROQ doesn't provide confidence scores
+                source='groq'
+            ))
+    
+    return entity_objects
+
+def save_processing_results(document, result_fields, entity_objects, stages=None):
+    """
+    Atomically replace a document's processing result and entities
+    
+    The result row, the entity rows (bulk inserted), the stage outputs and the
+    document status are written in one transaction, so a failed run never
+    leaves a document with part of its entities replaced.
+    
+    Args:
+        document (Document): Processed document
+        result_fields (dict): ProcessingResult field values
+        entity_objects (list): Unsaved NamedEntity instances
+        stages (StageStore, optional): Stage outputs to save with the results
+        
+    Returns:
+        list: Saved NamedEntity instances
+    """
+    with transaction.atomic():
+        ProcessingResult.objects.update_or_create(
+            document=document,
+            defaults=result_fields
+        )
+        
+        # Replace existing entities
+        document.entities.all().delete()
+        saved_entities = NamedEntity.objects.bulk_create(entity_objects, batch_size=ENTITY_BATCH_SIZE)
+        
+        if stages:
+            stages.save()
+            
+            # Keep the keyword index in step with the stored term counts
+            if 'terms' in stages.changed:
+                get_keyword_index(document.language).update_document(
+                    stages.stages['terms'].output, stages.saved_outputs.get('terms')
+                )
+        
+        # Update document status
+        document.status = 'completed'
+        document.save()
+    
+    return saved_entities
+
+def find_processed_duplicate(document, use_advanced=False):
+    """
+    Find a completed document with the same file content
+    
+    Args:
+        document (Document): Document about to be processed
+        use_advanced (bool): Whether advanced GROQ processing was requested
+        
+    Returns:
+        Document: Most recently processed duplicate, or None
+    """
+    if not document.content_hash:
+        return None
+    
+    return Document.objects.filter(
+        content_hash=document.content_hash,
+        language=document.language,
+        status='completed',
+        analysis_result__is_advanced=use_advanced
+    ).exclude(
+        pk=document.pk
+    ).select_related('analysis_result').order_by('-updated_at').first()
+
+def clone_processing_results(document, source, start_time):
+    """
+    Copy extracted text, processing result and entities from a duplicate
+    
+    Args:
+        document (Document): Document being processed
+        source (Document): Completed document with identical content
+        start_time (float): Processing start time
+        
+    Returns:
+        dict: Processing results
+    """
+    source_result = source.analysis_result
+    result_fields = {field: getattr(source_result, field) for field in CLONED_RESULT_FIELDS}
+    
+    entity_objects = [
+        NamedEntity(
+            document=document,
+            text=entity.text,
+            entity_type=entity.entity_type,
+            confidence_score=entity.confidence_score,
+            position_start=entity.position_start,
+            position_end=entity.position_end,
+            source=entity.source
+        )
+        for entity in source.entities.all()
+    ]
+    
+    source_pages = [
+        {'text': page.text, 'method': page.method, 'extraction_time': page.extraction_time, 'error': page.error}
+        for page in source.pages.all()
+    ]
+    if source_pages:
+        save_document_pages(document, source_pages)
+    else:
+        document.extracted_text = source.extracted_text
+        document.page_count = source.page_count
+    processing_time = time.time() - start_time
+    document.processing_time = processing_time
+    
+    # The text is identical, so the source's stage outputs stay current
+    stages = StageStore(document)
+    for stage in source.stages.all():
+        stages.put(stage.name, stage.fingerprint, stage.output, stage.duration)
+    
+    saved_entities = save_processing_results(document, result_fields, entity_objects, stages)
+    
+    keywords = [(kw, None) for kw in (source_result.keyword_summary or '').split(', ') if kw]
+    
+    return {
+        'document_id': document.id,
+        'status': 'success',
+        'summary': source_result.summary,
+        'sentiment_score': source_result.sentiment_score,
+        'keywords': keywords,
+        'entities_count': len(saved_entities),
+        'advanced_processing': source_result.is_advanced,
+        'groq_model': source_result.model_used,
+        'processing_time': processing_time,
+        'duplicate_of': source.id
+    }
+
 def extract_text(file_path):
     """
     Extract text from a document file
     
+    The extractor is chosen by the file's sniffed content type, not its
+    extension.
+    
     Args:
         file_path (str): Path to the document file
         
     Returns:
         str: Extracted text
     """
-    # Get file extension
-    _, ext = os.path.splitext(file_path)
-    ext = ext.lower()
-    
-    # Extract text based on file type
-    if ext == '.pdf':
-        return extract_text_from_pdf(file_path)
-    elif ext == '.docx':
-        return extract_text_from_docx(file_path)
-    elif ext in ['.jpg', '.jpeg', '.png', '.tiff', '.tif', '.bmp']:
-        return extract_text_from_image(file_path)
-    elif ext == '.txt':
-        return extract_text_from_txt(file_path)
-    else:
-        raise ValueError(f"Unsupported file type: {ext}")
+    return get_extractor(file_path).extract(file_path)
 
-def extract_text_from_pdf(file_path):
+def extract_pages(file_path):
     """
-    Extract text from a PDF file
+    Extract text from a document file page by page
+    
+    Files whose extractor does not split them into pages come back as a
+    single page.
     
     Args:
-        file_path (str): Path to the PDF file
+        file_path (str): Path to the document file
         
     Returns:
-        str: Extracted text
+        list: One dict per page with text, method, extraction_time and error
     """
-    text = ""
+    extractor = get_extractor(file_path)
+    if extractor.has_pages:
+        return extractor.extract_pages(file_path)
+    
+    start_time = time.time()
+    text = extractor.extract(file_path)
+    return [{
+        'text': text,
+        'method': extractor.method,
+        'extraction_time': time.time() - start_time,
+        'error': None,
+    }]
+
+def extract_pages_from_pdf(file_path):
+    """
+    Extract text from the pages of a PDF file
     
+    The text layer is used where it is usable; other pages, e.g. scans, are
+    OCR'd. Pages whose OCR fails keep their text layer and are marked failed.
+    
+    Args:
+        file_path (str): Path to the PDF file
+        
+    Returns:
+        list: One dict per page with text, method, extraction_time and error
+    """
+    start_time = time.time()
     try:
-        with open(file_path, 'rb') as f:
-            pdf_reader = PyPDF2.PdfReader(f)
-            
-            # Extract text from each page
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text += page.extract_text() + "\n\n"
+        # Pages are extracted in parallel shards and joined once, in order
+        texts, _ = extract_pdf_pages(file_path)
     except Exception as e:
         raise Exception(f"Error extracting text from PDF: {str(e)}")
     
-    return text
+    text_layer_time = (time.time() - start_time) / max(len(texts), 1)
+    pages = [
+        {'text': text, 'method': 'text_layer', 'extraction_time': text_layer_time, 'error': None}
+        for text in texts
+    ]
+    
+    # OCR only the pages without a usable text layer, e.g. scans
+    page_numbers = [i + 1 for i, text in enumerate(texts) if not has_usable_text(text)]
+    
+    if page_numbers and get_pdf_settings()['OCR_FALLBACK']:
+        ocr = get_ocr_processor()
+        try:
+            ocr_texts = ocr.process_pdf_pages(file_path, page_numbers)
+        except Exception as e:
+            # Keep whatever text layer there is
+            print(f"OCR fallback failed for {len(page_numbers)} page(s): {str(e)}")
+            for number in page_numbers:
+                pages[number - 1].update(method='failed', error=str(e))
+        else:
+            for number, text in ocr_texts.items():
+                page = pages[number - 1]
+                page['extraction_time'] += ocr.page_timings.get(number, 0.0)
+                if len(text.strip()) > len(page['text'].strip()):
+                    page.update(text=text, method='ocr')
+    
+    return pages
+
+def join_pages(pages):
+    """Join page texts into the document text"""
+    return PAGE_SEPARATOR.join(page['text'] or '' for page in pages)
+
+def save_document_pages(document, pages):
+    """
+    Replace a document's pages and rebuild its extracted text from them
+    
+    Args:
+        document (Document): Document
+        pages (list): Page dicts from extract_pages
+        
+    Returns:
+        list: Saved DocumentPage objects
+    """
+    page_objects = []
+    offset = 0
+    for number, page in enumerate(pages, start=1):
+        text = page['text'] or ''
+        page_objects.append(DocumentPage(
+            document=document,
+            page_number=number,
+            text=text,
+            char_start=offset,
+            char_end=offset + len(text),
+            method=page['method'],
+            extraction_time=page.get('extraction_time'),
+            error=page.get('error')
+        ))
+        offset += len(text) + len(PAGE_SEPARATOR)
+    
+    with transaction.atomic():
+        document.pages.all().delete()
+        DocumentPage.objects.bulk_create(page_objects, batch_size=ENTITY_BATCH_SIZE)
+        
+        document.extracted_text = join_pages(pages)
+        document.page_count = len(page_objects)
+        document.save(update_fields=['extracted_text', 'page_count', 'updated_at'])
+    
+    return page_objects
+
+def reextract_failed_pages(document):
+    """
+    Retry extraction of the pages of a document that failed last time
+    
+    Args:
+        document (Document): Document
+        
+    Returns:
+        int: Number of pages that were extracted this time
+    """
+    failed = list(document.pages.filter(method='failed').values_list('page_number', flat=True))
+    if not failed or document.get_file_extension().lower() != 'pdf':
+        return 0
+    
+    pages = [
+        {'text': page.text, 'method': page.method, 'extraction_time': page.extraction_time, 'error': page.error}
+        for page in document.pages.all()
+    ]
+    
+    ocr = get_ocr_processor()
+    try:
+        ocr_texts = ocr.process_pdf_pages(document.file.path, failed)
+    except Exception as e:
+        print(f"Re-extraction failed for {len(failed)} page(s): {str(e)}")
+        return 0
+    
+    for number, text in ocr_texts.items():
+        pages[number - 1].update(
+            text=text,
+            method='ocr',
+            extraction_time=ocr.page_timings.get(number),
+            error=None
+        )
+    
+    save_document_pages(document, pages)
+    return len(ocr_texts)
+
+def extract_text_from_pdf(file_path):
+    """
+    Extract text from a PDF file
+    
+    Args:
+        file_path (str): Path to the PDF file
+        
+    Returns:
+        str: Extracted text
+    """
+    return join_pages(extract_pages_from_pdf(file_path))
 
 def extract_text_from_docx(file_path):
     """
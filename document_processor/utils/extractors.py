@@ -0,0 +1,223 @@
+"""
+Registry of text extractors keyed by the MIME type sniffed from file content
+"""
+import os
+import fnmatch
+import mimetypes
+import threading
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+try:
+    import magic
+except ImportError:  # python-magic without libmagic installed
+    magic = None
+
+# Bytes read from the start of a file to identify its type
+SNIFF_BYTES = 2048
+
+# Type libmagic reports when it cannot identify the content
+UNKNOWN_MIME_TYPE = 'application/octet-stream'
+
+# Built-in extractors. 'extract' (and the optional 'pages', which returns one
+# dict per page) are callables or dotted paths to them; 'containers' are
+# generic types, e.g. zip, matched only together with a listed extension, and
+# may be patterns such as 'text/*'.
+DEFAULT_EXTRACTORS = {
+    'pdf': {
+        'mime_types': ['application/pdf'],
+        'extensions': ['pdf'],
+        'extract': 'document_processor.utils.document_processor.extract_text_from_pdf',
+        'pages': 'document_processor.utils.document_processor.extract_pages_from_pdf',
+    },
+    'docx': {
+        'mime_types': ['application/vnd.openxmlformats-officedocument.wordprocessingml.document'],
+        'extensions': ['docx'],
+        'containers': ['application/zip'],
+        'extract': 'document_processor.utils.document_processor.extract_text_from_docx',
+    },
+    'image': {
+        'mime_types': ['image/jpeg', 'image/png', 'image/tiff', 'image/bmp', 'image/x-ms-bmp'],
+        'extensions': ['jpg', 'jpeg', 'png', 'tiff', 'tif', 'bmp'],
+        'extract': 'document_processor.utils.ocr.extract_text_from_image',
+        'method': 'ocr',
+    },
+    'text': {
+        'mime_types': ['text/plain'],
+        'extensions': ['txt'],
+        # libmagic names plain text by what it looks like: CSV, JSON, source code, empty
+        'containers': ['text/*', 'application/json', 'application/x-empty'],
+        'extract': 'document_processor.utils.document_processor.extract_text_from_txt',
+    },
+}
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+def register_extractor(name, extract, mime_types, extensions=(), containers=(), pages=None, method='text_layer'):
+    """
+    Register a text extractor, replacing any extractor with the same name
+
+    Args:
+        name (str): Extractor name
+        extract (callable or str): Function taking a file path and returning its text
+        mime_types (list): MIME types the extractor handles
+        extensions (list, optional): File extensions accepted at upload
+        containers (list, optional): Generic MIME types, or patterns, handled for these extensions only
+        pages (callable or str, optional): Function returning one page dict per page
+        method (str): DocumentPage method recorded for the extracted text
+    """
+    with _registry_lock:
+        _registry[name] = {
+            'mime_types': list(mime_types),
+            'extensions': list(extensions),
+            'containers': list(containers),
+            'extract': extract,
+            'pages': pages,
+            'method': method,
+        }
+
+def get_extractors():
+    """
+    Get every available extractor
+
+    Extractors in settings.DOCUMENT_EXTRACTORS are added to, or replace, the
+    built-in ones, and registered extractors take precedence over both.
+
+    Returns:
+        dict: Extractor settings keyed by name
+    """
+    with _registry_lock:
+        registered = dict(_registry)
+    return {**DEFAULT_EXTRACTORS, **getattr(settings, 'DOCUMENT_EXTRACTORS', {}), **registered}
+
+def supported_extensions():
+    """
+    Get the file extensions accepted at upload
+
+    Returns:
+        list: Sorted extensions, without the dot
+    """
+    return sorted({ext for extractor in get_extractors().values() for ext in extractor.get('extensions', ())})
+
+def sniff_mime_type(source, filename=None):
+    """
+    Identify a file's type from its first bytes
+
+    Args:
+        source (bytes, str or file): Leading bytes, a file path or an open binary file
+        filename (str, optional): File name, used to guess the type when libmagic is unavailable
+
+    Returns:
+        str: MIME type
+    """
+    if isinstance(source, bytes):
+        head = source[:SNIFF_BYTES]
+    elif isinstance(source, str):
+        filename = filename or source
+        with open(source, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+    else:
+        position = source.tell()
+        source.seek(0)
+        head = source.read(SNIFF_BYTES)
+        source.seek(position)
+
+    if magic is None:
+        return mimetypes.guess_type(filename or '')[0] or UNKNOWN_MIME_TYPE
+    return magic.from_buffer(head, mime=True)
+
+class Extractor:
+    """
+    Text extractor chosen for a file
+    """
+
+    def __init__(self, name, config):
+        """
+        Initialize extractor
+
+        Args:
+            name (str): Extractor name
+            config (dict): Extractor settings
+        """
+        self.name = name
+        self.method = config.get('method', 'text_layer')
+        self._extract = config['extract']
+        self._pages = config.get('pages')
+
+    @staticmethod
+    def _resolve(function):
+        return import_string(function) if isinstance(function, str) else function
+
+    @property
+    def has_pages(self):
+        """Whether the extractor returns text page by page"""
+        return self._pages is not None
+
+    def extract(self, file_path):
+        """
+        Extract the text of a file
+
+        Args:
+            file_path (str): Path to the file
+
+        Returns:
+            str: Extracted text
+        """
+        return self._resolve(self._extract)(file_path)
+
+    def extract_pages(self, file_path):
+        """
+        Extract the text of a file page by page
+
+        Args:
+            file_path (str): Path to the file
+
+        Returns:
+            list: One dict per page with text, method, extraction_time and error
+        """
+        return self._resolve(self._pages)(file_path)
+
+def find_extractor(mime_type, filename=None):
+    """
+    Find the extractor for a file type
+
+    Args:
+        mime_type (str): Sniffed MIME type
+        filename (str, optional): File name, needed to match generic container types
+
+    Returns:
+        Extractor: Matching extractor, or None if the type is not supported
+    """
+    extractors = get_extractors()
+    for name, config in extractors.items():
+        if mime_type in config.get('mime_types', ()):
+            return Extractor(name, config)
+
+    extension = os.path.splitext(filename or '')[1].lower().lstrip('.')
+    for name, config in extractors.items():
+        if extension not in config.get('extensions', ()):
+            continue
+        if any(fnmatch.fnmatchcase(mime_type, container) for container in config.get('containers', ())):
+            return Extractor(name, config)
+
+    return None
+
+def get_extractor(file_path):
+    """
+    Get the extractor for a file from its content
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        Extractor: Matching extractor
+
+    Raises:
+        ValueError: If no extractor handles the file's type
+    """
+    mime_type = sniff_mime_type(file_path)
+    extractor = find_extractor(mime_type, file_path)
+    if extractor is None:
+        raise ValueError(f"Unsupported file type: {mime_type}")
+    return extractor
@@ -2,27 +2,430 @@
 GROQ API integration for advanced NLP processing
 """
 import os
+import re
+import math
+import time
+import random
+import threading
 import requests
-from typing import Dict, List, Optional, Any, Union
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Dict, List, Optional, Any, Union, Tuple
 import json
+from django.conf import settings
+from .cache import get_cache, make_cache_key
+
+DEFAULT_GROQ_SETTINGS = {
+    'BASE_URL': 'https://api.groq.com/openai/v1',
+    'MAX_CONCURRENT_CALLS': 3,
+    'CALL_TIMEOUT': 60,
+    'CONNECT_TIMEOUT': 5,
+    'READ_TIMEOUT': 60,
+    'MAX_RETRIES': 3,
+    'BACKOFF_FACTOR': 1.0,
+    'BACKOFF_MAX': 30,
+    'POOL_SIZE': 10,
+    'CHUNKED_MODE': True,
+    'CHUNK_CHARS': 4000,
+    'MAX_CHUNKS': 8,
+    'CHUNK_CONCURRENCY': 4,
+    'REDUCE_CHARS': 8000,
+    'COMBINED_MODE': False,
+}
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Bump a version whenever its prompt changes so cached responses are not reused
+PROMPT_VERSIONS = {
+    'analysis': 1,
+    'entities': 1,
+    'insights': 1,
+    'analysis_reduce': 1,
+    'insights_reduce': 1,
+    'combined': 1,
+    'combined_insights': 1,
+}
+
+# Shape of the single-call response requested in combined mode
+COMBINED_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "themes": {"type": "array", "items": {"type": "string"}},
+        "sentiment": {"type": "string", "enum": ["positive", "neutral", "negative"]},
+        "facts": {"type": "array", "items": {"type": "string"}},
+        "entities": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "text": {"type": "string"},
+                    "type": {"type": "string"},
+                    "description": {"type": "string"}
+                },
+                "required": ["text", "type"]
+            }
+        },
+        "insights": {"type": "array", "items": {"type": "string"}}
+    },
+    "required": ["summary", "themes", "sentiment", "facts", "entities"]
+}
+
+# Task name of the single call made in combined mode
+COMBINED_TASK = 'combined'
+
+# Page markers written by OCR and form feeds between PDF pages
+PAGE_BREAK_PATTERN = re.compile(r'\f|(?=^--- Page \d+ ---$)', re.MULTILINE)
+PARAGRAPH_BREAK_PATTERN = re.compile(r'\n\s*\n')
+
+_executor = None
+_executor_lock = threading.Lock()
+_session = None
+_session_lock = threading.Lock()
+_chunk_executor = None
+
+def get_groq_settings():
+    """
+    Get GROQ settings merged over the defaults
+    
+    Returns:
+        dict: GROQ settings
+    """
+    return {**DEFAULT_GROQ_SETTINGS, **getattr(settings, 'GROQ_SETTINGS', {})}
+
+def _get_executor():
+    """Get the process-wide thread pool that bounds concurrent GROQ calls"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_groq_settings()['MAX_CONCURRENT_CALLS'],
+                thread_name_prefix='groq'
+            )
+        return _executor
+
+def _get_chunk_executor():
+    """
+    Get the thread pool for per-chunk calls
+    
+    Kept separate from the task pool so chunked tasks running there never
+    wait on calls queued behind themselves.
+    """
+    global _chunk_executor
+    with _executor_lock:
+        if _chunk_executor is None:
+            _chunk_executor = ThreadPoolExecutor(
+                max_workers=get_groq_settings()['CHUNK_CONCURRENCY'],
+                thread_name_prefix='groq-chunk'
+            )
+        return _chunk_executor
+
+def split_into_chunks(text, max_chars=4000, max_chunks=None):
+    """
+    Split text into pieces that fit a prompt, on page and paragraph boundaries
+    
+    Pages and paragraphs are packed greedily into chunks of at most max_chars
+    characters; only paragraphs longer than that are cut, at whitespace.
+    
+    Args:
+        text (str): Document text
+        max_chars (int): Maximum characters per chunk
+        max_chunks (int, optional): Maximum number of chunks returned
+        
+    Returns:
+        list: Text chunks in document order
+    """
+    # Break into units no longer than max_chars
+    units = []
+    for page in PAGE_BREAK_PATTERN.split(text):
+        for paragraph in PARAGRAPH_BREAK_PATTERN.split(page):
+            paragraph = paragraph.strip()
+            while len(paragraph) > max_chars:
+                cut = paragraph.rfind(' ', 0, max_chars)
+                if cut <= 0:
+                    cut = max_chars
+                units.append(paragraph[:cut])
+                paragraph = paragraph[cut:].strip()
+            if paragraph:
+                units.append(paragraph)
+    
+    # Pack units into chunks
+    chunks = []
+    current = []
+    current_length = 0
+    for unit in units:
+        if current and current_length + len(unit) + 2 > max_chars:
+            chunks.append('\n\n'.join(current))
+            current = []
+            current_length = 0
+        current.append(unit)
+        current_length += len(unit) + 2
+    if current:
+        chunks.append('\n\n'.join(current))
+    
+    if max_chunks is not None and len(chunks) > max_chunks:
+        print(f"Document split into {len(chunks)} chunks, analyzing the first {max_chunks}")
+        chunks = chunks[:max_chunks]
+    
+    return chunks
+
+def _merge_usage(responses):
+    """Sum token usage over several responses"""
+    usage = {}
+    for response in responses:
+        for key, value in response.get('usage', {}).items():
+            if isinstance(value, (int, float)):
+                usage[key] = usage.get(key, 0) + value
+    return usage
+
+def merge_entities(entity_lists):
+    """
+    Merge entity lists from several chunks, dropping duplicates
+    
+    Args:
+        entity_lists (list): Lists of GROQ entity dictionaries
+        
+    Returns:
+        list: Entities in first-seen order, unique by text and type
+    """
+    merged = []
+    seen = set()
+    for entities in entity_lists:
+        for entity in entities:
+            if not isinstance(entity, dict):
+                continue
+            key = (str(entity.get('text', '')).strip().lower(), str(entity.get('type', '')).strip().lower())
+            if key[0] and key not in seen:
+                seen.add(key)
+                merged.append(entity)
+    return merged
+
+def parse_combined_response(content, include_insights=False):
+    """
+    Parse and validate a combined-mode response against COMBINED_RESPONSE_SCHEMA
+    
+    Args:
+        content (str): Message content returned by the model
+        include_insights (bool): Whether insights were requested
+        
+    Returns:
+        dict: Parsed response
+        
+    Raises:
+        ValueError: If the content is not JSON or does not match the schema
+    """
+    json_start = content.find('{')
+    json_end = content.rfind('}') + 1
+    if json_start < 0 or json_end <= json_start:
+        raise ValueError("Response contains no JSON object")
+    
+    try:
+        data = json.loads(content[json_start:json_end])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Response is not valid JSON: {str(e)}")
+    
+    required = list(COMBINED_RESPONSE_SCHEMA['required'])
+    if include_insights:
+        required.append('insights')
+    missing = [field for field in required if field not in data]
+    if missing:
+        raise ValueError(f"Response is missing fields: {', '.join(missing)}")
+    
+    if not isinstance(data['summary'], str) or not data['summary'].strip():
+        raise ValueError("Response summary is empty")
+    for field in ('themes', 'facts', 'insights'):
+        if field in data and not (isinstance(data[field], list)
+                                  and all(isinstance(item, str) for item in data[field])):
+            raise ValueError(f"Response {field} is not a list of strings")
+    if not isinstance(data['entities'], list):
+        raise ValueError("Response entities is not a list")
+    
+    # Drop malformed entities rather than the whole response
+    data['entities'] = [
+        entity for entity in data['entities']
+        if isinstance(entity, dict) and entity.get('text') and entity.get('type')
+    ]
+    
+    return data
+
+def format_combined_analysis(data):
+    """
+    Render the analysis part of a combined response as text
+    
+    Args:
+        data (dict): Response from parse_combined_response
+        
+    Returns:
+        str: Analysis in the same form as the per-task analysis
+    """
+    sections = [
+        f"Summary: {data['summary'].strip()}",
+        "Main themes: " + ", ".join(data['themes']),
+        f"Sentiment: {data['sentiment']}",
+    ]
+    if data['facts']:
+        sections.append("Important facts:\n" + "\n".join(f"- {fact}" for fact in data['facts']))
+    return "\n\n".join(sections)
+
+def get_llm_cache():
+    """
+    Get the process-wide LLM response cache
+    
+    Returns:
+        ResponseCache: Shared cache, or None if disabled in settings
+    """
+    return get_cache('llm', getattr(settings, 'LLM_CACHE', {}))
+
+def get_session():
+    """
+    Get the process-wide HTTP session used for GROQ requests
+    
+    The session keeps connections alive in a pool, so requests after the first
+    skip the TCP and TLS handshakes.
+    
+    Returns:
+        requests.Session: Shared session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_size = get_groq_settings()['POOL_SIZE']
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+            _session = requests.Session()
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+def _retry_delay(attempt, response=None):
+    """
+    Get seconds to wait before retrying a request
+    
+    Honours a Retry-After header when the server sends one, otherwise uses
+    exponential backoff with full jitter.
+    
+    Args:
+        attempt (int): Number of the failed attempt, starting at 0
+        response (requests.Response, optional): Response that failed
+        
+    Returns:
+        float: Delay in seconds
+    """
+    groq_settings = get_groq_settings()
+    
+    retry_after = response.headers.get('Retry-After') if response is not None else None
+    if retry_after:
+        try:
+            delay = float(retry_after)
+        except ValueError:
+            try:
+                delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+            except (TypeError, ValueError):
+                delay = None
+        if delay is not None:
+            return min(max(delay, 0), groq_settings['BACKOFF_MAX'])
+    
+    backoff = min(groq_settings['BACKOFF_FACTOR'] * (2 ** attempt), groq_settings['BACKOFF_MAX'])
+    return random.uniform(0, backoff)
+
+def _check_cancelled(cancel_event):
+    """Raise if the task group waiting on a chunked task has given up"""
+    if cancel_event is not None and cancel_event.is_set():
+        raise Exception("Cancelled after the task timed out")
+
+def _prompt_text(text):
+    """
+    Limit text to what one prompt carries, CHUNK_CHARS characters
+
+    Longer documents are split into chunks of this size in chunked mode, so
+    only texts sent whole with chunking disabled are cut.
+    """
+    return text[:get_groq_settings()['CHUNK_CHARS']]
+
+class GroqTaskGroup:
+    """
+    Handle for GROQ calls running concurrently in the background
+    
+    Each call gets its own timeout, counted from when it was submitted, and a
+    failing or slow call only drops its own result. A call that is already
+    running cannot be cancelled, so timing out also sets cancel_event, which
+    chunked tasks check before each further chunk or reduce call.
+    """
+    
+    def __init__(self, futures, timeout, cancel_event=None):
+        """
+        Initialize task group
+        
+        Args:
+            futures (dict): Futures keyed by task name
+            timeout (float): Per-call timeout in seconds
+            cancel_event (threading.Event, optional): Set to stop chunked tasks
+        """
+        self.futures = futures
+        self.timeout = timeout
+        self.cancel_event = cancel_event or threading.Event()
+        self.submitted_at = time.monotonic()
+    
+    def result(self) -> Dict[str, Any]:
+        """
+        Wait for all calls and collect their results
+        
+        Returns:
+            dict: Result per task name (None if it failed) plus an "errors" dict
+        """
+        results = {name: None for name in ('analysis', 'entities', 'insights')}
+        results['errors'] = {}
+        
+        for name, future in self.futures.items():
+            remaining = max(self.timeout - (time.monotonic() - self.submitted_at), 0)
+            try:
+                result = future.result(timeout=remaining)
+            except FuturesTimeoutError:
+                future.cancel()
+                self.cancel_event.set()
+                results['errors'][name] = f"Timed out after {self.timeout} seconds"
+                continue
+            except Exception as e:
+                results['errors'][name] = str(e)
+                continue
+            
+            # A combined call returns the results of several tasks at once
+            if name == COMBINED_TASK:
+                errors = result.pop('errors', {})
+                results.update(result)
+                results['errors'].update(errors)
+            else:
+                results[name] = result
+        
+        return results
+    
+    def cancel(self):
+        """Cancel calls that have not started yet and stop chunked tasks"""
+        self.cancel_event.set()
+        for future in self.futures.values():
+            future.cancel()
 
 class GroqProcessor:
     """
     Processor class for GROQ API integration
     """
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, base_url=None, cache=None):
         """
         Initialize GROQ processor
         
         Args:
             api_key (str, optional): GROQ API key
+            base_url (str, optional): OpenAI-compatible API base URL (default: settings)
+            cache (ResponseCache, optional): Response cache (default: the shared LLM cache)
         """
         self.api_key = api_key or os.environ.get("GROQ_API_KEY")
         if not self.api_key:
             raise ValueError("GROQ API key is required. Set it in environment or pass as parameter.")
         
-        self.base_url = "https://api.groq.com/openai/v1"
+        self.base_url = (base_url or get_groq_settings()['BASE_URL']).rstrip('/')
+        self.cache = cache if cache is not None else get_llm_cache()
         self.models = {
             "free": "llama3-8b-8192",  # Free tier model
             "advanced": [
@@ -32,10 +435,25 @@ class GroqProcessor:
             ]
         }
     
+    def get_model(self, advanced: bool = False) -> str:
+        """
+        Get the model used for a request
+        
+        Args:
+            advanced: Whether to use advanced models
+            
+        Returns:
+            str: Model name
+        """
+        return self.models["advanced"][0] if advanced else self.models["free"]
+    
     def _make_request(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Make request to GROQ API
         
+        Rate limited (429) and transient server errors, connection errors and
+        timeouts are retried with backoff up to MAX_RETRIES times.
+        
         Args:
             endpoint: API endpoint
             data: Request data
@@ -43,21 +461,90 @@ class GroqProcessor:
         Returns:
             dict: API response
         """
+        groq_settings = get_groq_settings()
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
         }
+        timeout = (groq_settings['CONNECT_TIMEOUT'], groq_settings['READ_TIMEOUT'])
+        max_retries = groq_settings['MAX_RETRIES']
         
-        response = requests.post(
-            f"{self.base_url}/{endpoint}",
-            headers=headers,
-            json=data
-        )
+        for attempt in range(max_retries + 1):
+            try:
+                response = get_session().post(
+                    f"{self.base_url}/{endpoint}",
+                    headers=headers,
+                    json=data,
+                    timeout=timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= max_retries:
+                    raise Exception(f"Request failed after {attempt + 1} attempts: {str(e)}")
+                time.sleep(_retry_delay(attempt))
+                continue
+            
+            if response.status_code in RETRY_STATUS_CODES and attempt < max_retries:
+                time.sleep(_retry_delay(attempt, response))
+                continue
+            
+            if response.status_code != 200:
+                raise Exception(f"Error {response.status_code}: {response.text}")
+            
+            return response.json()
+    
+    def _chat_completion(self, task: str, model: str, system_prompt: str, prompt: str,
+                         temperature: float, text: str,
+                         response_format: Optional[Dict[str, Any]] = None,
+                         validate=None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Run a chat completion, reading and filling the response cache
         
-        if response.status_code != 200:
-            raise Exception(f"Error {response.status_code}: {response.text}")
+        Args:
+            task: Prompt name from PROMPT_VERSIONS
+            model: Model name
+            system_prompt: System message
+            prompt: User message
+            temperature: Sampling temperature
+            text: Document text embedded in the prompt
+            response_format: Optional OpenAI-style response_format
+            validate: Optional callable raising ValueError for a response that
+                must not be cached
+            
+        Returns:
+            tuple: (API response, whether it came from the cache)
+        """
+        cache_key = None
+        if self.cache is not None:
+            cache_key = make_cache_key(
+                task=task,
+                prompt_version=PROMPT_VERSIONS[task],
+                model=model,
+                temperature=temperature,
+                text=text
+            )
+            response = self.cache.get(cache_key)
+            if response is not None:
+                return response, True
         
-        return response.json()
+        data = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": temperature
+        }
+        if response_format is not None:
+            data["response_format"] = response_format
+        
+        response = self._make_request("chat/completions", data)
+        if validate is not None:
+            validate(response)
+        
+        if cache_key is not None:
+            self.cache.set(cache_key, response)
+        
+        return response, False
     
     def analyze_document(self, text: str, advanced: bool = False) -> Dict[str, Any]:
         """
@@ -70,7 +557,8 @@ class GroqProcessor:
         Returns:
             dict: Analysis results
         """
-        model = self.models["advanced"][0] if advanced else self.models["free"]
+        model = self.get_model(advanced)
+        prompt_text = _prompt_text(text)
         
         prompt = f"""
         Analyze the following document text and provide a comprehensive analysis including:
@@ -81,17 +569,17 @@ class GroqProcessor:
         5. Important facts extracted from the document
         
         Text:
-        {text[:4000]}  # Limiting text size for API constraints
+        {prompt_text}  # Limiting text size for API constraints
         """
         
-        response = self._make_request("chat/completions", {
-            "model": model,
-            "messages": [
-                {"role": "system", "content": "You are an AI assistant that specializes in document analysis."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.3
-        })
+        response, cached = self._chat_completion(
+            "analysis",
+            model,
+            "You are an AI assistant that specializes in document analysis.",
+            prompt,
+            temperature=0.3,
+            text=prompt_text
+        )
         
         # Parse the response
         analysis_text = response["choices"][0]["message"]["content"]
@@ -101,7 +589,8 @@ class GroqProcessor:
             "model_used": model,
             "is_advanced": advanced,
             "analysis": analysis_text,
-            "usage": response.get("usage", {})
+            "usage": response.get("usage", {}),
+            "cached": cached
         }
     
     def extract_advanced_entities(self, text: str, advanced: bool = False) -> Dict[str, Any]:
@@ -115,7 +604,8 @@ class GroqProcessor:
         Returns:
             dict: Extracted entities
         """
-        model = self.models["advanced"][0] if advanced else self.models["free"]
+        model = self.get_model(advanced)
+        prompt_text = _prompt_text(text)
         
         prompt = f"""
         Extract all named entities from the following text. For each entity, provide:
@@ -126,17 +616,17 @@ class GroqProcessor:
         Format the response as a JSON object with an "entities" array.
         
         Text:
-        {text[:4000]}
+        {prompt_text}
         """
         
-        response = self._make_request("chat/completions", {
-            "model": model,
-            "messages": [
-                {"role": "system", "content": "You are an AI assistant that specializes in named entity recognition."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.2
-        })
+        response, cached = self._chat_completion(
+            "entities",
+            model,
+            "You are an AI assistant that specializes in named entity recognition.",
+            prompt,
+            temperature=0.2,
+            text=prompt_text
+        )
         
         # Parse the response
         entity_text = response["choices"][0]["message"]["content"]
@@ -162,7 +652,8 @@ class GroqProcessor:
             "is_advanced": advanced,
             "entities": entities,
             "raw_response": entity_text,
-            "usage": response.get("usage", {})
+            "usage": response.get("usage", {}),
+            "cached": cached
         }
     
     def generate_insights(self, text: str, advanced: bool = False) -> Dict[str, Any]:
@@ -176,7 +667,8 @@ class GroqProcessor:
         Returns:
             dict: Generated insights
         """
-        model = self.models["advanced"][0] if advanced else self.models["free"]
+        model = self.get_model(advanced)
+        prompt_text = _prompt_text(text)
         
         prompt = f"""
         Generate valuable insights from the following document text. Include:
@@ -186,17 +678,17 @@ class GroqProcessor:
         4. Questions that should be explored further
         
         Text:
-        {text[:4000]}
+        {prompt_text}
         """
         
-        response = self._make_request("chat/completions", {
-            "model": model,
-            "messages": [
-                {"role": "system", "content": "You are an AI assistant that specializes in analyzing documents and generating valuable insights."},
-                {"role": "user", "content": prompt}
-            ],
-            "temperature": 0.5
-        })
+        response, cached = self._chat_completion(
+            "insights",
+            model,
+            "You are an AI assistant that specializes in analyzing documents and generating valuable insights.",
+            prompt,
+            temperature=0.5,
+            text=prompt_text
+        )
         
         # Parse the response
         insights_text = response["choices"][0]["message"]["content"]
@@ -205,17 +697,403 @@ class GroqProcessor:
             "model_used": model,
             "is_advanced": advanced,
             "insights": insights_text,
-            "usage": response.get("usage", {})
+            "usage": response.get("usage", {}),
+            "cached": cached
+        }
+
+    def _map_chunks(self, task, chunks: List[str], advanced: bool,
+                    cancel_event: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
+        """
+        Run a task over every chunk concurrently
+        
+        Args:
+            task: Bound method taking (text, advanced=...)
+            chunks: Text chunks
+            advanced: Whether to use advanced models
+            cancel_event: Once set, chunks not started yet are skipped
+            
+        Returns:
+            list: Results of the chunks that succeeded, in document order
+        """
+        def run(chunk):
+            _check_cancelled(cancel_event)
+            return task(chunk, advanced=advanced)
+        
+        executor = _get_chunk_executor()
+        futures = [executor.submit(run, chunk) for chunk in chunks]
+        
+        results = []
+        errors = []
+        for i, future in enumerate(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append(f"chunk {i + 1}: {str(e)}")
+        
+        # The caller has given up, so skip the reduce call too
+        _check_cancelled(cancel_event)
+        if not results:
+            raise Exception(f"All {len(chunks)} chunks failed: {'; '.join(errors)}")
+        for error in errors:
+            print(f"GROQ {task.__name__} error in {error}")
+        
+        return results
+    
+    def _reduce(self, task: str, parts: List[str], model: str) -> Tuple[Dict[str, Any], bool]:
+        """
+        Combine per-chunk outputs into one with a final completion
+        
+        Args:
+            task: 'analysis_reduce' or 'insights_reduce'
+            parts: Per-chunk outputs in document order
+            model: Model name
+            
+        Returns:
+            tuple: (API response, whether it came from the cache)
+        """
+        if task == 'analysis_reduce':
+            instructions = """
+        The following are analyses of consecutive parts of one document.
+        Combine them into a single analysis of the whole document including:
+        1. A concise summary (max 100 words)
+        2. Main themes/topics
+        3. Key entities (people, organizations, locations, dates)
+        4. The overall sentiment (positive, neutral, negative)
+        5. Important facts extracted from the document
+        """
+            system_prompt = "You are an AI assistant that specializes in document analysis."
+            temperature = 0.3
+        else:
+            instructions = """
+        The following are insights generated from consecutive parts of one document.
+        Combine them into a single set of insights for the whole document, merging
+        duplicates and keeping the most important points. Include:
+        1. Unexpected connections or patterns
+        2. Important implications
+        3. Potential action items
+        4. Questions that should be explored further
+        """
+            system_prompt = "You are an AI assistant that specializes in analyzing documents and generating valuable insights."
+            temperature = 0.5
+        
+        # Each part gets an equal share of the reduce prompt
+        part_chars = max(get_groq_settings()['REDUCE_CHARS'] // len(parts), 1)
+        combined = '\n\n'.join(f"Part {i + 1}:\n{part[:part_chars]}" for i, part in enumerate(parts))
+        prompt = f"{instructions}\n        {combined}\n"
+        
+        return self._chat_completion(task, model, system_prompt, prompt, temperature=temperature, text=combined)
+    
+    def _chunks(self, text: str) -> List[str]:
+        """Split text using the configured chunk limits"""
+        groq_settings = get_groq_settings()
+        return split_into_chunks(text, groq_settings['CHUNK_CHARS'], groq_settings['MAX_CHUNKS'])
+    
+    def analyze_document_chunked(self, text: str, advanced: bool = False,
+                                 cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """
+        Analyze a long document by analyzing each chunk and combining the results
+        
+        Args:
+            text: Document text
+            advanced: Whether to use advanced models
+            cancel_event: Once set, no further chunk or reduce calls are made
+            
+        Returns:
+            dict: Analysis results, as from analyze_document
+        """
+        chunks = self._chunks(text)
+        if len(chunks) <= 1:
+            return self.analyze_document(text, advanced=advanced)
+        
+        model = self.get_model(advanced)
+        partials = self._map_chunks(self.analyze_document, chunks, advanced, cancel_event)
+        response, cached = self._reduce('analysis_reduce', [p['analysis'] for p in partials], model)
+        
+        return {
+            "model_used": model,
+            "is_advanced": advanced,
+            "analysis": response["choices"][0]["message"]["content"],
+            "usage": _merge_usage(partials + [response]),
+            "cached": cached,
+            "chunks": len(chunks)
         }
+    
+    def extract_advanced_entities_chunked(self, text: str, advanced: bool = False,
+                                          cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """
+        Extract entities from every chunk of a long document and merge them
+        
+        Args:
+            text: Document text
+            advanced: Whether to use advanced models
+            cancel_event: Once set, no further chunk calls are made
+            
+        Returns:
+            dict: Extracted entities, as from extract_advanced_entities
+        """
+        chunks = self._chunks(text)
+        if len(chunks) <= 1:
+            return self.extract_advanced_entities(text, advanced=advanced)
+        
+        model = self.get_model(advanced)
+        partials = self._map_chunks(self.extract_advanced_entities, chunks, advanced, cancel_event)
+        
+        return {
+            "model_used": model,
+            "is_advanced": advanced,
+            "entities": merge_entities(p['entities'] for p in partials),
+            "raw_response": '\n\n'.join(p['raw_response'] for p in partials),
+            "usage": _merge_usage(partials),
+            "cached": all(p.get('cached') for p in partials),
+            "chunks": len(chunks)
+        }
+    
+    def generate_insights_chunked(self, text: str, advanced: bool = False,
+                                  cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """
+        Generate insights for every chunk of a long document and combine them
+        
+        Args:
+            text: Document text
+            advanced: Whether to use advanced models
+            cancel_event: Once set, no further chunk or reduce calls are made
+            
+        Returns:
+            dict: Generated insights, as from generate_insights
+        """
+        chunks = self._chunks(text)
+        if len(chunks) <= 1:
+            return self.generate_insights(text, advanced=advanced)
+        
+        model = self.get_model(advanced)
+        partials = self._map_chunks(self.generate_insights, chunks, advanced, cancel_event)
+        response, cached = self._reduce('insights_reduce', [p['insights'] for p in partials], model)
+        
+        return {
+            "model_used": model,
+            "is_advanced": advanced,
+            "insights": response["choices"][0]["message"]["content"],
+            "usage": _merge_usage(partials + [response]),
+            "cached": cached,
+            "chunks": len(chunks)
+        }
+    
+    def analyze_combined(self, text: str, advanced: bool = False,
+                         include_insights: bool = False) -> Dict[str, Any]:
+        """
+        Get analysis, entities and optionally insights from a single completion
+        
+        The model is asked for one JSON object matching COMBINED_RESPONSE_SCHEMA.
+        If the response cannot be parsed, the per-task calls are made instead.
+        
+        Args:
+            text: Document text
+            advanced: Whether to use advanced models
+            include_insights: Whether to also generate insights
+            
+        Returns:
+            dict: Result per task name plus an "errors" dict, shaped like the
+                per-task results
+        """
+        model = self.get_model(advanced)
+        prompt_text = _prompt_text(text)
+        
+        schema = json.loads(json.dumps(COMBINED_RESPONSE_SCHEMA))
+        if include_insights:
+            schema["required"].append("insights")
+        else:
+            del schema["properties"]["insights"]
+        
+        prompt = f"""
+        Analyze the following document text and respond with a single JSON object
+        matching this JSON schema:
+        {json.dumps(schema)}
+        
+        - summary: a concise summary (max 100 words)
+        - themes: the main themes/topics
+        - sentiment: the overall sentiment
+        - facts: important facts extracted from the document
+        - entities: all named entities (person, organization, location, date, event, product, etc.)
+          with a brief description if possible"""
+        if include_insights:
+            prompt += """
+        - insights: unexpected connections or patterns, important implications,
+          potential action items and questions that should be explored further"""
+        prompt += f"""
+        
+        Text:
+        {prompt_text}
+        """
+        
+        def parse(response):
+            return parse_combined_response(response["choices"][0]["message"]["content"], include_insights)
+        
+        try:
+            response, cached = self._chat_completion(
+                "combined_insights" if include_insights else "combined",
+                model,
+                "You are an AI assistant that specializes in document analysis. You respond only with JSON.",
+                prompt,
+                temperature=0.3,
+                text=prompt_text,
+                response_format={"type": "json_object"},
+                validate=parse
+            )
+            content = response["choices"][0]["message"]["content"]
+            data = parse(response)
+        except ValueError as e:
+            print(f"GROQ combined response rejected, falling back to separate calls: {str(e)}")
+            return self._analyze_separately(text, advanced, include_insights)
+        
+        results = {
+            "analysis": {
+                "model_used": model,
+                "is_advanced": advanced,
+                "analysis": format_combined_analysis(data),
+                "usage": response.get("usage", {}),
+                "cached": cached,
+                "combined": True
+            },
+            "entities": {
+                "model_used": model,
+                "is_advanced": advanced,
+                "entities": data["entities"],
+                "raw_response": content,
+                "usage": {},
+                "cached": cached,
+                "combined": True
+            },
+            "errors": {}
+        }
+        if include_insights:
+            results["insights"] = {
+                "model_used": model,
+                "is_advanced": advanced,
+                "insights": "\n".join(f"- {insight}" for insight in data["insights"]),
+                "usage": {},
+                "cached": cached,
+                "combined": True
+            }
+        
+        return results
+    
+    def _analyze_separately(self, text: str, advanced: bool, include_insights: bool) -> Dict[str, Any]:
+        """
+        Run the per-task calls concurrently, used when a combined response is rejected
+        
+        Runs on the chunk pool, since the caller already occupies a task pool thread.
+        """
+        tasks = {
+            'analysis': self.analyze_document,
+            'entities': self.extract_advanced_entities,
+        }
+        if include_insights:
+            tasks['insights'] = self.generate_insights
+        
+        executor = _get_chunk_executor()
+        futures = {name: executor.submit(task, text, advanced=advanced) for name, task in tasks.items()}
+        
+        results = {'errors': {}}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = None
+                results['errors'][name] = str(e)
+        
+        return results
+    
+    def submit_all(self, text: str, advanced: bool = False, include_insights: bool = False,
+                   timeout: Optional[float] = None, tasks: Optional[List[str]] = None) -> GroqTaskGroup:
+        """
+        Start analysis, entity extraction and insights concurrently
+        
+        Returns immediately so the caller can do other work (such as the local
+        spaCy stage) while the requests are in flight.
+        
+        Args:
+            text: Document text
+            advanced: Whether to use advanced models
+            include_insights: Whether to also generate insights
+            timeout: Per-call timeout in seconds (default: settings); a chunked
+                task gets one per round of chunk calls plus one for the reduce
+            tasks: Only run these of 'analysis', 'entities' and 'insights'
+                (default: all of them)
+            
+        Returns:
+            GroqTaskGroup: Handle to collect the results from
+        """
+        groq_settings = get_groq_settings()
+        chunked = groq_settings['CHUNKED_MODE'] and len(text) > groq_settings['CHUNK_CHARS']
+        timeout = timeout or groq_settings['CALL_TIMEOUT']
+        
+        names = {'analysis', 'entities'}
+        if include_insights:
+            names.add('insights')
+        if tasks is not None:
+            names &= set(tasks)
+        
+        # One completion for every task when the text fits in one prompt
+        if groq_settings['COMBINED_MODE'] and not chunked and {'analysis', 'entities'} <= names:
+            future = _get_executor().submit(self.analyze_combined, text, advanced, 'insights' in names)
+            return GroqTaskGroup({COMBINED_TASK: future}, timeout)
+        
+        # Long documents are analyzed chunk by chunk instead of truncated
+        if chunked:
+            task_methods = {
+                'analysis': self.analyze_document_chunked,
+                'entities': self.extract_advanced_entities_chunked,
+                'insights': self.generate_insights_chunked,
+            }
+        else:
+            task_methods = {
+                'analysis': self.analyze_document,
+                'entities': self.extract_advanced_entities,
+                'insights': self.generate_insights,
+            }
+        
+        cancel_event = threading.Event()
+        kwargs = {'advanced': advanced}
+        if chunked:
+            kwargs['cancel_event'] = cancel_event
+            # The chunk calls of every task share the chunk pool, then each
+            # task makes one reduce call
+            chunk_calls = len(self._chunks(text)) * len(names)
+            timeout *= math.ceil(chunk_calls / groq_settings['CHUNK_CONCURRENCY']) + 1
+        
+        executor = _get_executor()
+        futures = {
+            name: executor.submit(task, text, **kwargs)
+            for name, task in task_methods.items() if name in names
+        }
+        
+        return GroqTaskGroup(futures, timeout, cancel_event)
+    
+    def analyze_all(self, text: str, advanced: bool = False, include_insights: bool = False,
+                    timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Run analysis, entity extraction and insights concurrently and wait for them
+        
+        Args:
+            text: Document text
+            advanced: Whether to use advanced models
+            include_insights: Whether to also generate insights
+            timeout: Per-call timeout in seconds (default: settings)
+            
+        Returns:
+            dict: Result per task name (None if it failed) plus an "errors" dict
+        """
+        return self.submit_all(text, advanced, include_insights, timeout).result()
 
-def get_groq_processor(api_key=None):
+def get_groq_processor(api_key=None, base_url=None):
     """
     Factory function to get a GROQ processor instance
     
     Args:
         api_key (str, optional): GROQ API key
+        base_url (str, optional): OpenAI-compatible API base URL
         
     Returns:
         GroqProcessor: Configured GROQ processor instance
     """
-    return GroqProcessor(api_key=api_key) 
\ No newline at end of file
+    return GroqProcessor(api_key=api_key, base_url=base_url) 
\ No newline at end of file
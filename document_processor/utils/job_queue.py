@@ -0,0 +1,309 @@
+"""
+Database-backed job queue for running document processing outside the request
+"""
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction, connection, close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from document_processor.models import ProcessingJob
+from .document_processor import process_document
+
+DEFAULT_QUEUE_SETTINGS = {
+    'LEASE_SECONDS': 300,
+    'HEARTBEAT_SECONDS': 30,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_BACKOFF_SECONDS': 30,
+    'POLL_INTERVAL': 2.0,
+}
+
+def get_queue_settings():
+    """
+    Get job queue settings merged over the defaults
+
+    Returns:
+        dict: Queue settings
+    """
+    return {**DEFAULT_QUEUE_SETTINGS, **getattr(settings, 'JOB_QUEUE', {})}
+
+def get_worker_id():
+    """Identify the current worker process as host:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def enqueue_job(document, use_advanced=False, force=False):
+    """
+    Queue a document for background processing
+
+    A document only ever has one active job, so enqueuing a document that is
+    already queued or running returns the existing job.
+
+    Args:
+        document (Document): Document to process
+        use_advanced (bool): Whether to use advanced GROQ processing
+        force (bool): Rerun every stage instead of only those whose inputs changed
+
+    Returns:
+        ProcessingJob: The queued (or already active) job
+    """
+    with transaction.atomic():
+        job = ProcessingJob.objects.filter(
+            document=document,
+            status__in=('queued', 'running')
+        ).first()
+
+        if job:
+            # Honour the latest processing options while the job is still waiting;
+            # a forced run stays forced
+            if job.status == 'queued' and (job.use_advanced != use_advanced or force and not job.force):
+                job.use_advanced = use_advanced
+                job.force = job.force or force
+                job.save(update_fields=['use_advanced', 'force'])
+            return job
+
+        return ProcessingJob.objects.create(
+            document=document,
+            use_advanced=use_advanced,
+            force=force,
+            max_attempts=get_queue_settings()['MAX_ATTEMPTS'],
+        )
+
+def requeue_expired_jobs():
+    """
+    Release jobs whose worker stopped heartbeating
+
+    Jobs with attempts left go back to the queue, the rest are marked failed.
+
+    Returns:
+        int: Number of expired jobs released
+    """
+    now = timezone.now()
+    expired = ProcessingJob.objects.filter(status='running', lease_expires_at__lt=now)
+
+    failed = expired.filter(attempts__gte=F('max_attempts')).update(
+        status='failed',
+        last_error='Worker lease expired',
+        worker_id=None,
+        lease_expires_at=None,
+        finished_at=now,
+    )
+    requeued = expired.filter(attempts__lt=F('max_attempts')).update(
+        status='queued',
+        last_error='Worker lease expired',
+        worker_id=None,
+        lease_expires_at=None,
+        run_after=now,
+    )
+    return failed + requeued
+
+def claim_next_job(worker_id, lease_seconds=None):
+    """
+    Claim the next runnable job for a worker
+
+    Claiming is a conditional UPDATE on the job row, so two workers racing for
+    the same job cannot both win, on SQLite as well as MySQL.
+
+    Args:
+        worker_id (str): Identifier of the claiming worker
+        lease_seconds (int, optional): Lease length before the job is considered abandoned
+
+    Returns:
+        ProcessingJob: The claimed job, or None if the queue is empty
+    """
+    if lease_seconds is None:
+        lease_seconds = get_queue_settings()['LEASE_SECONDS']
+
+    requeue_expired_jobs()
+
+    now = timezone.now()
+    candidates = ProcessingJob.objects.filter(
+        status='queued',
+        run_after__lte=now
+    ).order_by('run_after', 'created_at').values_list('pk', flat=True)[:10]
+
+    for pk in list(candidates):
+        claimed = ProcessingJob.objects.filter(pk=pk, status='queued').update(
+            status='running',
+            worker_id=worker_id,
+            attempts=F('attempts') + 1,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            heartbeat_at=now,
+            started_at=now,
+        )
+        if claimed:
+            return ProcessingJob.objects.select_related('document').get(pk=pk)
+
+    return None
+
+def heartbeat(job, lease_seconds=None):
+    """
+    Extend the lease of a running job
+
+    Args:
+        job (ProcessingJob): Job held by the current worker
+        lease_seconds (int, optional): New lease length
+
+    Returns:
+        bool: False if the lease was lost to another worker
+    """
+    if lease_seconds is None:
+        lease_seconds = get_queue_settings()['LEASE_SECONDS']
+
+    now = timezone.now()
+    return ProcessingJob.objects.filter(
+        pk=job.pk,
+        status='running',
+        worker_id=job.worker_id
+    ).update(
+        heartbeat_at=now,
+        lease_expires_at=now + timedelta(seconds=lease_seconds),
+    ) == 1
+
+def complete_job(job):
+    """Mark a job as completed"""
+    ProcessingJob.objects.filter(pk=job.pk, worker_id=job.worker_id).update(
+        status='completed',
+        last_error=None,
+        worker_id=None,
+        lease_expires_at=None,
+        finished_at=timezone.now(),
+    )
+
+def fail_job(job, error_message):
+    """
+    Record a failed attempt, retrying with exponential backoff while attempts remain
+
+    Args:
+        job (ProcessingJob): Job that failed
+        error_message (str): Error to store on the job
+
+    Returns:
+        str: The new job status ('queued' or 'failed')
+    """
+    now = timezone.now()
+
+    if job.attempts < job.max_attempts:
+        backoff = get_queue_settings()['RETRY_BACKOFF_SECONDS'] * (2 ** max(job.attempts - 1, 0))
+        status = 'queued'
+        updates = {'run_after': now + timedelta(seconds=backoff)}
+    else:
+        status = 'failed'
+        updates = {'finished_at': now}
+
+    ProcessingJob.objects.filter(pk=job.pk, worker_id=job.worker_id).update(
+        status=status,
+        last_error=error_message,
+        worker_id=None,
+        lease_expires_at=None,
+        **updates
+    )
+    return status
+
+class JobHeartbeat:
+    """
+    Context manager that keeps a job's lease alive from a background thread
+    while the job runs
+    """
+
+    def __init__(self, job, interval=None, lease_seconds=None):
+        """
+        Initialize heartbeat
+
+        Args:
+            job (ProcessingJob): Job held by the current worker
+            interval (float, optional): Seconds between heartbeats
+            lease_seconds (int, optional): Lease length set on every heartbeat
+        """
+        queue_settings = get_queue_settings()
+        self.job = job
+        self.interval = interval or queue_settings['HEARTBEAT_SECONDS']
+        self.lease_seconds = lease_seconds or queue_settings['LEASE_SECONDS']
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    if not heartbeat(self.job, self.lease_seconds):
+                        print(f"Lost lease on job {self.job.pk}")
+                        return
+                except Exception as e:
+                    print(f"Heartbeat error for job {self.job.pk}: {str(e)}")
+        finally:
+            # Threads get their own database connection
+            connection.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+def run_job(job):
+    """
+    Run a claimed job to completion
+
+    Args:
+        job (ProcessingJob): Job claimed by the current worker
+
+    Returns:
+        str: Final job status ('completed', 'queued' for a retry, or 'failed')
+    """
+    try:
+        with JobHeartbeat(job):
+            process_document(job.document_id, use_advanced=job.use_advanced, force=job.force)
+    except Exception as e:
+        print(f"Job {job.pk} failed: {str(e)}")
+        print(f"Stack trace: {traceback.format_exc()}")
+        return fail_job(job, str(e))
+
+    complete_job(job)
+    return 'completed'
+
+def run_worker(worker_id=None, stop_event=None, max_jobs=None, once=False, poll_interval=None):
+    """
+    Consume jobs from the queue until stopped
+
+    Args:
+        worker_id (str, optional): Identifier for this worker
+        stop_event (threading.Event, optional): Set to stop after the current job
+        max_jobs (int, optional): Stop after running this many jobs
+        once (bool): Stop as soon as the queue is empty
+        poll_interval (float, optional): Seconds to sleep when the queue is empty
+
+    Returns:
+        int: Number of jobs run
+    """
+    worker_id = worker_id or get_worker_id()
+    stop_event = stop_event or threading.Event()
+    if poll_interval is None:
+        poll_interval = get_queue_settings()['POLL_INTERVAL']
+
+    jobs_run = 0
+    while not stop_event.is_set():
+        if max_jobs is not None and jobs_run >= max_jobs:
+            break
+
+        close_old_connections()
+        job = claim_next_job(worker_id)
+
+        if job is None:
+            if once:
+                break
+            stop_event.wait(poll_interval)
+            continue
+
+        started = time.time()
+        status = run_job(job)
+        jobs_run += 1
+        print(f"[{worker_id}] Job {job.pk} {status} in {time.time() - started:.2f}s")
+
+    return jobs_run
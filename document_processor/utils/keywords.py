@@ -0,0 +1,241 @@
+"""
+Corpus-wide TF-IDF keywords backed by a persistent document-frequency index
+"""
+from collections import Counter, defaultdict
+import numpy as np
+from django.db import transaction
+from django.db.models import F
+from document_processor.models import KeywordCorpus, KeywordTerm
+from .nlp import get_nlp_settings
+
+# Terms per query when reading or updating document frequencies, below
+# SQLite's limit on query parameters
+TERM_BATCH_SIZE = 500
+
+# Longer terms (e.g. runs of digits) are scored but not indexed
+MAX_TERM_LENGTH = KeywordTerm._meta.get_field('term').max_length
+
+def tfidf_scores(counts, document_frequencies, document_count):
+    """
+    Score terms by TF-IDF
+
+    Term frequencies are normalised by the document length and the inverse
+    document frequency is smoothed, idf = ln((1 + N) / (1 + df)) + 1, so terms
+    found in every document still score above zero.
+
+    Args:
+        counts (array-like): Occurrences of each term in the document
+        document_frequencies (array-like): Documents containing each term
+        document_count (int): Documents in the corpus
+
+    Returns:
+        ndarray: Score of each term
+    """
+    counts = np.asarray(counts, dtype=float)
+    document_frequencies = np.asarray(document_frequencies, dtype=float)
+    if not counts.size:
+        return counts
+    idf = np.log((1.0 + document_count) / (1.0 + document_frequencies)) + 1.0
+    return counts / counts.sum() * idf
+
+class KeywordIndex:
+    """
+    Document frequencies of the terms of one language
+
+    Each processed document counts once for every distinct term in it. The
+    counts are updated with F() expressions, so concurrent workers can index
+    documents at the same time.
+    """
+
+    def __init__(self, language):
+        """
+        Initialize index
+
+        Args:
+            language (str): Language code
+        """
+        self.language = language
+
+    def document_count(self):
+        """Number of documents counted in the index"""
+        corpus = KeywordCorpus.objects.filter(language=self.language).first()
+        return corpus.document_count if corpus else 0
+
+    def document_frequencies(self, terms):
+        """
+        Get the document frequency of terms
+
+        Args:
+            terms (list): Terms
+
+        Returns:
+            ndarray: Documents containing each term, in the order of terms
+        """
+        found = {}
+        indexed = [term for term in terms if len(term) <= MAX_TERM_LENGTH]
+        for i in range(0, len(indexed), TERM_BATCH_SIZE):
+            found.update(KeywordTerm.objects.filter(
+                language=self.language, term__in=indexed[i:i + TERM_BATCH_SIZE]
+            ).values_list('term', 'document_count'))
+        return np.array([found.get(term, 0) for term in terms], dtype=float)
+
+    def top_keywords(self, counts, num_keywords=10, previous=None):
+        """
+        Get a document's highest scoring keywords
+
+        The document is scored as a member of the corpus: its own terms are
+        counted even if the index has not been updated with them yet.
+
+        Args:
+            counts (dict): Occurrences of each term in the document
+            num_keywords (int): Number of keywords to return
+            previous (dict, optional): Terms the index currently counts for the document
+
+        Returns:
+            list: (term, score) tuples, best first
+        """
+        terms = list(counts)
+        if not terms:
+            return []
+
+        document_frequencies = self.document_frequencies(terms)
+        document_count = self.document_count()
+        if previous is None:
+            document_count += 1
+            document_frequencies += 1
+        else:
+            document_frequencies += [term not in previous for term in terms]
+
+        scores = tfidf_scores([counts[term] for term in terms], document_frequencies, document_count)
+        # Stable sort, so ties keep the order the terms first appeared in
+        best = np.argsort(-scores, kind='stable')[:num_keywords]
+        return [(terms[i], round(float(scores[i]), 6)) for i in best]
+
+    def add(self, term_changes, document_change=0):
+        """
+        Change the document counts of terms
+
+        Args:
+            term_changes (dict): Change in document count per term
+            document_change (int): Change in the number of documents
+        """
+        changes = defaultdict(list)
+        for term, change in term_changes.items():
+            if change and len(term) <= MAX_TERM_LENGTH:
+                changes[change].append(term)
+
+        with transaction.atomic():
+            if document_change:
+                KeywordCorpus.objects.get_or_create(language=self.language)
+                KeywordCorpus.objects.filter(language=self.language).update(
+                    document_count=F('document_count') + document_change
+                )
+
+            new_terms = [term for change, terms in changes.items() if change > 0 for term in terms]
+            KeywordTerm.objects.bulk_create(
+                [KeywordTerm(language=self.language, term=term) for term in new_terms],
+                batch_size=TERM_BATCH_SIZE,
+                ignore_conflicts=True
+            )
+
+            # One UPDATE per distinct change and batch of terms
+            for change, terms in changes.items():
+                for i in range(0, len(terms), TERM_BATCH_SIZE):
+                    KeywordTerm.objects.filter(
+                        language=self.language, term__in=terms[i:i + TERM_BATCH_SIZE]
+                    ).update(document_count=F('document_count') + change)
+
+            if any(change < 0 for change in changes):
+                KeywordTerm.objects.filter(language=self.language, document_count__lte=0).delete()
+
+    def update_document(self, terms, previous=None):
+        """
+        Count a document's terms, replacing the terms counted for it before
+
+        Args:
+            terms (iterable): Terms of the document, or None if it was removed
+            previous (iterable, optional): Terms counted for the document before
+        """
+        terms = set(terms or ())
+        previous = set(previous or ())
+        term_changes = {term: 1 for term in terms - previous}
+        term_changes.update({term: -1 for term in previous - terms})
+
+        # A document is counted while it has a stored term set
+        document_change = 0
+        if terms and not previous:
+            document_change = 1
+        elif previous and not terms:
+            document_change = -1
+
+        self.add(term_changes, document_change)
+
+    def rebuild(self, term_sets):
+        """
+        Replace the index with the counts of a set of documents
+
+        Args:
+            term_sets (iterable): Terms of each document in the corpus
+        """
+        document_frequencies = Counter()
+        document_count = 0
+        for terms in term_sets:
+            document_frequencies.update(set(terms))
+            document_count += 1
+
+        with transaction.atomic():
+            KeywordTerm.objects.filter(language=self.language).delete()
+            KeywordCorpus.objects.update_or_create(
+                language=self.language, defaults={'document_count': document_count}
+            )
+            KeywordTerm.objects.bulk_create(
+                [
+                    KeywordTerm(language=self.language, term=term, document_count=count)
+                    for term, count in document_frequencies.items()
+                    if len(term) <= MAX_TERM_LENGTH
+                ],
+                batch_size=TERM_BATCH_SIZE
+            )
+
+def get_keyword_index(language=None):
+    """
+    Factory function to get the keyword index of a language
+
+    Args:
+        language (str, optional): Language code
+
+    Returns:
+        KeywordIndex: Keyword index
+    """
+    return KeywordIndex(language or 'en')
+
+def top_keywords(counts, language, num_keywords=10, previous=None):
+    """
+    Pick a document's keywords with the configured scoring
+
+    With NLP_SETTINGS['KEYWORD_SCORING'] = 'tfidf' terms are weighted by how
+    rare they are in the corpus; with 'frequency' the most frequent terms win.
+
+    Args:
+        counts (dict): Occurrences of each term in the document
+        language (str): Document language
+        num_keywords (int): Number of keywords to return
+        previous (dict, optional): Terms the index currently counts for the document
+
+    Returns:
+        list: (term, score) tuples, best first; the score is the count for 'frequency'
+    """
+    if get_nlp_settings()['KEYWORD_SCORING'] == 'frequency':
+        return Counter(counts).most_common(num_keywords)
+    return get_keyword_index(language).top_keywords(counts, num_keywords, previous)
+
+def remove_document_terms(document):
+    """
+    Take a document's terms out of the keyword index, e.g. before deleting it
+
+    Args:
+        document (Document): Document
+    """
+    stage = document.stages.filter(name='terms').first()
+    if stage and stage.output:
+        get_keyword_index(document.language).update_document(None, stage.output)
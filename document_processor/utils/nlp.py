@@ -2,13 +2,15 @@
 NLP utilities for text processing, entity recognition, and analysis
 """
 import re
+import threading
+from functools import cached_property
 import nltk
 import spacy
-from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from nltk.sentiment import SentimentIntensityAnalyzer
 from collections import Counter
 from django.conf import settings
+from .summarizer import summarize
 
 # Ensure NLTK data is available
 try:
@@ -19,50 +21,691 @@ except LookupError:
     nltk.download('stopwords')
     nltk.download('vader_lexicon')
 
+# spaCy pipelines per document language; languages without an installed
+# pipeline fall back to English
+SPACY_MODELS = {
+    'en': 'en_core_web_sm',
+    'fr': 'fr_core_news_sm',
+    'es': 'es_core_news_sm',
+    'de': 'de_core_news_sm',
+    'it': 'it_core_news_sm',
+    'pt': 'pt_core_news_sm',
+    'ru': 'ru_core_news_sm',
+    'zh': 'zh_core_web_sm',
+    'ja': 'ja_core_news_sm',
+    'ko': 'ko_core_news_sm',
+}
+
+# NLTK stopword lists per document language
+STOPWORD_LANGUAGES = {
+    'en': 'english',
+    'fr': 'french',
+    'es': 'spanish',
+    'de': 'german',
+    'it': 'italian',
+    'pt': 'portuguese',
+    'ru': 'russian',
+    'zh': 'chinese',
+    'ar': 'arabic',
+}
+
+DEFAULT_LANGUAGE = 'en'
+
+# Named pipeline profiles: the components kept when a pipeline is loaded for a
+# profile (None keeps every component the model enables by default)
+FULL_PROFILE = 'full'
+PIPELINE_PROFILES = {
+    FULL_PROFILE: None,
+    'ner': ['ner'],
+    # The statistical sentence segmenter, much cheaper than the parser
+    'sentences': ['senter'],
+    'ner_sentences': ['ner', 'senter'],
+}
+
+DEFAULT_NLP_SETTINGS = {
+    'WARMUP_LANGUAGES': [DEFAULT_LANGUAGE],
+    'SPACY_MODELS': {},
+    'BATCH_SIZE': 50,
+    'N_PROCESS': 1,
+    # Profile parsing the text for each analysis stage
+    'STAGE_PROFILES': {
+        'entities': 'ner',
+        'sentences': 'sentences',
+        'keywords': 'sentences',
+    },
+    # Profile used by analyze_many, which computes every stage
+    'BATCH_PROFILE': 'ner_sentences',
+    # Longer texts are parsed in chunks, well below spaCy's max_length
+    'CHUNK_CHARS': 100000,
+    'CHUNK_OVERLAP': 200,  # Characters of right context parsed after each chunk
+    'CHUNK_BATCH_SIZE': 4,  # Chunks parsed, and held in memory, at a time
+    # 'tfidf' weights keywords by their rarity in the corpus, 'frequency' by count only
+    'KEYWORD_SCORING': 'tfidf',
+    # Summary method: 'matrix', 'textrank' or the original 'keywords' scan
+    'SUMMARIZER': 'matrix',
+}
+
+# Places a chunk may end, best first: page or paragraph break, sentence end,
+# line break, any whitespace
+CHUNK_BOUNDARY_PATTERNS = [
+    re.compile(r'\n\s*\n\s*'),
+    re.compile(r'[.!?]["\')\]]?\s+'),
+    re.compile(r'\n\s*'),
+    re.compile(r'\s+'),
+]
+
+def get_nlp_settings():
+    """
+    Get NLP settings merged over the defaults
+    
+    Returns:
+        dict: NLP settings
+    """
+    return {**DEFAULT_NLP_SETTINGS, **getattr(settings, 'NLP_SETTINGS', {})}
+
+def iter_text_chunks(text, max_chars, overlap=0):
+    """
+    Split a long text into chunks for parsing, keeping their offsets
+    
+    Each chunk owns the span from its start to its end (the next chunk starts
+    there) and ends on the best boundary in the second half of its window.
+    It is parsed with up to overlap characters of the following text as
+    right context, so sentences and entities crossing the end are seen whole.
+    
+    Args:
+        text (str): Document text
+        max_chars (int): Maximum characters a chunk owns
+        overlap (int): Characters of right context added to each chunk
+        
+    Yields:
+        tuple: (start, end, context_end) character offsets into text
+    """
+    start = 0
+    length = len(text)
+    while start < length:
+        end = length
+        if length - start > max_chars:
+            end = start + max_chars
+            window_start = start + max_chars // 2
+            for pattern in CHUNK_BOUNDARY_PATTERNS:
+                matches = list(pattern.finditer(text, window_start, start + max_chars))
+                if matches:
+                    end = matches[-1].end()
+                    break
+        
+        context_end = min(end + overlap, length)
+        if context_end < length:
+            # Do not cut the right context mid-word
+            cut = text.rfind(' ', end, context_end)
+            context_end = cut if cut > end else context_end
+        
+        yield start, end, context_end
+        start = end
+
+def profile_covers(profile, wanted):
+    """
+    Check whether a parse made with one profile has everything another needs
+    
+    Args:
+        profile (str): Profile the parse was made with
+        wanted (str): Profile a stage asks for
+        
+    Returns:
+        bool: True if the parse can be used in place of one made with wanted
+    """
+    if profile == FULL_PROFILE:
+        return True
+    if wanted == FULL_PROFILE:
+        return False
+    return set(PIPELINE_PROFILES[wanted]) <= set(PIPELINE_PROFILES[profile])
+
+def apply_pipeline_profile(nlp, profile):
+    """
+    Strip a freshly loaded pipeline down to the components of a profile
+    
+    Components the kept ones listen to, such as a shared tok2vec, are kept as
+    well. Models without a trained sentence segmenter get the rule-based
+    sentencizer instead.
+    
+    Args:
+        nlp (Language): Pipeline loaded for this profile only
+        profile (str): Profile name
+        
+    Returns:
+        Language: The same pipeline, modified in place
+    """
+    components = PIPELINE_PROFILES[profile]
+    if components is None:
+        return nlp
+    
+    wanted = set(components)
+    if 'senter' in wanted and 'senter' not in nlp.component_names:
+        wanted.discard('senter')
+        wanted.add('sentencizer')
+        if 'sentencizer' not in nlp.component_names:
+            nlp.add_pipe('sentencizer', first=True)
+    
+    for name in nlp.component_names:
+        listeners = getattr(nlp.get_pipe(name), 'listening_components', None) or []
+        if wanted & set(listeners):
+            wanted.add(name)
+    
+    for name in list(nlp.component_names):
+        if name not in wanted:
+            nlp.remove_pipe(name)
+    for name in list(nlp.disabled):
+        nlp.enable_pipe(name)
+    
+    return nlp
+
+class ModelRegistry:
+    """
+    Process-wide registry of loaded NLP resources
+    
+    spaCy pipelines, stopword sets and the VADER analyzer are loaded once per
+    process and shared by every NLPProcessor. Loads are guarded by a lock per
+    resource so concurrent threads never load the same model twice.
+    """
+    
+    def __init__(self):
+        self._resources = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.load_counts = Counter()
+        self.warm_hits = Counter()
+        self.cold_hits = Counter()
+    
+    def _get(self, key, loader):
+        """Return the cached resource for key, loading it on first use"""
+        resource = self._resources.get(key)
+        if resource is not None:
+            self.warm_hits[key] += 1
+            return resource
+        
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        
+        with key_lock:
+            # Another thread may have finished loading while we waited
+            resource = self._resources.get(key)
+            if resource is not None:
+                self.warm_hits[key] += 1
+                return resource
+            
+            resource = loader()
+            self._resources[key] = resource
+            self.load_counts[key] += 1
+            self.cold_hits[key] += 1
+            return resource
+    
+    def model_name(self, language):
+        """
+        Get the name of the spaCy pipeline used for a language
+        
+        Args:
+            language (str): Language code
+            
+        Returns:
+            str: spaCy model name
+        """
+        models = {**SPACY_MODELS, **get_nlp_settings()['SPACY_MODELS']}
+        return models.get(language, models[DEFAULT_LANGUAGE])
+    
+    def _load_spacy(self, language, profile=FULL_PROFILE):
+        model_name = self.model_name(language)
+        try:
+            nlp = spacy.load(model_name)
+        except OSError:
+            if language == DEFAULT_LANGUAGE:
+                raise
+            print(f"spaCy model '{model_name}' not installed, falling back to English")
+            return self.get_spacy(DEFAULT_LANGUAGE, profile)
+        return apply_pipeline_profile(nlp, profile)
+    
+    def get_spacy(self, language=DEFAULT_LANGUAGE, profile=FULL_PROFILE):
+        """
+        Get the shared spaCy pipeline for a language
+        
+        Each profile gets its own copy of the model, loaded on first use and
+        stripped down to the profile's components.
+        
+        Args:
+            language (str): Language code
+            profile (str): Pipeline profile name
+            
+        Returns:
+            Language: Loaded spaCy pipeline
+        """
+        if profile not in PIPELINE_PROFILES:
+            raise ValueError(f"Unknown pipeline profile: {profile}")
+        key = ('spacy', language) if profile == FULL_PROFILE else ('spacy', language, profile)
+        return self._get(key, lambda: self._load_spacy(language, profile))
+    
+    def get_stopwords(self, language=DEFAULT_LANGUAGE):
+        """
+        Get the shared stopword set for a language
+        
+        Args:
+            language (str): Language code
+            
+        Returns:
+            frozenset: Stopwords
+        """
+        stopword_language = STOPWORD_LANGUAGES.get(language, STOPWORD_LANGUAGES[DEFAULT_LANGUAGE])
+        return self._get(('stopwords', stopword_language),
+                         lambda: frozenset(stopwords.words(stopword_language)))
+    
+    def get_sentiment_analyzer(self):
+        """
+        Get the shared VADER sentiment analyzer
+        
+        Returns:
+            SentimentIntensityAnalyzer: Analyzer with the lexicon loaded
+        """
+        return self._get(('vader',), SentimentIntensityAnalyzer)
+    
+    def warm_up(self, languages=None):
+        """
+        Load resources ahead of the first document, e.g. when a worker starts
+        
+        Args:
+            languages (list, optional): Language codes to load (default: settings)
+        """
+        nlp_settings = get_nlp_settings()
+        if languages is None:
+            languages = nlp_settings['WARMUP_LANGUAGES']
+        
+        profiles = set(nlp_settings['STAGE_PROFILES'].values())
+        for language in languages:
+            for profile in sorted(profiles):
+                self.get_spacy(language, profile)
+            self.get_stopwords(language)
+        self.get_sentiment_analyzer()
+    
+    def stats(self):
+        """
+        Get load counts and warm/cold hit metrics
+        
+        Returns:
+            dict: Metrics keyed by resource name
+        """
+        keys = set(self.load_counts) | set(self.warm_hits)
+        return {
+            ':'.join(key): {
+                'loads': self.load_counts[key],
+                'cold_hits': self.cold_hits[key],
+                'warm_hits': self.warm_hits[key],
+            }
+            for key in sorted(keys)
+        }
+    
+    def clear(self):
+        """Drop all loaded resources and reset metrics"""
+        with self._lock:
+            self._resources.clear()
+            self._locks.clear()
+            self.load_counts.clear()
+            self.warm_hits.clear()
+            self.cold_hits.clear()
+
+# Shared by every processor in this process
+model_registry = ModelRegistry()
+
+class DocumentAnalysis:
+    """
+    Analysis context for a single document text
+    
+    Each stage parses the text with the pipeline profile it needs (e.g. NER
+    only for entities), and a parse is reused by every stage whose profile it
+    covers; entities, keywords, sentences, sentiment and the summary are
+    computed on first access and cached on the context.
+    
+    Texts longer than the CHUNK_CHARS setting are never parsed whole: each
+    stage streams the text through spaCy chunk by chunk, so memory stays flat
+    however long the document is.
+    """
+    
+    def __init__(self, processor, text, doc=None, profile=FULL_PROFILE):
+        """
+        Initialize analysis context
+        
+        Args:
+            processor (NLPProcessor): Processor providing the shared models
+            text (str): Document text
+            doc (Doc, optional): spaCy parse of the text, if already made
+            profile (str): Pipeline profile doc was made with
+        """
+        self.processor = processor
+        self.text = text
+        self._docs = {}
+        if doc is not None:
+            self._docs[profile] = doc
+    
+    def parse(self, profile):
+        """
+        Get a parse of the text made with (at least) a pipeline profile
+        
+        Args:
+            profile (str): Pipeline profile name
+            
+        Returns:
+            Doc: spaCy parse of the text
+        """
+        for made, doc in self._docs.items():
+            if profile_covers(made, profile):
+                return doc
+        
+        # Profiles may share a pipeline, e.g. after a fallback to English
+        nlp = self.processor.get_pipeline(profile)
+        for made, doc in self._docs.items():
+            if self.processor.get_pipeline(made) is nlp:
+                return doc
+        
+        doc = nlp(self.text)
+        self._docs[profile] = doc
+        return doc
+    
+    def _stage_profile(self, stage):
+        return self.processor.stage_profiles.get(stage, FULL_PROFILE)
+    
+    def _stage_doc(self, stage):
+        return self.parse(self._stage_profile(stage))
+    
+    @cached_property
+    def is_chunked(self):
+        """Whether the text is too long to be parsed in one piece"""
+        return not self._docs and len(self.text) > get_nlp_settings()['CHUNK_CHARS']
+    
+    def iter_chunks(self, profile):
+        """
+        Parse the text chunk by chunk
+        
+        Chunks are parsed lazily in small batches, and each parse can be
+        released once the caller moves on to the next.
+        
+        Args:
+            profile (str): Pipeline profile name
+            
+        Yields:
+            tuple: (doc, offset, length), the parse of a chunk with its right
+                context, the chunk's offset in the text and the number of
+                characters it owns
+        """
+        nlp_settings = get_nlp_settings()
+        spans = iter_text_chunks(self.text, nlp_settings['CHUNK_CHARS'], nlp_settings['CHUNK_OVERLAP'])
+        docs = self.processor.get_pipeline(profile).pipe(
+            ((self.text[start:context_end], (start, end - start)) for start, end, context_end in spans),
+            batch_size=nlp_settings['CHUNK_BATCH_SIZE'],
+            as_tuples=True
+        )
+        for doc, (offset, length) in docs:
+            yield doc, offset, length
+    
+    def _entity(self, ent, offset=0):
+        return {
+            'text': ent.text,
+            'entity_type': self.processor._map_entity_type(ent.label_),
+            'confidence_score': 1.0,  # spaCy doesn't provide confidence scores by default
+            'position_start': offset + ent.start_char,
+            'position_end': offset + ent.end_char
+        }
+    
+    def _chunked_entities(self):
+        entities = []
+        last_end = 0
+        
+        for doc, offset, length in self.iter_chunks(self._stage_profile('entities')):
+            for ent in doc.ents:
+                if ent.start_char >= length:
+                    break  # In the right context, owned by the next chunk
+                if offset + ent.start_char < last_end:
+                    continue  # Rest of an entity already taken whole from the previous chunk
+                entities.append(self._entity(ent, offset))
+                last_end = offset + ent.end_char
+        
+        return entities
+    
+    @property
+    def doc(self):
+        """The full spaCy parse of the text"""
+        return self.parse(FULL_PROFILE)
+    
+    @cached_property
+    def entities(self):
+        """List of entity dictionaries with entity text, type, etc."""
+        if self.is_chunked:
+            return self._chunked_entities()
+        
+        return [self._entity(ent) for ent in self._stage_doc('entities').ents]
+    
+    def _term(self, token):
+        """Keyword candidate of a token, or None"""
+        if token.is_punct or token.is_space:
+            return None
+        # Same cleanup the keyword extractor has always applied
+        word = re.sub(r'[^\w]', '', token.lower_)
+        if len(word) > 2 and word not in self.processor.stop_words:
+            return word
+        return None
+    
+    @cached_property
+    def _sentence_index(self):
+        """Sentence strings and the keyword candidates of each, from one pass"""
+        sentences = []
+        sentence_terms = []
+        
+        if self.is_chunked:
+            chunks = self.iter_chunks(self._stage_profile('sentences'))
+        else:
+            chunks = [(self._stage_doc('sentences'), 0, len(self.text))]
+        
+        for doc, offset, length in chunks:
+            for sent in doc.sents:
+                if sent.start_char >= length:
+                    break
+                text = doc.text[sent.start_char:min(sent.end_char, length)]
+                if self.is_chunked:
+                    # Chunks end on sentence boundaries where possible
+                    text = text.rstrip()
+                    if not text:
+                        continue
+                sentences.append(text)
+                
+                terms = []
+                for token in sent:
+                    if token.idx >= length:
+                        break
+                    term = self._term(token)
+                    if term:
+                        terms.append(term)
+                sentence_terms.append(terms)
+        
+        return sentences, sentence_terms
+    
+    @property
+    def sentences(self):
+        """List of sentence strings"""
+        return self._sentence_index[0]
+    
+    @property
+    def sentence_terms(self):
+        """Keyword candidates of each sentence"""
+        return self._sentence_index[1]
+    
+    @cached_property
+    def keyword_counts(self):
+        """Counter of keyword candidates taken from the parsed tokens"""
+        counts = Counter()
+        
+        if self.is_chunked:
+            chunks = self.iter_chunks(self._stage_profile('keywords'))
+        else:
+            chunks = [(self._stage_doc('keywords'), 0, len(self.text))]
+        
+        for doc, offset, length in chunks:
+            for token in doc:
+                if token.idx >= length:
+                    break
+                term = self._term(token)
+                if term:
+                    counts[term] += 1
+        
+        return counts
+    
+    def keywords(self, num_keywords=10):
+        """
+        Get the most frequent keywords
+        
+        Args:
+            num_keywords (int): Number of keywords to return
+            
+        Returns:
+            list: List of keyword tuples (word, count)
+        """
+        return self.keyword_counts.most_common(num_keywords)
+    
+    @cached_property
+    def sentiment(self):
+        """Sentiment score (-1 to 1, where -1 is negative, 1 is positive)"""
+        return self.processor.sia.polarity_scores(self.text)['compound']
+    
+    def summary(self, num_sentences=3, method=None):
+        """
+        Generate an extractive summary from the parsed sentences
+        
+        Args:
+            num_sentences (int): Number of sentences for the summary
+            method (str, optional): Summary method (default: settings)
+            
+        Returns:
+            str: Summarized text
+        """
+        sentences = self.sentences
+        
+        if len(sentences) <= num_sentences:
+            return self.text
+        
+        # Get keywords to score sentences
+        keywords = [kw[0] for kw in self.keywords(20)]
+        
+        return summarize(
+            sentences, self.sentence_terms, keywords, num_sentences,
+            method or get_nlp_settings()['SUMMARIZER']
+        )
+
 class NLPProcessor:
     """
     Utility class for text processing, entity recognition, and analysis
     """
     
-    def __init__(self, language='en'):
+    def __init__(self, language='en', registry=None):
         """
         Initialize NLP processor
         
         Args:
             language (str): Language code (default: 'en')
+            registry (ModelRegistry, optional): Registry to take shared models from
         """
         self.language = language
-        self.nlp = spacy.load('en_core_web_sm')  # Load spaCy model
-        self.stop_words = set(stopwords.words('english'))
-        self.sia = SentimentIntensityAnalyzer()
+        self.registry = registry or model_registry
+        self.stop_words = self.registry.get_stopwords(language)
+        self.sia = self.registry.get_sentiment_analyzer()
     
-    def extract_entities(self, text):
+    @cached_property
+    def nlp(self):
+        """The full spaCy pipeline for the processor's language"""
+        return self.get_pipeline(FULL_PROFILE)
+    
+    @cached_property
+    def stage_profiles(self):
+        """Pipeline profile used by each analysis stage"""
+        return get_nlp_settings()['STAGE_PROFILES']
+    
+    def get_pipeline(self, profile):
         """
-        Extract named entities from text
+        Get the spaCy pipeline of a profile for the processor's language
+        
+        Args:
+            profile (str): Pipeline profile name
+            
+        Returns:
+            Language: Loaded spaCy pipeline
+        """
+        return self.registry.get_spacy(self.language, profile)
+    
+    def analyze(self, text):
+        """
+        Create an analysis context that shares one parse across all results
         
         Args:
             text (str): Input text
             
         Returns:
-            list: List of entity dictionaries with entity text, type, etc.
+            DocumentAnalysis: Lazily evaluated analysis of the text
         """
-        entities = []
-        doc = self.nlp(text)
+        return DocumentAnalysis(self, text)
+    
+    def analyze_many(self, texts, batch_size=None, n_process=None, as_tuples=False, profile=None):
+        """
+        Analyze a stream of texts, parsing them in batches with nlp.pipe
         
-        for ent in doc.ents:
-            entity_type = self._map_entity_type(ent.label_)
-            start_pos = ent.start_char
-            end_pos = ent.end_char
+        Texts are consumed lazily, so a large backlog never has to be held in
+        memory at once. With n_process > 1 spaCy parses batches in worker
+        processes. Texts longer than the CHUNK_CHARS setting are not batched;
+        their analyses parse them chunk by chunk when first used.
+        
+        Args:
+            texts (iterable): Input texts, or (text, context) tuples if as_tuples
+            batch_size (int, optional): Texts parsed per batch (default: settings)
+            n_process (int, optional): Parsing processes (default: settings)
+            as_tuples (bool): Pass a context object through with each text
+            profile (str, optional): Pipeline profile to parse with (default: settings)
             
-            entities.append({
-                'text': ent.text,
-                'entity_type': entity_type,
-                'confidence_score': 1.0,  # spaCy doesn't provide confidence scores by default
-                'position_start': start_pos,
-                'position_end': end_pos
-            })
+        Yields:
+            DocumentAnalysis: Analysis of each text in order, or
+                (DocumentAnalysis, context) tuples if as_tuples
+        """
+        nlp_settings = get_nlp_settings()
+        profile = profile or nlp_settings['BATCH_PROFILE']
+        chunk_chars = nlp_settings['CHUNK_CHARS']
         
-        return entities
+        def batchable(items):
+            # Long texts go through the pipe empty and travel in the context
+            for item in items:
+                text, context = item if as_tuples else (item, None)
+                if len(text) > chunk_chars:
+                    yield '', (text, context)
+                else:
+                    yield text, (None, context)
+        
+        docs = self.get_pipeline(profile).pipe(
+            batchable(texts),
+            batch_size=batch_size or nlp_settings['BATCH_SIZE'],
+            n_process=n_process or nlp_settings['N_PROCESS'],
+            as_tuples=True
+        )
+        
+        for doc, (long_text, context) in docs:
+            if long_text is not None:
+                analysis = DocumentAnalysis(self, long_text)
+            else:
+                analysis = DocumentAnalysis(self, doc.text, doc=doc, profile=profile)
+            yield (analysis, context) if as_tuples else analysis
+    
+    def extract_entities(self, text):
+        """
+        Extract named entities from text
+        
+        Long texts are parsed in overlapping chunks; positions are always
+        offsets into the whole text.
+        
+        Args:
+            text (str): Input text
+            
+        Returns:
+            list: List of entity dictionaries with entity text, type, etc.
+        """
+        return self.analyze(text).entities
     
     def _map_entity_type(self, spacy_entity_type):
         """Map spaCy entity types to our model's entity types"""
@@ -79,30 +722,25 @@ class NLPProcessor:
         
         return entity_mapping.get(spacy_entity_type, 'other')
     
-    def extract_keywords(self, text, num_keywords=10):
+    def extract_keywords(self, text, num_keywords=10, index=None):
         """
         Extract important keywords from text
         
+        Terms are counted from the spaCy tokens of the analysis, so no second
+        tokenization pass is needed.
+        
         Args:
             text (str): Input text
             num_keywords (int): Number of keywords to extract
+            index (KeywordIndex, optional): Corpus index to weight terms by TF-IDF
             
         Returns:
-            list: List of keyword tuples (word, count)
+            list: List of keyword tuples (word, count), or (word, score) with an index
         """
-        # Clean and tokenize text
-        text = text.lower()
-        text = re.sub(r'[^\w\s]', '', text)  # Remove punctuation
-        tokens = word_tokenize(text)
-        
-        # Remove stopwords and short words
-        filtered_tokens = [token for token in tokens if token not in self.stop_words and len(token) > 2]
-        
-        # Count word frequencies
-        word_counter = Counter(filtered_tokens)
-        
-        # Get the most common words
-        return word_counter.most_common(num_keywords)
+        counts = self.analyze(text).keyword_counts
+        if index is not None:
+            return index.top_keywords(counts, num_keywords)
+        return counts.most_common(num_keywords)
     
     def detect_language(self, text):
         """
@@ -131,47 +769,27 @@ class NLPProcessor:
         sentiment = self.sia.polarity_scores(text)
         return sentiment['compound']  # Compound score from -1 to 1
     
-    def summarize(self, text, num_sentences=3):
+    def summarize(self, text, num_sentences=3, method=None):
         """
         Generate a summary of the text
         
         Args:
             text (str): Input text
             num_sentences (int): Number of sentences for the summary
+            method (str, optional): 'matrix', 'textrank' or 'keywords' (default: settings)
             
         Returns:
             str: Summarized text
         """
-        # Simple extractive summarization using sentence importance
-        doc = self.nlp(text)
-        sentences = [sent.text for sent in doc.sents]
-        
-        if len(sentences) <= num_sentences:
-            return text
-        
-        # Get keywords to score sentences
-        keywords = [kw[0] for kw in self.extract_keywords(text, 20)]
-        
-        # Score sentences based on keywords
-        sentence_scores = []
-        for i, sentence in enumerate(sentences):
-            score = sum(1 for kw in keywords if kw.lower() in sentence.lower())
-            sentence_scores.append((i, score))
-        
-        # Sort by score and select top sentences
-        top_sentences = sorted(sentence_scores, key=lambda x: x[1], reverse=True)[:num_sentences]
-        
-        # Sort by original order
-        top_sentences = sorted(top_sentences, key=lambda x: x[0])
-        
-        # Return the summary
-        summary = ' '.join(sentences[i] for i, _ in top_sentences)
-        return summary
+        return self.analyze(text).summary(num_sentences, method)
 
 def get_processor(language=None):
     """
     Factory function to get an NLP processor instance
     
+    Models are shared through the process-wide registry, so this is cheap
+    after the first call for a language.
+    
     Args:
         language (str, optional): Language code
         
@@ -3,31 +3,309 @@ OCR utilities for extracting text from images and PDFs
 """
 import os
 import time
+import shlex
+import hashlib
 import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import pytesseract
 from PIL import Image
 import pdf2image
 from django.conf import settings
+from .cache import get_cache, make_cache_key
+from .pdf_text import count_pages
+from .preprocessing import get_profile, preprocess_image
+
+try:
+    # Optional in-process Tesseract binding; avoids a process per call
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+DEFAULT_OCR_SETTINGS = {
+    'DPI': 200,
+    'WINDOW_PAGES': 4,
+    'WORKERS': None,
+    'OMP_THREAD_LIMIT': 1,
+    'TESSERACT_CONFIG': '',
+    'BATCH_PAGES': 8,
+    'USE_TESSEROCR': True,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+_tesserocr_local = threading.local()
+
+def get_ocr_settings():
+    """
+    Get OCR settings merged over the defaults
+    
+    Returns:
+        dict: OCR settings
+    """
+    return {**DEFAULT_OCR_SETTINGS, **getattr(settings, 'OCR_SETTINGS', {})}
+
+def get_ocr_cache():
+    """
+    Get the process-wide OCR result cache
+    
+    Returns:
+        ResponseCache: Shared cache, or None if disabled in settings
+    """
+    return get_cache('ocr', getattr(settings, 'OCR_CACHE', {}))
+
+def image_fingerprint(image):
+    """
+    Hash the pixels of a preprocessed page image
+    
+    Preprocessing normalises orientation, colour and resolution, so identical
+    pages hash alike however they were delivered; file metadata is ignored.
+    
+    Args:
+        image (PIL.Image): Preprocessed image
+        
+    Returns:
+        str: SHA-256 hex digest
+    """
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode('ascii'))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+def _get_tesserocr_api(language):
+    """Get this thread's long-lived tesserocr engine for a language"""
+    apis = getattr(_tesserocr_local, 'apis', None)
+    if apis is None:
+        apis = _tesserocr_local.apis = {}
+    if language not in apis:
+        apis[language] = tesserocr.PyTessBaseAPI(lang=language)
+    return apis[language]
+
+def run_tesseract_batch(image_paths, language, config=''):
+    """
+    OCR several image files with a single tesseract process
+    
+    The images are passed as a file list, so the process starts and loads its
+    language data once; pages come back separated by form feeds.
+    
+    Args:
+        image_paths (list): Paths of the images
+        language (str): Tesseract language code
+        config (str): Extra Tesseract options
+        
+    Returns:
+        list: Text of each image, in order
+        
+    Raises:
+        ValueError: If the output cannot be split into one text per image
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        list_path = os.path.join(temp_dir, 'images.txt')
+        with open(list_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(image_paths) + '\n')
+        
+        output_base = os.path.join(temp_dir, 'output')
+        command = [pytesseract.pytesseract.tesseract_cmd, list_path, output_base, '-l', language]
+        command.extend(shlex.split(config))
+        
+        result = subprocess.run(command, capture_output=True)
+        if result.returncode != 0:
+            raise Exception(f"Tesseract batch error: {result.stderr.decode('utf-8', 'replace').strip()}")
+        
+        with open(output_base + '.txt', 'r', encoding='utf-8') as f:
+            output = f.read()
+    
+    # Every page, including the last, is followed by a page separator
+    pages = output.split('\f')
+    if len(pages) == len(image_paths) + 1 and not pages[-1].strip():
+        pages = pages[:-1]
+    if len(pages) != len(image_paths):
+        raise ValueError(f"Tesseract returned {len(pages)} page(s) for {len(image_paths)} image(s)")
+    
+    return pages
+
+def get_ocr_workers():
+    """
+    Get the number of pages OCR'd in parallel
+    
+    Unless WORKERS is set, the cores are divided between Tesseract processes
+    according to the OpenMP threads each of them may use.
+    
+    Returns:
+        int: Number of OCR worker threads
+    """
+    ocr_settings = get_ocr_settings()
+    if ocr_settings['WORKERS']:
+        return max(int(ocr_settings['WORKERS']), 1)
+    
+    omp_threads = int(os.environ.get('OMP_THREAD_LIMIT') or ocr_settings['OMP_THREAD_LIMIT'] or 1)
+    return max((os.cpu_count() or 1) // max(omp_threads, 1), 1)
+
+def _get_executor():
+    """Get the process-wide thread pool that runs Tesseract processes"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Tesseract processes inherit this; without it each one starts a
+            # thread per core and parallel pages oversubscribe the CPU
+            omp_threads = get_ocr_settings()['OMP_THREAD_LIMIT']
+            if omp_threads:
+                os.environ.setdefault('OMP_THREAD_LIMIT', str(omp_threads))
+            
+            _executor = ThreadPoolExecutor(max_workers=get_ocr_workers(), thread_name_prefix='ocr')
+        return _executor
 
 class OCRProcessor:
     """
     Utility class for extracting text from images and PDFs using Tesseract OCR
     """
     
-    def __init__(self, language='eng'):
+    def __init__(self, language='eng', preprocessing=None, config=None, cache=None):
         """
         Initialize OCR processor
         
         Args:
             language (str): Language code for OCR (default: 'eng')
+            preprocessing (str, optional): Image preprocessing profile (default: settings)
+            config (str, optional): Extra Tesseract options (default: settings)
+            cache (ResponseCache, optional): OCR result cache (default: the shared OCR cache)
         """
         self.language = language
+        self.preprocessing = get_profile(preprocessing)
+        self.config = config if config is not None else get_ocr_settings()['TESSERACT_CONFIG']
+        self.cache = cache if cache is not None else get_ocr_cache()
+        self.page_timings = {}
         
         # Set Tesseract path from settings
         tesseract_path = getattr(settings, 'TESSERACT_PATH', None)
         if tesseract_path:
             pytesseract.pytesseract.tesseract_cmd = tesseract_path
         
+    def recognize(self, image):
+        """
+        Preprocess an image and OCR it, reusing the result for identical pages
+        
+        Args:
+            image (PIL.Image): Page image
+            
+        Returns:
+            str: Extracted text
+        """
+        image = preprocess_image(image, self.preprocessing)
+        
+        cache_key = self._cache_key(image)
+        if cache_key is not None:
+            text = self.cache.get(cache_key)
+            if text is not None:
+                return text
+        
+        text = self._tesseract(image)
+        
+        if cache_key is not None:
+            self.cache.set(cache_key, text)
+        
+        return text
+    
+    def _cache_key(self, image):
+        """Cache key of a preprocessed image, or None without a cache"""
+        if self.cache is None:
+            return None
+        return make_cache_key(
+            image=image_fingerprint(image),
+            language=self.language,
+            config=self.config
+        )
+    
+    def _use_tesserocr(self):
+        """Whether the in-process engine can serve this processor's options"""
+        return tesserocr is not None and not self.config and get_ocr_settings()['USE_TESSEROCR']
+    
+    def _tesseract(self, image):
+        """OCR one preprocessed image"""
+        if self._use_tesserocr():
+            api = _get_tesserocr_api(self.language)
+            api.SetImage(image)
+            return api.GetUTF8Text()
+        return pytesseract.image_to_string(image, lang=self.language, config=self.config)
+    
+    def recognize_files(self, image_paths):
+        """
+        OCR several image files, amortising Tesseract start-up across them
+        
+        Images are preprocessed and checked against the cache one at a time;
+        the misses then go to one tesseract process (or the in-process engine
+        when tesserocr is installed).
+        
+        Args:
+            image_paths (list): Paths of the images
+            
+        Returns:
+            list: Text of each image, in order
+        """
+        texts = [None] * len(image_paths)
+        cache_keys = [None] * len(image_paths)
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pending = []
+            for i, image_path in enumerate(image_paths):
+                with Image.open(image_path) as image:
+                    prepared = preprocess_image(image, self.preprocessing)
+                    cache_keys[i] = self._cache_key(prepared)
+                    if cache_keys[i] is not None:
+                        texts[i] = self.cache.get(cache_keys[i])
+                    if texts[i] is not None:
+                        continue
+                    
+                    if self._use_tesserocr() or len(image_paths) == 1:
+                        texts[i] = self._tesseract(prepared)
+                    else:
+                        prepared_path = os.path.join(temp_dir, f"{i:05d}.png")
+                        prepared.save(prepared_path)
+                        pending.append((i, prepared_path))
+            
+            if len(pending) == 1:
+                i, prepared_path = pending[0]
+                texts[i] = pytesseract.image_to_string(prepared_path, lang=self.language, config=self.config)
+            elif pending:
+                try:
+                    batch_texts = run_tesseract_batch([path for _, path in pending], self.language, self.config)
+                except ValueError as e:
+                    print(f"{str(e)}, recognising the images one at a time")
+                    batch_texts = [
+                        pytesseract.image_to_string(path, lang=self.language, config=self.config)
+                        for _, path in pending
+                    ]
+                for (i, _), text in zip(pending, batch_texts):
+                    texts[i] = text
+        
+        for cache_key, text in zip(cache_keys, texts):
+            if cache_key is not None:
+                self.cache.set(cache_key, text)
+        
+        return texts
+    
+    def process_images(self, image_paths):
+        """
+        Extract text from several image files, e.g. the pages or receipts of a batch
+        
+        Args:
+            image_paths (list): Paths to the image files
+            
+        Returns:
+            tuple: (list of extracted texts, processing_time)
+        """
+        start_time = time.time()
+        
+        batch_pages = max(get_ocr_settings()['BATCH_PAGES'], 1)
+        texts = []
+        try:
+            for start in range(0, len(image_paths), batch_pages):
+                texts.extend(self.recognize_files(image_paths[start:start + batch_pages]))
+        except Exception as e:
+            raise Exception(f"OCR processing error: {str(e)}")
+        
+        return texts, time.time() - start_time
+    
     def process_image(self, image_path):
         """
         Extract text from an image file
@@ -41,11 +319,9 @@ class OCRProcessor:
         start_time = time.time()
         
         try:
-            # Open the image
-            image = Image.open(image_path)
-            
-            # Extract text
-            text = pytesseract.image_to_string(image, lang=self.language)
+            # Open the image and extract text
+            with Image.open(image_path) as image:
+                text = self.recognize(image)
             
             processing_time = time.time() - start_time
             return text, processing_time
@@ -53,42 +329,162 @@ class OCRProcessor:
             processing_time = time.time() - start_time
             raise Exception(f"OCR processing error: {str(e)}")
     
-    def process_pdf(self, pdf_path):
+    def iter_pdf_windows(self, pdf_path, page_numbers=None, window_pages=None):
         """
-        Extract text from a PDF file
+        Rasterise PDF pages a window at a time
+        
+        Only one window of page images exists on disk at a time, and no images
+        are held in memory, so peak usage depends on the window size and DPI
+        rather than on the page count.
         
         Args:
             pdf_path (str): Path to the PDF file
+            page_numbers (list, optional): 1-based page numbers (default: all pages)
+            window_pages (int, optional): Pages per window (default: settings)
             
-        Returns:
-            tuple: (extracted_text, processing_time, page_count)
+        Yields:
+            list: (page_number, image_path) pairs of one window; the files are
+                deleted once the caller moves on
         """
-        start_time = time.time()
+        ocr_settings = get_ocr_settings()
+        if page_numbers is None:
+            page_numbers = range(1, count_pages(pdf_path) + 1)
         
-        try:
-            # Create temp directory for PDF images
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Convert PDF to images
-                images = pdf2image.convert_from_path(
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for first_page, last_page in _page_windows(page_numbers, window_pages or ocr_settings['WINDOW_PAGES']):
+                image_paths = pdf2image.convert_from_path(
                     pdf_path,
+                    dpi=ocr_settings['DPI'],
                     output_folder=temp_dir,
                     fmt='jpeg',
-                    thread_count=os.cpu_count()
+                    first_page=first_page,
+                    last_page=last_page,
+                    thread_count=min(last_page - first_page + 1, os.cpu_count() or 1),
+                    paths_only=True
                 )
                 
-                page_count = len(images)
-                full_text = []
+                yield list(enumerate(image_paths, start=first_page))
                 
-                # Process each page
-                for i, image in enumerate(images):
-                    text = pytesseract.image_to_string(image, lang=self.language)
-                    full_text.append(f"--- Page {i+1} ---\n{text}\n")
-                
-                processing_time = time.time() - start_time
-                return '\n'.join(full_text), processing_time, page_count
+                for image_path in image_paths:
+                    os.remove(image_path)
+    
+    def _ocr_batch(self, pages):
+        """
+        OCR a batch of rasterised pages
+        
+        Args:
+            pages (list): (page_number, image_path) pairs
+            
+        Returns:
+            list: (page_number, text, seconds) per page; batched pages share
+                the batch time evenly
+        """
+        start_time = time.time()
+        texts = self.recognize_files([image_path for _, image_path in pages])
+        seconds = (time.time() - start_time) / len(pages)
+        return [(number, text, seconds) for (number, _), text in zip(pages, texts)]
+    
+    def ocr_pdf_pages(self, pdf_path, page_numbers=None):
+        """
+        OCR PDF pages in parallel on the shared OCR pool
+        
+        At most WINDOW_PAGES pages are rasterised at a time, which bounds peak
+        memory; each window is spread over the workers in batches of up to
+        BATCH_PAGES pages. Set WINDOW_PAGES to WORKERS * BATCH_PAGES to give
+        every worker a full batch.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            page_numbers (list, optional): 1-based page numbers (default: all pages)
+            
+        Returns:
+            dict: (text, seconds) keyed by page number, in page order
+        """
+        ocr_settings = get_ocr_settings()
+        workers = get_ocr_workers()
+        batch_pages = max(ocr_settings['BATCH_PAGES'], 1)
+        window_pages = max(ocr_settings['WINDOW_PAGES'], 1)
+        executor = _get_executor()
+        
+        results = {}
+        for window in self.iter_pdf_windows(pdf_path, page_numbers, window_pages):
+            # Spread the window evenly, so a short window still uses every worker
+            batch_size = min(batch_pages, -(-len(window) // workers))
+            futures = [
+                executor.submit(self._ocr_batch, window[start:start + batch_size])
+                for start in range(0, len(window), batch_size)
+            ]
+            for future in futures:
+                for number, text, seconds in future.result():
+                    results[number] = (text, seconds)
+        
+        self.page_timings = {number: seconds for number, (_, seconds) in results.items()}
+        if results:
+            slowest = max(self.page_timings, key=self.page_timings.get)
+            print(f"OCR'd {len(results)} page(s) on {workers} worker(s): "
+                  f"{sum(self.page_timings.values()):.2f}s page time, "
+                  f"slowest page {slowest} ({self.page_timings[slowest]:.2f}s)")
+        
+        return results
+    
+    def process_pdf(self, pdf_path):
+        """
+        Extract text from a PDF file
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            
+        Returns:
+            tuple: (extracted_text, processing_time, page_count)
+        """
+        start_time = time.time()
+        
+        try:
+            results = self.ocr_pdf_pages(pdf_path)
+            full_text = [f"--- Page {number} ---\n{text}\n" for number, (text, _) in results.items()]
+            
+            processing_time = time.time() - start_time
+            return '\n'.join(full_text), processing_time, len(full_text)
         except Exception as e:
             processing_time = time.time() - start_time
             raise Exception(f"PDF OCR processing error: {str(e)}")
+    
+    def process_pdf_pages(self, pdf_path, page_numbers):
+        """
+        OCR selected pages of a PDF file, rasterising only those pages
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            page_numbers (list): 1-based numbers of the pages to OCR
+            
+        Returns:
+            dict: Extracted text keyed by page number
+        """
+        try:
+            results = self.ocr_pdf_pages(pdf_path, page_numbers)
+        except Exception as e:
+            raise Exception(f"PDF OCR processing error: {str(e)}")
+        
+        return {number: text for number, (text, _) in results.items()}
+
+def _page_runs(page_numbers):
+    """Group sorted page numbers into (first, last) runs of consecutive pages"""
+    runs = []
+    for number in sorted(set(page_numbers)):
+        if runs and number == runs[-1][1] + 1:
+            runs[-1][1] = number
+        else:
+            runs.append([number, number])
+    return [tuple(run) for run in runs]
+
+def _page_windows(page_numbers, window_pages):
+    """Split runs of consecutive pages into (first, last) windows of at most window_pages pages"""
+    window_pages = max(window_pages, 1)
+    windows = []
+    for first_page, last_page in _page_runs(page_numbers):
+        for start in range(first_page, last_page + 1, window_pages):
+            windows.append((start, min(start + window_pages - 1, last_page)))
+    return windows
 
 def extract_text_from_image(image_path, language=None):
     """
@@ -101,24 +497,8 @@ def extract_text_from_image(image_path, language=None):
     Returns:
         str: Extracted text
     """
-    if language is None:
-        language = getattr(settings, 'OCR_LANGUAGE', 'eng')
-    
-    # Set Tesseract path from settings
-    tesseract_path = getattr(settings, 'TESSERACT_PATH', None)
-    if tesseract_path:
-        pytesseract.pytesseract.tesseract_cmd = tesseract_path
-    
-    try:
-        # Open the image
-        image = Image.open(image_path)
-        
-        # Extract text
-        text = pytesseract.image_to_string(image, lang=language)
-        
-        return text
-    except Exception as e:
-        raise Exception(f"OCR processing error: {str(e)}")
+    text, _ = get_processor(language).process_image(image_path)
+    return text
 
 def get_processor(language=None):
     """
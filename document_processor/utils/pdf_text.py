@@ -0,0 +1,177 @@
+"""
+Parallel text-layer extraction for PDF files
+"""
+import os
+import re
+import multiprocessing
+import django
+import PyPDF2
+from django.conf import settings
+
+DEFAULT_PDF_SETTINGS = {
+    'WORKERS': os.cpu_count() or 1,
+    'SHARD_PAGES': 25,
+    'MAX_PAGES': 500,
+    'TIMEOUT': 120,
+    'IN_PROCESS_PAGES': 50,
+    'OCR_FALLBACK': True,
+    'MIN_TEXT_CHARS': 50,
+    'MIN_TEXT_QUALITY': 0.7,
+}
+
+# Characters counted as readable when judging a text layer
+READABLE_PUNCTUATION = set(' \t\n.,;:!?\'"()[]-/&%$@#*+=<>')
+
+# Glyphs without a Unicode mapping, as written by PyPDF2
+CID_PATTERN = re.compile(r'\(cid:\d+\)')
+
+def get_pdf_settings():
+    """
+    Get PDF extraction settings merged over the defaults
+
+    Returns:
+        dict: PDF extraction settings
+    """
+    return {**DEFAULT_PDF_SETTINGS, **getattr(settings, 'PDF_EXTRACTION', {})}
+
+def count_pages(file_path):
+    """
+    Count the pages of a PDF file
+
+    Args:
+        file_path (str): Path to the PDF file
+
+    Returns:
+        int: Number of pages
+    """
+    with open(file_path, 'rb') as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+def text_quality(text):
+    """
+    Estimate how readable a page's text layer is
+
+    Broken font encodings produce replacement characters, (cid:NN) runs and
+    symbol soup rather than words.
+
+    Args:
+        text (str): Page text
+
+    Returns:
+        float: Share of characters that are letters, digits, whitespace or
+            common punctuation (0.0 for empty text)
+    """
+    if not text:
+        return 0.0
+    text = CID_PATTERN.sub('\ufffd', text)
+    readable = sum(1 for char in text if char.isalnum() or char in READABLE_PUNCTUATION)
+    return readable / len(text)
+
+def has_usable_text(text, min_chars=None, min_quality=None):
+    """
+    Check whether a page's text layer is good enough to skip OCR
+
+    Args:
+        text (str): Page text
+        min_chars (int, optional): Minimum non-whitespace characters (default: settings)
+        min_quality (float, optional): Minimum text_quality score (default: settings)
+
+    Returns:
+        bool: True if the text layer can be used as is
+    """
+    pdf_settings = get_pdf_settings()
+    min_chars = min_chars if min_chars is not None else pdf_settings['MIN_TEXT_CHARS']
+    min_quality = min_quality if min_quality is not None else pdf_settings['MIN_TEXT_QUALITY']
+
+    if len(''.join(text.split())) < min_chars:
+        return False
+    return text_quality(text) >= min_quality
+
+def extract_page_range(file_path, start, end):
+    """
+    Extract the text layer of a range of pages
+
+    Runs in pool workers, so it opens its own reader rather than sharing one.
+
+    Args:
+        file_path (str): Path to the PDF file
+        start (int): First page index
+        end (int): Page index after the last page
+
+    Returns:
+        list: Text of each page, in order
+    """
+    with open(file_path, 'rb') as f:
+        pdf_reader = PyPDF2.PdfReader(f)
+        return [pdf_reader.pages[i].extract_text() or '' for i in range(start, end)]
+
+def _get_pool(processes):
+    """
+    Start a worker pool for page-range shards
+
+    Workers are spawned as fresh interpreters rather than forked from the web
+    or job process, whose live threads (and the locks they hold) a fork would
+    copy. Django is set up in each worker before this module is imported there.
+    """
+    return multiprocessing.get_context('spawn').Pool(processes, initializer=django.setup)
+
+def extract_pdf_pages(file_path, max_pages=None, timeout=None, workers=None, shard_pages=None,
+                      in_process_pages=None):
+    """
+    Extract the text layer of every page, spreading page-range shards over
+    worker processes
+
+    Documents of up to IN_PROCESS_PAGES pages are read in the calling process,
+    where starting workers would cost more than the extraction itself; the
+    timeout only applies to documents read by the pool.
+
+    Args:
+        file_path (str): Path to the PDF file
+        max_pages (int, optional): Pages beyond this limit are skipped (default: settings)
+        timeout (float, optional): Seconds allowed for the whole document (default: settings)
+        workers (int, optional): Maximum worker processes (default: settings)
+        shard_pages (int, optional): Pages per shard (default: settings)
+        in_process_pages (int, optional): Largest page count read without a pool (default: settings)
+
+    Returns:
+        tuple: (list of page texts in order, total page count)
+    """
+    pdf_settings = get_pdf_settings()
+    max_pages = max_pages if max_pages is not None else pdf_settings['MAX_PAGES']
+    timeout = timeout if timeout is not None else pdf_settings['TIMEOUT']
+    workers = workers if workers is not None else pdf_settings['WORKERS']
+    shard_pages = max(shard_pages or pdf_settings['SHARD_PAGES'], 1)
+    if in_process_pages is None:
+        in_process_pages = pdf_settings['IN_PROCESS_PAGES']
+
+    page_count = count_pages(file_path)
+    pages_to_read = min(page_count, max_pages) if max_pages else page_count
+    if pages_to_read < page_count:
+        print(f"PDF has {page_count} pages, extracting the first {pages_to_read}")
+
+    shards = [
+        (file_path, start, min(start + shard_pages, pages_to_read))
+        for start in range(0, pages_to_read, shard_pages)
+    ]
+    if not shards:
+        return [], page_count
+
+    # Small documents, or a single worker without a timeout, are not worth a pool
+    processes = min(max(workers, 1), len(shards))
+    if pages_to_read <= in_process_pages or (processes == 1 and not timeout):
+        return extract_page_range(file_path, 0, pages_to_read), page_count
+
+    # Leaving the block terminates the workers, including any still running
+    # after a timeout
+    with _get_pool(processes) as pool:
+        pending = pool.starmap_async(extract_page_range, shards)
+        try:
+            results = pending.get(timeout=timeout or None)
+        except multiprocessing.TimeoutError:
+            raise TimeoutError(f"PDF text extraction timed out after {timeout} seconds")
+
+    pages = []
+    for shard in results:
+        pages.extend(shard)
+
+    return pages, page_count
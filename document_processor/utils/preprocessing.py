@@ -0,0 +1,298 @@
+"""
+Image preprocessing applied before OCR
+"""
+from PIL import Image, ImageOps
+from django.conf import settings
+
+# Named preprocessing profiles; steps run in the order listed in apply_profile
+PREPROCESSING_PROFILES = {
+    # Pass images through untouched
+    'none': {},
+    # Cheapest useful profile: upright, gray and no larger than needed
+    'fast': {
+        'exif_rotate': True,
+        'grayscale': True,
+        'target_dpi': 200,
+        'max_side': 2500,
+    },
+    # Default: adds Otsu binarisation, which Tesseract reads fastest
+    'balanced': {
+        'exif_rotate': True,
+        'grayscale': True,
+        'target_dpi': 300,
+        'max_side': 3500,
+        'binarize': True,
+    },
+    # Slowest: also straightens skewed scans and crops dark borders
+    'accurate': {
+        'exif_rotate': True,
+        'grayscale': True,
+        'target_dpi': 300,
+        'max_side': 3500,
+        'crop_borders': True,
+        'deskew': True,
+        'binarize': True,
+    },
+}
+
+DEFAULT_PROFILE = 'balanced'
+
+# Resolution assumed when an image carries no usable DPI
+ASSUMED_DPI = 72
+
+def get_profile(name=None):
+    """
+    Get a preprocessing profile by name
+
+    Profiles in OCR_SETTINGS['PREPROCESSING_PROFILES'] are added to, or replace,
+    the built-in ones.
+
+    Args:
+        name (str, optional): Profile name (default: OCR_SETTINGS['PREPROCESSING'])
+
+    Returns:
+        dict: Profile steps
+
+    Raises:
+        ValueError: If no profile has that name
+    """
+    ocr_settings = getattr(settings, 'OCR_SETTINGS', {})
+    if name is None:
+        name = ocr_settings.get('PREPROCESSING', DEFAULT_PROFILE)
+
+    profiles = {**PREPROCESSING_PROFILES, **ocr_settings.get('PREPROCESSING_PROFILES', {})}
+    if name not in profiles:
+        raise ValueError(f"Unknown preprocessing profile: {name}")
+    return profiles[name]
+
+def downscale(image, target_dpi=None, max_side=None):
+    """
+    Shrink an image to a target resolution
+
+    Images are never enlarged. Without DPI metadata only max_side applies.
+
+    Args:
+        image (PIL.Image): Image
+        target_dpi (int, optional): Resolution to scale down to
+        max_side (int, optional): Maximum width or height in pixels
+
+    Returns:
+        PIL.Image: Resized image, or the input if it is small enough
+    """
+    scale = 1.0
+
+    dpi = image.info.get('dpi')
+    if target_dpi and dpi and dpi[0] and float(dpi[0]) > ASSUMED_DPI:
+        scale = min(scale, target_dpi / float(dpi[0]))
+
+    if max_side:
+        scale = min(scale, max_side / max(image.size))
+
+    if scale >= 1.0:
+        return image
+
+    size = (max(int(image.width * scale), 1), max(int(image.height * scale), 1))
+    resized = image.resize(size, Image.LANCZOS)
+    if dpi and target_dpi:
+        resized.info['dpi'] = (target_dpi, target_dpi)
+    return resized
+
+def otsu_threshold(image):
+    """
+    Find the gray level that best separates ink from paper
+
+    Args:
+        image (PIL.Image): Grayscale ('L') image
+
+    Returns:
+        int: Threshold between 0 and 255
+    """
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    if not total:
+        return 127
+
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background_count = 0
+    background_sum = 0
+    best_threshold = 127
+    best_variance = -1.0
+
+    for level, count in enumerate(histogram):
+        background_count += count
+        if background_count == 0:
+            continue
+        foreground_count = total - background_count
+        if foreground_count == 0:
+            break
+
+        background_sum += level * count
+        background_mean = background_sum / background_count
+        foreground_mean = (weighted_total - background_sum) / foreground_count
+        variance = background_count * foreground_count * (background_mean - foreground_mean) ** 2
+
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = level
+
+    return best_threshold
+
+def binarize(image):
+    """
+    Convert a grayscale image to black and white with Otsu's threshold
+
+    Args:
+        image (PIL.Image): Grayscale ('L') image
+
+    Returns:
+        PIL.Image: 'L' image containing only 0 and 255
+    """
+    threshold = otsu_threshold(image)
+    return image.point(lambda level: 255 if level > threshold else 0)
+
+def _border_size(profile):
+    """Count leading values of an ink profile that belong to a dark border"""
+    for i, value in enumerate(profile):
+        if value < 128:
+            return i
+    return 0
+
+def crop_borders(image, margin=10):
+    """
+    Crop away empty margins and the dark edges left by scanner lids
+
+    Args:
+        image (PIL.Image): Grayscale ('L') image
+        margin (int): Pixels of padding kept around the content
+
+    Returns:
+        PIL.Image: Cropped image
+    """
+    width, height = image.size
+    ink = ImageOps.invert(binarize(image))
+
+    # Rows and columns that are mostly ink at the image edges are border
+    rows = list(ink.resize((1, height), Image.BOX).getdata())
+    columns = list(ink.resize((width, 1), Image.BOX).getdata())
+    box = (
+        _border_size(columns),
+        _border_size(rows),
+        width - _border_size(columns[::-1]),
+        height - _border_size(rows[::-1]),
+    )
+
+    # Then shrink to the remaining ink plus the margin
+    content = ink.crop(box).getbbox()
+    if content is None:
+        return image.crop(box)
+
+    return image.crop((
+        max(box[0] + content[0] - margin, box[0]),
+        max(box[1] + content[1] - margin, box[1]),
+        min(box[0] + content[2] + margin, box[2]),
+        min(box[1] + content[3] + margin, box[3]),
+    ))
+
+def estimate_skew(image, max_angle=5.0, step=0.5, sample_width=800):
+    """
+    Estimate the rotation of a text image from its row profile
+
+    Text lines produce the sharpest peaks in the row-by-row ink profile when
+    they are horizontal, so the angle with the highest profile variance wins.
+
+    Args:
+        image (PIL.Image): Grayscale ('L') image
+        max_angle (float): Largest angle tried, in degrees, either way
+        step (float): Angle increment in degrees
+        sample_width (int): Width the image is reduced to for the search
+
+    Returns:
+        float: Angle in degrees that straightens the image
+    """
+    scale = min(sample_width / image.width, 1.0)
+    sample = image.resize((max(int(image.width * scale), 1), max(int(image.height * scale), 1)))
+    ink = ImageOps.invert(binarize(sample))
+
+    best_angle = 0.0
+    best_score = -1.0
+    steps = int(max_angle / step)
+    for i in range(-steps, steps + 1):
+        angle = i * step
+        rotated = ink.rotate(angle, resample=Image.BILINEAR, expand=False)
+        # One column holding the mean ink of every row
+        profile = list(rotated.resize((1, rotated.height), Image.BOX).getdata())
+        mean = sum(profile) / len(profile)
+        score = sum((value - mean) ** 2 for value in profile)
+        if score > best_score:
+            best_score = score
+            best_angle = angle
+
+    return best_angle
+
+def deskew(image, max_angle=5.0):
+    """
+    Rotate a skewed scan so text lines are horizontal
+
+    Args:
+        image (PIL.Image): Grayscale ('L') image
+        max_angle (float): Largest correction applied, in degrees
+
+    Returns:
+        PIL.Image: Straightened image
+    """
+    angle = estimate_skew(image, max_angle=max_angle)
+    if not angle:
+        return image
+    return image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+def apply_profile(image, profile):
+    """
+    Run the steps of a preprocessing profile
+
+    Args:
+        image (PIL.Image): Image
+        profile (dict): Profile from get_profile
+
+    Returns:
+        PIL.Image: Preprocessed image
+    """
+    if not profile:
+        return image
+
+    if profile.get('exif_rotate'):
+        image = ImageOps.exif_transpose(image)
+
+    if profile.get('grayscale') or profile.get('binarize') or profile.get('deskew') or profile.get('crop_borders'):
+        dpi = image.info.get('dpi')
+        image = image.convert('L')
+        if dpi:
+            image.info['dpi'] = dpi
+
+    if profile.get('target_dpi') or profile.get('max_side'):
+        image = downscale(image, profile.get('target_dpi'), profile.get('max_side'))
+
+    if profile.get('crop_borders'):
+        image = crop_borders(image)
+
+    if profile.get('deskew'):
+        image = deskew(image, max_angle=profile.get('max_skew', 5.0))
+
+    if profile.get('binarize'):
+        image = binarize(image)
+
+    return image
+
+def preprocess_image(image, profile=None):
+    """
+    Prepare an image for OCR
+
+    Args:
+        image (PIL.Image): Image
+        profile (str or dict, optional): Profile name or steps (default: settings)
+
+    Returns:
+        PIL.Image: Preprocessed image
+    """
+    if profile is None or isinstance(profile, str):
+        profile = get_profile(profile)
+    return apply_profile(image, profile)
@@ -0,0 +1,148 @@
+"""
+Fingerprinted processing stages, so reprocessing only reruns what changed
+"""
+import time
+import hashlib
+from document_processor.models import ProcessingStage
+from .cache import make_cache_key
+
+# Bump a version whenever a stage's code changes so stored outputs are recomputed
+STAGE_VERSIONS = {
+    'entities': 1,
+    'terms': 1,
+    'keywords': 2,
+    'sentiment': 1,
+    'summary': 1,
+    'groq_analysis': 1,
+    'groq_entities': 1,
+    'groq_insights': 1,
+}
+
+def hash_text(text):
+    """SHA-256 of a document text"""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+def stage_fingerprint(name, text_hash, model=None, language=None, params=None):
+    """
+    Fingerprint the inputs of a stage
+
+    Args:
+        name (str): Stage name, a key of STAGE_VERSIONS
+        text_hash (str): Hash of the text the stage runs on
+        model (str, optional): Model the stage uses
+        language (str, optional): Document language
+        params (dict, optional): Other JSON-serialisable parameters the output depends on
+
+    Returns:
+        str: SHA-256 hex digest of the inputs
+    """
+    return make_cache_key(
+        stage=name,
+        version=STAGE_VERSIONS[name],
+        text=text_hash,
+        model=model,
+        language=language,
+        params=params or {},
+    )
+
+class StageStore:
+    """
+    Stored stage outputs of one document
+
+    A stage is current when its stored fingerprint matches the fingerprint of
+    its inputs. Outputs of stages run during processing are kept in memory
+    until save() is called, so they are written together with the results.
+    """
+
+    def __init__(self, document, force=False):
+        """
+        Initialize store
+
+        Args:
+            document (Document): Document being processed
+            force (bool): Treat every stored stage as out of date
+        """
+        self.document = document
+        self.force = force
+        self.stages = {stage.name: stage for stage in document.stages.all()}
+        # Outputs as stored before this run, kept when a stage is rerun
+        self.saved_outputs = {name: stage.output for name, stage in self.stages.items()}
+        self.changed = set()
+
+    def is_current(self, name, fingerprint):
+        """
+        Check whether a stage's stored output was produced from these inputs
+
+        Args:
+            name (str): Stage name
+            fingerprint (str): Fingerprint of the stage's current inputs
+
+        Returns:
+            bool: True if the stored output can be reused
+        """
+        stage = self.stages.get(name)
+        if stage is None or stage.fingerprint != fingerprint:
+            return False
+        return not self.force or name in self.changed
+
+    def get(self, name, fingerprint):
+        """
+        Get a stage's output if it is current
+
+        Args:
+            name (str): Stage name
+            fingerprint (str): Fingerprint of the stage's current inputs
+
+        Returns:
+            Output of the stage, or None if it has to be rerun
+        """
+        if not self.is_current(name, fingerprint):
+            return None
+        return self.stages[name].output
+
+    def put(self, name, fingerprint, output, duration=None):
+        """
+        Record a stage's new output
+
+        Args:
+            name (str): Stage name
+            fingerprint (str): Fingerprint of the inputs that produced the output
+            output: JSON-serialisable stage output
+            duration (float, optional): Seconds the stage took
+        """
+        stage = self.stages.get(name) or ProcessingStage(document=self.document, name=name)
+        stage.fingerprint = fingerprint
+        stage.output = output
+        stage.duration = duration
+        self.stages[name] = stage
+        self.changed.add(name)
+
+    def run(self, name, fingerprint, compute):
+        """
+        Get a stage's output, computing it only if its inputs changed
+
+        Args:
+            name (str): Stage name
+            fingerprint (str): Fingerprint of the stage's current inputs
+            compute (callable): Produces the output when the stage has to run
+
+        Returns:
+            Output of the stage
+        """
+        if self.is_current(name, fingerprint):
+            return self.stages[name].output
+
+        start_time = time.time()
+        output = compute()
+        self.put(name, fingerprint, output, time.time() - start_time)
+        return output
+
+    @property
+    def stages_run(self):
+        """Names of the stages run, or copied, since the store was created"""
+        return sorted(self.changed)
+
+    def save(self):
+        """Write the outputs of the stages run to the database"""
+        for name in self.stages_run:
+            self.stages[name].save()
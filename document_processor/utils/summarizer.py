@@ -0,0 +1,201 @@
+"""
+Extractive summarizers ranking the sentences of a parsed document
+"""
+from itertools import chain
+import numpy as np
+
+# Summary methods: 'keywords' is the original substring scan, kept as a
+# baseline; 'matrix' scores the same keywords on a sentence-term matrix;
+# 'textrank' ranks sentences by their similarity to the rest of the document
+SUMMARY_METHODS = ('keywords', 'matrix', 'textrank')
+
+# TextRank power iteration
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_MAX_ITERATIONS = 100
+TEXTRANK_TOLERANCE = 1e-6
+
+class SentenceTermMatrix:
+    """
+    Sparse sentence-term count matrix, stored as coordinate arrays
+
+    Only the non-zero cells are kept, so building and multiplying the matrix
+    is linear in the number of terms in the document.
+    """
+
+    def __init__(self, sentence_terms):
+        """
+        Build the matrix
+
+        Args:
+            sentence_terms (list): Terms of each sentence
+        """
+        lengths = np.fromiter((len(terms) for terms in sentence_terms), dtype=np.int64, count=len(sentence_terms))
+
+        # Column of every term occurrence, numbered in order of first use
+        self.vocabulary = {}
+        occurrence_columns = np.array([
+            self.vocabulary.setdefault(term, len(self.vocabulary))
+            for term in chain.from_iterable(sentence_terms)
+        ], dtype=np.int64)
+        self.shape = (len(sentence_terms), len(self.vocabulary))
+        occurrence_rows = np.repeat(np.arange(self.shape[0]), lengths)
+
+        # Merge repeated occurrences into one cell per sentence and term
+        cells, counts = np.unique(occurrence_rows * max(self.shape[1], 1) + occurrence_columns, return_counts=True)
+        self.rows, self.columns = np.divmod(cells, max(self.shape[1], 1))
+        self.values = counts.astype(float)
+
+    def term_columns(self, terms):
+        """
+        Find the columns of terms
+
+        Args:
+            terms (iterable): Terms
+
+        Returns:
+            list: Columns of the terms found in the matrix
+        """
+        return [self.vocabulary[term] for term in terms if term in self.vocabulary]
+
+    def dot(self, vector):
+        """Multiply by a vector over terms, giving one value per sentence"""
+        return np.bincount(self.rows, weights=self.values * vector[self.columns], minlength=self.shape[0])
+
+    def tdot(self, vector):
+        """Multiply the transpose by a vector over sentences, giving one value per term"""
+        return np.bincount(self.columns, weights=self.values * vector[self.rows], minlength=self.shape[1])
+
+    def normalize(self):
+        """Scale every sentence row to unit length, in place"""
+        norms = np.sqrt(np.bincount(self.rows, weights=self.values ** 2, minlength=self.shape[0]))
+        self.values = self.values / norms[self.rows]
+        return self
+
+def substring_keyword_scores(sentences, keywords):
+    """
+    Count the keywords found anywhere in each sentence, the original method
+
+    Args:
+        sentences (list): Sentence strings
+        keywords (list): Keywords
+
+    Returns:
+        ndarray: Score of each sentence
+    """
+    return np.array([
+        sum(1 for kw in keywords if kw.lower() in sentence.lower())
+        for sentence in sentences
+    ], dtype=float)
+
+def keyword_scores(matrix, keywords):
+    """
+    Count the keywords among the terms of each sentence
+
+    Args:
+        matrix (SentenceTermMatrix): Sentence-term matrix
+        keywords (list): Keywords
+
+    Returns:
+        ndarray: Score of each sentence
+    """
+    weights = np.zeros(matrix.shape[1])
+    weights[matrix.term_columns(keyword.lower() for keyword in keywords)] = 1.0
+    # One cell per sentence and term, so each keyword counts once per sentence
+    return np.bincount(matrix.rows, weights=weights[matrix.columns], minlength=matrix.shape[0])
+
+def textrank_scores(matrix, damping=TEXTRANK_DAMPING, max_iterations=TEXTRANK_MAX_ITERATIONS,
+                    tolerance=TEXTRANK_TOLERANCE):
+    """
+    Rank sentences with TextRank over their cosine similarities
+
+    The similarity matrix is never built: each power iteration multiplies by
+    the normalized sentence-term matrix and its transpose, so memory and time
+    per iteration stay linear in the number of terms.
+
+    Args:
+        matrix (SentenceTermMatrix): Sentence-term matrix, normalized in place
+        damping (float): PageRank damping factor
+        max_iterations (int): Maximum power iterations
+        tolerance (float): Stop once the scores change less than this in total
+
+    Returns:
+        ndarray: Score of each sentence, summing to 1
+    """
+    count = matrix.shape[0]
+    if not count:
+        return np.zeros(0)
+
+    unit = matrix.normalize()
+    # Similarity of a sentence to itself is not an edge
+    self_similarity = np.bincount(unit.rows, weights=unit.values ** 2, minlength=count)
+
+    def similarity_dot(vector):
+        return unit.dot(unit.tdot(vector)) - self_similarity * vector
+
+    degree = similarity_dot(np.ones(count))
+    dangling = degree <= 1e-12
+    degree[dangling] = 1.0
+
+    scores = np.full(count, 1.0 / count)
+    for _ in range(max_iterations):
+        spread = similarity_dot(scores / degree)
+        # Sentences sharing no terms with any other spread their score evenly
+        updated = (1 - damping) / count + damping * (spread + scores[dangling].sum() / count)
+        change = np.abs(updated - scores).sum()
+        scores = updated
+        if change < tolerance:
+            break
+
+    return scores
+
+def rank_sentences(sentences, sentence_terms, keywords, method='matrix'):
+    """
+    Score every sentence of a document
+
+    Args:
+        sentences (list): Sentence strings
+        sentence_terms (list): Terms of each sentence
+        keywords (list): Keywords of the document
+        method (str): One of SUMMARY_METHODS
+
+    Returns:
+        ndarray: Score of each sentence
+    """
+    if method == 'keywords':
+        return substring_keyword_scores(sentences, keywords)
+    if method == 'matrix':
+        return keyword_scores(SentenceTermMatrix(sentence_terms), keywords)
+    if method == 'textrank':
+        return textrank_scores(SentenceTermMatrix(sentence_terms))
+    raise ValueError(f"Unknown summary method: {method}")
+
+def summarize(sentences, sentence_terms, keywords, num_sentences=3, method='matrix'):
+    """
+    Build an extractive summary from the best scoring sentences
+
+    Args:
+        sentences (list): Sentence strings
+        sentence_terms (list): Terms of each sentence
+        keywords (list): Keywords of the document
+        num_sentences (int): Number of sentences for the summary
+        method (str): One of SUMMARY_METHODS
+
+    Returns:
+        str: Selected sentences in document order
+    """
+    scores = rank_sentences(sentences, sentence_terms, keywords, method)
+    return ' '.join(sentences[i] for i in select_sentences(scores, num_sentences))
+
+def select_sentences(scores, num_sentences=3):
+    """
+    Pick the best scoring sentences
+
+    Args:
+        scores (ndarray): Score of each sentence
+        num_sentences (int): Number of sentences to pick
+
+    Returns:
+        list: Indices of the picked sentences, in document order
+    """
+    # Stable sort, so ties go to the earlier sentence
+    return sorted(np.argsort(-scores, kind='stable')[:num_sentences].tolist())
@@ -12,9 +12,13 @@ from django.contrib import messages
 from django.db.models import Q
 from django.conf import settings
 
-from .models import Document, DocumentType, ProcessingResult, NamedEntity
+from .models import Document, DocumentType, ProcessingResult, NamedEntity, ProcessingJob
 from .forms import DocumentUploadForm
-from .utils.document_processor import process_document
+from .utils.job_queue import enqueue_job
+from .utils.keywords import remove_document_terms
+
+# Document pages shown at a time on the detail page
+PAGES_PER_VIEW = 5
 
 def index(request):
     """Home page view"""
@@ -30,8 +34,8 @@ def document_list(request):
     search_query = request.GET.get('search', '')
     status_filter = request.GET.get('status', '')
     
-    # Get documents for the current user
-    documents = Document.objects.filter(uploaded_by=request.user)
+    # Get documents for the current user; the full text is not needed here
+    documents = Document.objects.filter(uploaded_by=request.user).defer('extracted_text')
     
     # Apply search filter if provided
     if search_query:
@@ -81,7 +85,19 @@ def document_upload(request):
 @login_required
 def document_detail(request, pk):
     """View for displaying document details"""
-    document = get_object_or_404(Document, pk=pk, uploaded_by=request.user)
+    document = get_object_or_404(Document.objects.defer('extracted_text'), pk=pk, uploaded_by=request.user)
+    
+    # Page through the extracted text instead of loading all of it, optionally
+    # only the pages matching a search
+    text_query = request.GET.get('q', '')
+    pages = document.pages.all()
+    has_pages = pages.exists()
+    if text_query:
+        pages = pages.filter(text__icontains=text_query)
+    text_page_obj = Paginator(pages, PAGES_PER_VIEW).get_page(request.GET.get('text_page'))
+    
+    # Documents extracted before per-page storage only have the full text
+    has_text = has_pages or bool(document.extracted_text)
     
     # Get document entities
     spacy_entities = document.entities.filter(source='spacy')
@@ -93,8 +109,16 @@ def document_detail(request, pk):
     except ProcessingResult.DoesNotExist:
         analysis = None
     
+    # Get the job currently queued or running for this document, if any
+    active_job = document.jobs.filter(status__in=('queued', 'running')).first()
+    
     context = {
         'document': document,
+        'active_job': active_job,
+        'has_text': has_text,
+        'has_pages': has_pages,
+        'text_page_obj': text_page_obj,
+        'text_query': text_query,
         'spacy_entities': spacy_entities,
         'groq_entities': groq_entities,
         'analysis': analysis,
@@ -113,14 +137,17 @@ def document_process(request, pk):
             # Check if advanced processing is requested
             use_advanced = request.POST.get('use_advanced', False) == 'on'
             
-            # Process document
-            result = process_document(document.id, use_advanced=use_advanced)
+            # Rerun every stage, not just those whose inputs changed
+            force = request.POST.get('force', False) == 'on'
+            
+            # Queue document for the background workers
+            job = enqueue_job(document, use_advanced=use_advanced, force=force)
             
             # Redirect to document detail page
-            messages.success(request, "Document processed successfully.")
+            messages.success(request, f"Document queued for processing (job #{job.id}).")
             return redirect('document_detail', pk=document.pk)
         except Exception as e:
-            messages.error(request, f"Error processing document: {str(e)}")
+            messages.error(request, f"Error queuing document: {str(e)}")
             return redirect('document_detail', pk=document.pk)
     
     context = {
@@ -138,6 +165,7 @@ def document_delete(request, pk):
     document = get_object_or_404(Document, pk=pk, uploaded_by=request.user)
     
     if request.method == 'POST':
+        remove_document_terms(document)
         document.delete()
         messages.success(request, f"Document '{document.title}' deleted successfully.")
         return redirect('document_list')
@@ -151,7 +179,7 @@ def document_delete(request, pk):
 @csrf_exempt
 @login_required
 def document_process_api(request, pk):
-    """API view for processing a document asynchronously"""
+    """API view for queuing a document for background processing"""
     if request.method != 'POST':
         return JsonResponse({'error': 'Only POST method is allowed'}, status=405)
     
@@ -161,22 +189,43 @@ def document_process_api(request, pk):
         # Get advanced processing option
         data = json.loads(request.body)
         use_advanced = data.get('use_advanced', False)
+        force = data.get('force', False)
         
-        # Start processing
-        result = process_document(document.id, use_advanced=use_advanced)
+        # Queue processing
+        job = enqueue_job(document, use_advanced=use_advanced, force=force)
         
         return JsonResponse({
-            'status': 'success',
-            'message': 'Document processed successfully',
-            'result': result,
-            'advanced_used': use_advanced
-        })
+            'status': 'queued',
+            'message': 'Document queued for processing',
+            'job_id': job.id,
+            'job_status': job.status,
+            'advanced_used': job.use_advanced,
+            'force': job.force
+        }, status=202)
     except Exception as e:
         return JsonResponse({
             'status': 'error',
             'message': str(e)
         }, status=500)
 
+@login_required
+def job_status_api(request, pk):
+    """API view for polling the status of a processing job"""
+    job = get_object_or_404(ProcessingJob, pk=pk, document__uploaded_by=request.user)
+    
+    return JsonResponse({
+        'job_id': job.id,
+        'document_id': str(job.document_id),
+        'status': job.status,
+        'document_status': job.document.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'last_error': job.last_error,
+        'created_at': job.created_at.isoformat(),
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+    })
+
 @login_required
 def document_download(request, pk):
     """View for downloading document text"""
@@ -138,10 +138,53 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # OCR settings
 OCR_LANGUAGE = os.getenv('OCR_LANGUAGE', 'eng')  # Default language for Tesseract OCR
 TESSERACT_PATH = os.getenv('TESSERACT_PATH', r'C:\Program Files\Tesseract-OCR\tesseract.exe')  # Path to Tesseract executable
+OCR_SETTINGS = {
+    'DPI': int(os.getenv('OCR_DPI', 200)),  # Rasterisation resolution for scanned PDF pages
+    'WINDOW_PAGES': int(os.getenv('OCR_WINDOW_PAGES', 4)),  # Pages rasterised at a time; hard limit on peak memory
+    'WORKERS': int(os.getenv('OCR_WORKERS', 0)) or None,  # Pages OCR'd in parallel (default: cores / OMP_THREAD_LIMIT)
+    'OMP_THREAD_LIMIT': int(os.getenv('OMP_THREAD_LIMIT', 1)),  # OpenMP threads per Tesseract process
+    'PREPROCESSING': os.getenv('OCR_PREPROCESSING', 'balanced'),  # none, fast, balanced or accurate
+    'PREPROCESSING_PROFILES': {},  # Extra or replacement profiles, see utils/preprocessing.py
+    'TESSERACT_CONFIG': os.getenv('TESSERACT_CONFIG', ''),  # Extra Tesseract options, e.g. '--psm 6'
+    'BATCH_PAGES': int(os.getenv('OCR_BATCH_PAGES', 8)),  # Pages per tesseract process; 1 disables batching
+    'USE_TESSEROCR': os.getenv('OCR_USE_TESSEROCR', 'True') == 'True',  # In-process engine when installed
+}
+
+# OCR result cache keyed by page image hash; same options as LLM_CACHE
+OCR_CACHE = {
+    'BACKEND': os.getenv('OCR_CACHE_BACKEND', 'disk'),
+    'DIR': os.path.join(BASE_DIR, 'cache', 'ocr'),
+    'TTL': None,  # OCR output only changes with the image, language or config
+    'MAX_ENTRIES': int(os.getenv('OCR_CACHE_MAX_ENTRIES', 50000)),
+    'MAX_BYTES': int(os.getenv('OCR_CACHE_MAX_BYTES', 128 * 1024 * 1024)),  # 128MB
+}
+
+# PDF text-layer extraction
+PDF_EXTRACTION = {
+    'WORKERS': int(os.getenv('PDF_WORKERS', os.cpu_count() or 1)),  # Processes per document
+    'SHARD_PAGES': int(os.getenv('PDF_SHARD_PAGES', 25)),  # Pages handed to a process at a time
+    'MAX_PAGES': int(os.getenv('PDF_MAX_PAGES', 500)),  # Later pages are skipped
+    'TIMEOUT': float(os.getenv('PDF_TIMEOUT', 120)),  # Seconds per document
+    'IN_PROCESS_PAGES': int(os.getenv('PDF_IN_PROCESS_PAGES', 50)),  # Smaller documents are read without a pool
+    'OCR_FALLBACK': os.getenv('PDF_OCR_FALLBACK', 'True') == 'True',  # OCR pages without a usable text layer
+    'MIN_TEXT_CHARS': int(os.getenv('PDF_MIN_TEXT_CHARS', 50)),  # Non-whitespace characters per page
+    'MIN_TEXT_QUALITY': float(os.getenv('PDF_MIN_TEXT_QUALITY', 0.7)),  # Share of readable characters
+}
+
+# Text extractors added to the built-in PDF, DOCX, image and text ones, keyed
+# by name; the file type is sniffed from content with python-magic, e.g.
+# 'rtf': {'mime_types': ['text/rtf'], 'extensions': ['rtf'], 'extract': 'myapp.extractors.extract_rtf'}
+DOCUMENT_EXTRACTORS = {}
 
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('MAX_UPLOAD_SIZE', 10 * 1024 * 1024))  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('MAX_UPLOAD_SIZE', 10 * 1024 * 1024))  # 10MB
+FILE_UPLOAD_HANDLERS = [
+    # Django's default handlers, computing each file's SHA-256 and sniffing its
+    # type while it streams in
+    'document_processor.upload_handlers.HashingMemoryFileUploadHandler',
+    'document_processor.upload_handlers.HashingTemporaryFileUploadHandler',
+]
 
 # Authentication settings
 LOGIN_URL = '/login/'
@@ -166,3 +209,60 @@ AI_FEATURES = {
     ],
     'DEFAULT_MODEL': 'llama3-8b-8192',
 }
+
+# Background processing queue (consumed by `manage.py run_workers`)
+JOB_QUEUE = {
+    'LEASE_SECONDS': int(os.getenv('JOB_LEASE_SECONDS', 300)),  # Lease renewed by worker heartbeats
+    'HEARTBEAT_SECONDS': int(os.getenv('JOB_HEARTBEAT_SECONDS', 30)),
+    'MAX_ATTEMPTS': int(os.getenv('JOB_MAX_ATTEMPTS', 3)),
+    'RETRY_BACKOFF_SECONDS': int(os.getenv('JOB_RETRY_BACKOFF_SECONDS', 30)),  # Doubled on every retry
+    'POLL_INTERVAL': float(os.getenv('JOB_POLL_INTERVAL', 2.0)),
+}
+
+# NLP settings
+NLP_SETTINGS = {
+    'WARMUP_LANGUAGES': os.getenv('NLP_WARMUP_LANGUAGES', 'en').split(','),  # Loaded when a worker starts
+    'SPACY_MODELS': {},  # Per-language overrides, e.g. {'fr': 'fr_core_news_md'}
+    'BATCH_SIZE': int(os.getenv('NLP_BATCH_SIZE', 50)),  # Texts per nlp.pipe batch in batch processing
+    'N_PROCESS': int(os.getenv('NLP_N_PROCESS', 1)),  # Parsing processes in batch processing
+    # Pipeline profile per analysis stage: 'full', 'ner', 'sentences' or 'ner_sentences'
+    'STAGE_PROFILES': {
+        'entities': os.getenv('NLP_ENTITIES_PROFILE', 'ner'),
+        'sentences': os.getenv('NLP_SENTENCES_PROFILE', 'sentences'),
+        'keywords': os.getenv('NLP_KEYWORDS_PROFILE', 'sentences'),
+    },
+    'BATCH_PROFILE': os.getenv('NLP_BATCH_PROFILE', 'ner_sentences'),  # Profile used by process_pending
+    'CHUNK_CHARS': int(os.getenv('NLP_CHUNK_CHARS', 100000)),  # Longer texts are parsed in chunks
+    'CHUNK_OVERLAP': int(os.getenv('NLP_CHUNK_OVERLAP', 200)),  # Right context parsed after each chunk
+    'CHUNK_BATCH_SIZE': int(os.getenv('NLP_CHUNK_BATCH_SIZE', 4)),  # Chunks held in memory at a time
+    'KEYWORD_SCORING': os.getenv('NLP_KEYWORD_SCORING', 'tfidf'),  # 'tfidf' (corpus index) or 'frequency'
+    'SUMMARIZER': os.getenv('NLP_SUMMARIZER', 'matrix'),  # 'matrix', 'textrank' or 'keywords' (original scan)
+}
+
+# GROQ request settings
+GROQ_SETTINGS = {
+    'BASE_URL': os.getenv('GROQ_BASE_URL', 'https://api.groq.com/openai/v1'),  # Any OpenAI-compatible endpoint
+    'MAX_CONCURRENT_CALLS': int(os.getenv('GROQ_MAX_CONCURRENT_CALLS', 3)),  # Thread pool size per process
+    'CALL_TIMEOUT': float(os.getenv('GROQ_CALL_TIMEOUT', 60)),  # Seconds per call (per round of chunk calls), counted from submission
+    'CONNECT_TIMEOUT': float(os.getenv('GROQ_CONNECT_TIMEOUT', 5)),
+    'READ_TIMEOUT': float(os.getenv('GROQ_READ_TIMEOUT', 60)),
+    'MAX_RETRIES': int(os.getenv('GROQ_MAX_RETRIES', 3)),  # Retries on 429/5xx, connection errors and timeouts
+    'BACKOFF_FACTOR': float(os.getenv('GROQ_BACKOFF_FACTOR', 1.0)),  # Seconds, doubled per retry, with jitter
+    'BACKOFF_MAX': float(os.getenv('GROQ_BACKOFF_MAX', 30)),
+    'POOL_SIZE': int(os.getenv('GROQ_POOL_SIZE', 10)),  # Keep-alive connections per host
+    'CHUNKED_MODE': os.getenv('GROQ_CHUNKED_MODE', 'True') == 'True',  # Map-reduce long documents
+    'CHUNK_CHARS': int(os.getenv('GROQ_CHUNK_CHARS', 4000)),  # Characters of text per prompt
+    'MAX_CHUNKS': int(os.getenv('GROQ_MAX_CHUNKS', 8)),
+    'CHUNK_CONCURRENCY': int(os.getenv('GROQ_CHUNK_CONCURRENCY', 4)),  # Concurrent chunk calls per process
+    'REDUCE_CHARS': int(os.getenv('GROQ_REDUCE_CHARS', 8000)),  # Characters of chunk outputs per reduce prompt
+    'COMBINED_MODE': os.getenv('GROQ_COMBINED_MODE', 'False') == 'True',  # One JSON completion for all tasks
+}
+
+# LLM response cache; BACKEND is 'disk', 'db', 'none' or a dotted CacheBackend path
+LLM_CACHE = {
+    'BACKEND': os.getenv('LLM_CACHE_BACKEND', 'disk'),
+    'DIR': os.path.join(BASE_DIR, 'cache', 'llm'),
+    'TTL': int(os.getenv('LLM_CACHE_TTL', 30 * 24 * 3600)),  # 30 days
+    'MAX_ENTRIES': int(os.getenv('LLM_CACHE_MAX_ENTRIES', 10000)),
+    'MAX_BYTES': int(os.getenv('LLM_CACHE_MAX_BYTES', 256 * 1024 * 1024)),  # 256MB
+}